@@ -0,0 +1,625 @@
+"""
+A compact bitboard chess position for the engine.
+
+Boards are plain Python ints (bit n = square n, a1 = 0, h8 = 63). Squares,
+colours (WHITE = True = 1) and piece types are python-chess's, so moves and
+positions convert both ways. Moves are ints:
+
+    from | to << 6 | promotion << 12 | flag << 15
+
+whose low 16 bits match bot_engine.encode_move. The position is changed in
+place with make()/unmake() and keeps its Polyglot Zobrist key up to date, so
+Position.key equals chess.polyglot.zobrist_hash() of the same position.
+
+Slider attacks come from per-square tables keyed by the relevant occupancy
+(the role magic numbers play in C engines: in CPython a dict lookup on the
+masked occupancy is faster than a magic multiply and shift). The tables are
+generated once and cached in TABLES_DIR as flat 64-bit arrays.
+"""
+import os
+from array import array
+
+import chess
+from chess.polyglot import POLYGLOT_RANDOM_ARRAY
+
+TABLES_DIR = os.path.expanduser("~/.checkmate_tables")
+TABLES_VERSION = 1
+
+FULL = (1 << 64) - 1
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(1, 7)
+WHITE, BLACK = True, False
+
+# Move flags (bits 15-16).
+NORMAL, DOUBLE_PUSH, EN_PASSANT, CASTLING = 0, 1, 2, 3
+
+# Castling rights bits.
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+
+FILE_A = 0x0101010101010101
+FILE_H = FILE_A << 7
+RANK_1 = 0xFF
+RANK_8 = RANK_1 << 56
+
+ROOK_DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+BISHOP_DIRECTIONS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+
+
+def squares(bb):
+    """Set squares of a bitboard, lowest first."""
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+def move_from(move):
+    return move & 63
+
+
+def move_to(move):
+    return (move >> 6) & 63
+
+
+def move_promotion(move):
+    return (move >> 12) & 7
+
+
+# ---------------------
+# Attack tables
+# ---------------------
+def _ray_attacks(sq, occupied, directions):
+    attacks = 0
+    f0, r0 = sq & 7, sq >> 3
+    for df, dr in directions:
+        f, r = f0 + df, r0 + dr
+        while 0 <= f < 8 and 0 <= r < 8:
+            bit = 1 << (r * 8 + f)
+            attacks |= bit
+            if occupied & bit:
+                break
+            f += df
+            r += dr
+    return attacks
+
+
+def _relevant_mask(sq, directions):
+    """Squares whose occupancy changes the attacks (board edges excluded)."""
+    mask = 0
+    f0, r0 = sq & 7, sq >> 3
+    for df, dr in directions:
+        f, r = f0 + df, r0 + dr
+        while 0 <= f + df < 8 and 0 <= r + dr < 8:
+            mask |= 1 << (r * 8 + f)
+            f += df
+            r += dr
+    return mask
+
+
+def _slider_table(directions):
+    masks = []
+    tables = []
+    for sq in range(64):
+        mask = _relevant_mask(sq, directions)
+        table = {}
+        subset = 0
+        while True:  # every subset of the mask (carry-rippler)
+            table[subset] = _ray_attacks(sq, subset, directions)
+            subset = (subset - mask) & mask
+            if not subset:
+                break
+        masks.append(mask)
+        tables.append(table)
+    return masks, tables
+
+
+def _step_table(steps):
+    table = []
+    for sq in range(64):
+        f0, r0 = sq & 7, sq >> 3
+        bb = 0
+        for df, dr in steps:
+            f, r = f0 + df, r0 + dr
+            if 0 <= f < 8 and 0 <= r < 8:
+                bb |= 1 << (r * 8 + f)
+        table.append(bb)
+    return table
+
+
+def _build_tables():
+    rook_masks, rook_tables = _slider_table(ROOK_DIRECTIONS)
+    bishop_masks, bishop_tables = _slider_table(BISHOP_DIRECTIONS)
+    between = [[0] * 64 for _ in range(64)]  # squares strictly between a and b
+    line = [[0] * 64 for _ in range(64)]     # the whole line through a and b
+    for a in range(64):
+        for df, dr in ROOK_DIRECTIONS + BISHOP_DIRECTIONS:
+            ray = _ray_attacks(a, 0, ((df, dr),))
+            full = ray | _ray_attacks(a, 0, ((-df, -dr),)) | (1 << a)
+            for b in squares(ray):
+                between[a][b] = ray & _ray_attacks(b, 0, ((-df, -dr),))
+                line[a][b] = full
+    return rook_masks, rook_tables, bishop_masks, bishop_tables, between, line
+
+
+def _pack_tables(tables):
+    """
+    Flatten the tables into one array: version, then for rooks and bishops
+    the 64 masks, 64 table sizes, all occupancies and all attacks, then the
+    between and line tables.
+    """
+    rook_masks, rook_tables, bishop_masks, bishop_tables, between, line = tables
+    packed = array('Q', [TABLES_VERSION])
+    for masks, per_square in ((rook_masks, rook_tables), (bishop_masks, bishop_tables)):
+        packed.extend(masks)
+        packed.extend(len(table) for table in per_square)
+        for table in per_square:
+            packed.extend(table.keys())
+        for table in per_square:
+            packed.extend(table.values())
+    for rows in (between, line):
+        for row in rows:
+            packed.extend(row)
+    return packed
+
+
+def _unpack_tables(packed):
+    if packed[0] != TABLES_VERSION:
+        raise ValueError("attack tables are from another version")
+    values = packed.tolist()
+    i = 1
+    result = []
+    for _ in range(2):
+        masks = values[i:i + 64]
+        sizes = values[i + 64:i + 128]
+        i += 128
+        total = sum(sizes)
+        keys, attacks = values[i:i + total], values[i + total:i + 2 * total]
+        i += 2 * total
+        per_square = []
+        start = 0
+        for size in sizes:
+            per_square.append(dict(zip(keys[start:start + size], attacks[start:start + size])))
+            start += size
+        result += [masks, per_square]
+    for _ in range(2):
+        result.append([values[i + 64 * a:i + 64 * a + 64] for a in range(64)])
+        i += 4096
+    if i != len(values):
+        raise ValueError("attack tables file has the wrong size")
+    return result
+
+
+def load_tables(tables_dir=TABLES_DIR):
+    """
+    (rook masks, rook tables, bishop masks, bishop tables, between, line):
+    loaded from the cache file, or generated and cached for next time.
+    """
+    path = os.path.join(tables_dir, f"attacks_v{TABLES_VERSION}.bin")
+    try:
+        with open(path, "rb") as f:
+            packed = array('Q')
+            packed.frombytes(f.read())
+        return _unpack_tables(packed)
+    except (OSError, ValueError, IndexError):
+        pass
+    tables = _build_tables()
+    try:
+        os.makedirs(tables_dir, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            _pack_tables(tables).tofile(f)
+        os.replace(tmp, path)  # never leave a half-written cache behind
+    except OSError as e:
+        print(f"Could not cache attack tables: {e}")
+    return tables
+
+
+ROOK_MASKS, ROOK_TABLES, BISHOP_MASKS, BISHOP_TABLES, BETWEEN, LINE = load_tables()
+KNIGHT_ATTACKS = _step_table(((1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)))
+KING_ATTACKS = _step_table(((1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1)))
+PAWN_ATTACKS = [_step_table(((1, -1), (-1, -1))), _step_table(((1, 1), (-1, 1)))]  # [BLACK, WHITE]
+
+
+def rook_attacks(sq, occupied):
+    return ROOK_TABLES[sq][occupied & ROOK_MASKS[sq]]
+
+
+def bishop_attacks(sq, occupied):
+    return BISHOP_TABLES[sq][occupied & BISHOP_MASKS[sq]]
+
+
+# ---------------------
+# Zobrist keys (Polyglot layout)
+# ---------------------
+# [colour][piece type][square]
+PIECE_KEYS = [[[0] * 64] + [[POLYGLOT_RANDOM_ARRAY[64 * ((pt - 1) * 2 + color) + sq]
+                             for sq in range(64)] for pt in range(1, 7)]
+              for color in (0, 1)]
+CASTLING_KEYS = [0] * 16
+for _rights in range(16):
+    for _i in range(4):
+        if _rights & (1 << _i):
+            CASTLING_KEYS[_rights] ^= POLYGLOT_RANDOM_ARRAY[768 + _i]
+EP_KEYS = [POLYGLOT_RANDOM_ARRAY[772 + f] for f in range(8)]
+TURN_KEY = POLYGLOT_RANDOM_ARRAY[780]
+
+# Rights lost when a piece moves from or to a square.
+CASTLING_MASK = [15] * 64
+CASTLING_MASK[chess.E1] &= ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASK[chess.H1] &= ~WHITE_KINGSIDE
+CASTLING_MASK[chess.A1] &= ~WHITE_QUEENSIDE
+CASTLING_MASK[chess.E8] &= ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_MASK[chess.H8] &= ~BLACK_KINGSIDE
+CASTLING_MASK[chess.A8] &= ~BLACK_QUEENSIDE
+
+# King destination -> (rook from, rook to, squares that must be empty, squares not attacked).
+CASTLES = {
+    chess.G1: (chess.H1, chess.F1, chess.BB_F1 | chess.BB_G1, (chess.E1, chess.F1, chess.G1)),
+    chess.C1: (chess.A1, chess.D1, chess.BB_B1 | chess.BB_C1 | chess.BB_D1, (chess.E1, chess.D1, chess.C1)),
+    chess.G8: (chess.H8, chess.F8, chess.BB_F8 | chess.BB_G8, (chess.E8, chess.F8, chess.G8)),
+    chess.C8: (chess.A8, chess.D8, chess.BB_B8 | chess.BB_C8 | chess.BB_D8, (chess.E8, chess.D8, chess.C8)),
+}
+
+PROMOTIONS = (QUEEN, KNIGHT, ROOK, BISHOP)
+
+
+class Position(object):
+    """
+    A chess position for search: bitboards per colour and piece type, a
+    mailbox for "what is on this square", and an undo stack.
+
+    values: optional [colour][piece type][square] table of scores (white
+        positive, black negative); their sum is kept in `score` as pieces
+        move, so an evaluation never has to scan the board.
+    """
+    def __init__(self, fen=chess.STARTING_FEN, values=None):
+        self.values = values
+        self.set_fen(fen)
+
+    @classmethod
+    def from_board(cls, board, values=None):
+        """The position of a python-chess board, with its move history."""
+        pos = cls(board.root().fen(), values)
+        for move in board.move_stack:
+            pos.make(pos.from_chess(move))
+        return pos
+
+    def set_fen(self, fen):
+        board = chess.Board(fen)
+        self.pieces = [[0] * 7, [0] * 7]
+        self.occupied = [0, 0]
+        self.mailbox = [0] * 64  # piece type | colour << 3, 0 = empty
+        self.score = 0
+        self.key = 0
+        for sq, piece in board.piece_map().items():
+            self._put(piece.color, piece.piece_type, sq)
+        self.turn = board.turn
+        self.castling = 0
+        for flag, rook in ((WHITE_KINGSIDE, chess.BB_H1), (WHITE_QUEENSIDE, chess.BB_A1),
+                           (BLACK_KINGSIDE, chess.BB_H8), (BLACK_QUEENSIDE, chess.BB_A8)):
+            if board.clean_castling_rights() & rook:
+                self.castling |= flag
+        self.ep = None
+        if board.ep_square is not None and \
+                PAWN_ATTACKS[not board.turn][board.ep_square] & self.pieces[board.turn][PAWN]:
+            self.ep = board.ep_square
+        self.halfmove = board.halfmove_clock
+        self.fullmove = board.fullmove_number
+        self.key ^= CASTLING_KEYS[self.castling]
+        if self.ep is not None:
+            self.key ^= EP_KEYS[self.ep & 7]
+        if self.turn:
+            self.key ^= TURN_KEY
+        self.stack = []
+        self.keys = []  # key before each move made, for repetition detection
+
+    def _put(self, color, piece_type, sq):
+        bit = 1 << sq
+        self.pieces[color][piece_type] |= bit
+        self.occupied[color] |= bit
+        self.mailbox[sq] = piece_type | color << 3
+        self.key ^= PIECE_KEYS[color][piece_type][sq]
+        if self.values is not None:
+            self.score += self.values[color][piece_type][sq]
+
+    def _remove(self, color, piece_type, sq):
+        bit = 1 << sq
+        self.pieces[color][piece_type] ^= bit
+        self.occupied[color] ^= bit
+        self.mailbox[sq] = 0
+        self.key ^= PIECE_KEYS[color][piece_type][sq]
+        if self.values is not None:
+            self.score -= self.values[color][piece_type][sq]
+
+    # ---------------------
+    # Queries
+    # ---------------------
+    def king_square(self, color):
+        return self.pieces[color][KING].bit_length() - 1
+
+    def attackers(self, sq, color, occupied):
+        """Pieces of `color` attacking `sq` with the given occupancy."""
+        p = self.pieces[color]
+        return ((PAWN_ATTACKS[not color][sq] & p[PAWN]) |
+                (KNIGHT_ATTACKS[sq] & p[KNIGHT]) |
+                (KING_ATTACKS[sq] & p[KING]) |
+                (bishop_attacks(sq, occupied) & (p[BISHOP] | p[QUEEN])) |
+                (rook_attacks(sq, occupied) & (p[ROOK] | p[QUEEN])))
+
+    def is_check(self):
+        return bool(self.attackers(self.king_square(self.turn), not self.turn,
+                                   self.occupied[0] | self.occupied[1]))
+
+    def is_capture(self, move):
+        return bool(self.mailbox[(move >> 6) & 63]) or (move >> 15) == EN_PASSANT
+
+    def piece_type_at(self, sq):
+        return self.mailbox[sq] & 7
+
+    def is_repetition(self):
+        """Whether this position occurred before since the last irreversible move."""
+        keys = self.keys
+        n = len(keys)
+        limit = max(0, n - self.halfmove)
+        for i in range(n - 2, limit - 1, -2):
+            if keys[i] == self.key:
+                return True
+        return False
+
+    # ---------------------
+    # Move generation
+    # ---------------------
+    def legal_moves(self, captures_only=False):
+        """
+        All legal moves as move ints. With captures_only, just captures and
+        promotions, and those promoting to a queen only.
+        Pins and checks are resolved while generating, so nothing has to be
+        made and unmade to test legality.
+        """
+        us = self.turn
+        them = not us
+        own = self.occupied[us]
+        opp = self.occupied[them]
+        occupied = own | opp
+        ours = self.pieces[us]
+        theirs = self.pieces[them]
+        king = ours[KING].bit_length() - 1
+        moves = []
+        append = moves.append
+
+        checkers = self.attackers(king, them, occupied)
+        # Own pieces between the king and an enemy slider are pinned.
+        pinned = 0
+        snipers = ((rook_attacks(king, opp) & (theirs[ROOK] | theirs[QUEEN])) |
+                   (bishop_attacks(king, opp) & (theirs[BISHOP] | theirs[QUEEN])))
+        for sniper in squares(snipers):
+            blockers = BETWEEN[king][sniper] & occupied
+            if blockers and not blockers & (blockers - 1) and blockers & own:
+                pinned |= blockers
+
+        targets = opp if captures_only else FULL & ~own
+        check_mask = FULL
+        # King moves: the destination must not be attacked once the king has left.
+        without_king = occupied ^ (1 << king)
+        for to in squares(KING_ATTACKS[king] & targets):
+            if not self.attackers(to, them, without_king):
+                append(king | to << 6)
+        if checkers & (checkers - 1):
+            return moves  # double check: only the king can move
+        if checkers:
+            checker = checkers.bit_length() - 1
+            check_mask = BETWEEN[king][checker] | checkers
+            targets &= check_mask
+
+        line = LINE[king]
+        for from_sq in squares(ours[KNIGHT] & ~pinned):
+            for to in squares(KNIGHT_ATTACKS[from_sq] & targets):
+                append(from_sq | to << 6)
+        for from_sq in squares(ours[BISHOP] | ours[QUEEN]):
+            attacks = bishop_attacks(from_sq, occupied) & targets
+            if pinned >> from_sq & 1:
+                attacks &= line[from_sq]
+            for to in squares(attacks):
+                append(from_sq | to << 6)
+        for from_sq in squares(ours[ROOK] | ours[QUEEN]):
+            attacks = rook_attacks(from_sq, occupied) & targets
+            if pinned >> from_sq & 1:
+                attacks &= line[from_sq]
+            for to in squares(attacks):
+                append(from_sq | to << 6)
+
+        # Pawns.
+        forward = 8 if us else -8
+        last_rank = RANK_8 if us else RANK_1
+        start_rank = 0xFF00 if us else 0xFF << 48
+        pawn_attacks = PAWN_ATTACKS[us]
+        for from_sq in squares(ours[PAWN]):
+            allowed = check_mask
+            if pinned >> from_sq & 1:
+                allowed &= line[from_sq]
+            captures = pawn_attacks[from_sq] & opp & allowed
+            to = from_sq + forward
+            pushes = 0
+            if not occupied >> to & 1:
+                pushes = (1 << to) & allowed
+                if not captures_only and (1 << from_sq) & start_rank:
+                    double = to + forward
+                    if not occupied >> double & 1 and (1 << double) & allowed:
+                        append(from_sq | double << 6 | DOUBLE_PUSH << 15)
+            if captures_only:
+                pushes &= last_rank  # promotions count as tactical moves
+            for to in squares(captures | pushes):
+                if (1 << to) & last_rank:
+                    for promotion in (PROMOTIONS[:1] if captures_only else PROMOTIONS):
+                        append(from_sq | to << 6 | promotion << 12)
+                else:
+                    append(from_sq | to << 6)
+
+        if self.ep is not None:
+            self._en_passant(king, them, occupied, moves)
+        if not captures_only and not checkers and self.castling:
+            self._castling(us, them, occupied, moves)
+        return moves
+
+    def _en_passant(self, king, them, occupied, moves):
+        ep = self.ep
+        captured = ep - 8 if self.turn else ep + 8
+        for from_sq in squares(PAWN_ATTACKS[them][ep] & self.pieces[self.turn][PAWN]):
+            # Rare enough to test directly: is the king attacked afterwards?
+            after = occupied ^ (1 << from_sq) ^ (1 << captured) | (1 << ep)
+            if not self.attackers(king, them, after) & ~(1 << captured):
+                moves.append(from_sq | ep << 6 | EN_PASSANT << 15)
+
+    def _castling(self, us, them, occupied, moves):
+        for to, flag in (((chess.G1, WHITE_KINGSIDE), (chess.C1, WHITE_QUEENSIDE)) if us else
+                         ((chess.G8, BLACK_KINGSIDE), (chess.C8, BLACK_QUEENSIDE))):
+            if not self.castling & flag:
+                continue
+            rook_from, rook_to, empty, safe = CASTLES[to]
+            if occupied & empty:
+                continue
+            if any(self.attackers(sq, them, occupied) for sq in safe):
+                continue
+            moves.append(safe[0] | to << 6 | CASTLING << 15)
+
+    # ---------------------
+    # Make / unmake
+    # ---------------------
+    def make(self, move):
+        from_sq = move & 63
+        to = (move >> 6) & 63
+        promotion = (move >> 12) & 7
+        flag = move >> 15
+        us = self.turn
+        them = not us
+        piece_type = self.mailbox[from_sq] & 7
+        captured = self.mailbox[to] & 7
+
+        self.stack.append((move, captured, self.castling, self.ep, self.halfmove,
+                           self.key, self.score))
+        self.keys.append(self.key)
+
+        if self.ep is not None:
+            self.key ^= EP_KEYS[self.ep & 7]
+            self.ep = None
+        if captured:
+            self._remove(them, captured, to)
+        self._remove(us, piece_type, from_sq)
+        self._put(us, promotion or piece_type, to)
+
+        if flag == EN_PASSANT:
+            self._remove(them, PAWN, to - 8 if us else to + 8)
+        elif flag == CASTLING:
+            rook_from, rook_to = CASTLES[to][:2]
+            self._remove(us, ROOK, rook_from)
+            self._put(us, ROOK, rook_to)
+        elif flag == DOUBLE_PUSH:
+            ep = (from_sq + to) >> 1
+            if PAWN_ATTACKS[us][ep] & self.pieces[them][PAWN]:
+                self.ep = ep
+                self.key ^= EP_KEYS[ep & 7]
+
+        rights = self.castling & CASTLING_MASK[from_sq] & CASTLING_MASK[to]
+        if rights != self.castling:
+            self.key ^= CASTLING_KEYS[self.castling] ^ CASTLING_KEYS[rights]
+            self.castling = rights
+
+        self.halfmove = 0 if captured or piece_type == PAWN else self.halfmove + 1
+        if not us:
+            self.fullmove += 1
+        self.turn = them
+        self.key ^= TURN_KEY
+
+    def unmake(self):
+        move, captured, castling, ep, halfmove, key, score = self.stack.pop()
+        self.keys.pop()
+        from_sq = move & 63
+        to = (move >> 6) & 63
+        promotion = (move >> 12) & 7
+        flag = move >> 15
+        them = self.turn
+        us = not them
+        moved = self.mailbox[to] & 7
+
+        self._remove(us, moved, to)
+        self._put(us, PAWN if promotion else moved, from_sq)
+        if captured:
+            self._put(them, captured, to)
+        if flag == EN_PASSANT:
+            self._put(them, PAWN, to - 8 if us else to + 8)
+        elif flag == CASTLING:
+            rook_from, rook_to = CASTLES[to][:2]
+            self._remove(us, ROOK, rook_to)
+            self._put(us, ROOK, rook_from)
+
+        if not us:
+            self.fullmove -= 1
+        self.turn = us
+        self.castling = castling
+        self.ep = ep
+        self.halfmove = halfmove
+        self.key = key
+        self.score = score
+
+    def make_null(self):
+        """Pass the move (for null-move pruning)."""
+        self.stack.append((0, 0, self.castling, self.ep, self.halfmove, self.key, self.score))
+        self.keys.append(self.key)
+        if self.ep is not None:
+            self.key ^= EP_KEYS[self.ep & 7]
+            self.ep = None
+        self.halfmove += 1
+        self.turn = not self.turn
+        self.key ^= TURN_KEY
+
+    def unmake_null(self):
+        _, _, castling, ep, halfmove, key, score = self.stack.pop()
+        self.keys.pop()
+        self.turn = not self.turn
+        self.ep = ep
+        self.halfmove = halfmove
+        self.key = key
+
+    # ---------------------
+    # python-chess interop
+    # ---------------------
+    def to_chess(self, move):
+        return chess.Move(move & 63, (move >> 6) & 63, ((move >> 12) & 7) or None)
+
+    def from_chess(self, move):
+        """The move int for a legal python-chess move in this position."""
+        low = move.from_square | move.to_square << 6 | (move.promotion or 0) << 12
+        for candidate in self.legal_moves():
+            if candidate & 0x7FFF == low:
+                return candidate
+        raise ValueError(f"illegal move {move.uci()} in {self.fen()}")
+
+    def fen(self):
+        board = chess.Board(None)
+        for sq in range(64):
+            piece = self.mailbox[sq]
+            if piece:
+                board.set_piece_at(sq, chess.Piece(piece & 7, bool(piece >> 3)))
+        board.turn = self.turn
+        rooks = 0
+        for flag, rook in ((WHITE_KINGSIDE, chess.BB_H1), (WHITE_QUEENSIDE, chess.BB_A1),
+                           (BLACK_KINGSIDE, chess.BB_H8), (BLACK_QUEENSIDE, chess.BB_A8)):
+            if self.castling & flag:
+                rooks |= rook
+        board.castling_rights = rooks
+        board.ep_square = self.ep
+        board.halfmove_clock = self.halfmove
+        board.fullmove_number = self.fullmove
+        return board.fen()
+
+
+def perft(pos, depth):
+    """Number of leaf nodes `depth` plies below `pos`."""
+    moves = pos.legal_moves()
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    nodes = 0
+    for move in moves:
+        pos.make(move)
+        nodes += perft(pos, depth - 1)
+        pos.unmake()
+    return nodes
@@ -0,0 +1,274 @@
+"""
+Measure board widget rendering and touch handling without a display.
+
+    python board_bench.py                              # every board and scenario
+    python board_bench.py --board feb2 --scenario capture --reps 50
+    python board_bench.py --size 1024x600 --json bench.json
+
+Each scenario taps squares through Kivy's normal touch dispatch, then draws
+frames until the result is on screen. Per board and scenario it reports
+frame-time percentiles, the time to dispatch a touch, touch -> drawn
+latency (dispatch plus the frame that shows it), and the widget and canvas
+instruction counts afterwards. Each freshly built board is drawn a few
+times first so its first (slow) frames are not counted as touch latency.
+On Linux without $DISPLAY the window is created on SDL's offscreen driver
+(software GL is fine).
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def setup_window(width, height):
+    """
+    Configure Kivy for benchmarking. Must run before anything imports kivy.
+    """
+    os.environ["KIVY_NO_ARGS"] = "1"
+    os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+    if sys.platform.startswith("linux") and not (os.environ.get("DISPLAY") or
+                                                 os.environ.get("WAYLAND_DISPLAY")):
+        os.environ.setdefault("SDL_VIDEODRIVER", "offscreen")
+    from kivy.config import Config
+    Config.set('graphics', 'width', str(width))
+    Config.set('graphics', 'height', str(height))
+    Config.set('graphics', 'maxfps', '0')  # never sleep between frames
+    Config.set('input', 'mouse', 'mouse,disable_multitouch')
+    # Keep our synthetic touches the only input.
+    for name, _ in Config.items('input'):
+        if name != 'mouse':
+            Config.remove_option('input', name)
+    from kivy.base import EventLoop
+    EventLoop.ensure_window()
+    return EventLoop
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def count_instructions(instruction):
+    """Instructions under `instruction`, including nested canvases."""
+    from kivy.graphics import Canvas, InstructionGroup
+    n = 1
+    groups = []
+    if isinstance(instruction, Canvas):
+        if instruction.has_before:
+            groups.append(instruction.before)
+        if instruction.has_after:
+            groups.append(instruction.after)
+    if isinstance(instruction, InstructionGroup):
+        groups.append(instruction)
+    for group in groups:
+        for child in group.children:
+            n += count_instructions(child)
+    return n
+
+
+# ---------------------
+# Boards
+# ---------------------
+class BoardAdapter(object):
+    """
+    Builds one board widget and maps algebraic squares to touch positions.
+    Subclasses define build(window), returning the root widget, and
+    square_center(square), the window position of an algebraic square.
+    Boards without move rules ignore `moves` in setup().
+    """
+    name = None
+    rules = False
+
+    def setup(self, moves):
+        pass
+
+
+class Feb2Board(BoardAdapter):
+    """feb2_working.ChessGameWidget: python-chess rules, move list, captures."""
+    name = "feb2"
+    rules = True
+
+    def build(self, window):
+        import feb2_working
+        window.fullscreen = False
+        self.widget = feb2_working.ChessGameWidget()
+        return self.widget
+
+    def square_center(self, square):
+        import chess
+        board = self.widget.chess_board
+        x, y = board.chess_square_to_ui_pos(chess.parse_square(square))
+        return x + board.square_size / 2.0, y + board.square_size / 2.0
+
+    def setup(self, moves):
+        import chess
+        board = self.widget.chess_board
+        for uci in moves:
+            move = chess.Move.from_uci(uci)
+            board.selected_piece = board.square_widgets[move.from_square]
+            board.execute_move(move)
+
+
+class GridBoard(BoardAdapter):
+    """Boards that lay squares out from center_x/center_y, white at the bottom."""
+    def square_center(self, square):
+        col = ord(square[0]) - ord('a')
+        row = int(square[1]) - 1
+        s = self.widget.square_size
+        return self.widget.center_x + (col + 0.5) * s, self.widget.center_y + (row + 0.5) * s
+
+
+class KivyBoard(GridBoard):
+    """kivy_board.ChessBoard (top-level prototype)."""
+    name = "kivy_board"
+
+    def build(self, window):
+        if os.path.dirname(HERE) not in sys.path:
+            sys.path.insert(0, os.path.dirname(HERE))
+        import kivy_board
+        size = window.size
+        self.widget = kivy_board.ChessBoard()
+        window.size = size
+        return self.widget
+
+
+class ChessboardV3(GridBoard):
+    """chessboard_v3.ChessBoard (selectable pieces, no rules)."""
+    name = "chessboard_v3"
+
+    def build(self, window):
+        import chessboard_v3
+        size = window.size
+        self.widget = chessboard_v3.ChessBoard()
+        window.size = size
+        return self.widget
+
+
+BOARDS = {cls.name: cls for cls in (Feb2Board, KivyBoard, ChessboardV3)}
+
+# Scenario: (moves played first on boards with rules, squares tapped per rep).
+# Every rep starts from a freshly built board.
+SCENARIOS = {
+    "select": ([], ["e2", "e2"]),
+    "highlight": ([], ["g1"]),
+    "move": ([], ["e2", "e4"]),
+    "capture": (["e2e4", "d7d5"], ["e4", "d5"]),
+    "promotion": (["a2a4", "b7b5", "a4b5", "a7a6", "b5a6", "c8b7", "a6b7", "b8c6"],
+                  ["b7", "a8"]),
+}
+
+
+# ---------------------
+# Measurement
+# ---------------------
+class FrameTimer(object):
+    def __init__(self, event_loop):
+        from kivy.graphics.opengl import glFinish
+        self.event_loop = event_loop
+        self.glFinish = glFinish
+        self.frames = []
+
+    def frame(self, record=True):
+        """Run one frame of the event loop and wait for the GPU to finish."""
+        start = time.perf_counter()
+        self.event_loop.idle()
+        self.glFinish()
+        elapsed = (time.perf_counter() - start) * 1000.0
+        if record:
+            self.frames.append(elapsed)
+        return elapsed
+
+
+def tap(x, y):
+    from kivy.tests.common import UnitTestTouch
+    touch = UnitTestTouch(x, y)
+    touch.touch_down()
+    touch.touch_up()
+
+
+def run_scenario(event_loop, adapter_cls, scenario, reps, settle_frames=3, warmup_frames=5):
+    from kivy.core.window import Window
+    moves, taps = SCENARIOS[scenario]
+    timer = FrameTimer(event_loop)
+    dispatches = []
+    latencies = []
+    widgets = instructions = 0
+    for _ in range(reps):
+        adapter = adapter_cls()
+        root = adapter.build(Window)
+        Window.add_widget(root)
+        if adapter.rules:
+            adapter.setup(moves)
+        for _ in range(warmup_frames):
+            timer.frame(record=False)
+        for square in taps:
+            start = time.perf_counter()
+            tap(*adapter.square_center(square))
+            dispatches.append((time.perf_counter() - start) * 1000.0)
+            timer.frame()
+            latencies.append((time.perf_counter() - start) * 1000.0)
+            for _ in range(settle_frames - 1):
+                timer.frame()
+        widgets = sum(1 for _ in root.walk())
+        instructions = count_instructions(root.canvas)
+        Window.remove_widget(root)
+    frames = sorted(timer.frames)
+    dispatches.sort()
+    latencies.sort()
+    return {
+        "board": adapter_cls.name,
+        "scenario": scenario,
+        "frame_ms": {"p50": percentile(frames, 50), "p95": percentile(frames, 95),
+                     "p99": percentile(frames, 99), "max": frames[-1] if frames else 0.0},
+        "touch_ms": {"p50": percentile(dispatches, 50), "p95": percentile(dispatches, 95),
+                     "max": dispatches[-1] if dispatches else 0.0},
+        "drawn_ms": {"p50": percentile(latencies, 50), "p95": percentile(latencies, 95),
+                     "max": latencies[-1] if latencies else 0.0},
+        "widgets": widgets,
+        "instructions": instructions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--board", action="append", choices=sorted(BOARDS),
+                        help="board(s) to measure (default: all)")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS),
+                        help="scenario(s) to run (default: all)")
+    parser.add_argument("--reps", type=int, default=20, help="repetitions per scenario")
+    parser.add_argument("--size", default="1024x600", help="window size WxH")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.lower().split("x"))
+
+    sys.path.insert(0, HERE)
+    event_loop = setup_window(width, height)
+    results = []
+    print(f"{'board':14s}{'scenario':11s}{'frame p50':>10s}{'p95':>8s}{'p99':>8s}"
+          f"{'touch p50':>11s}{'p95':>8s}{'drawn p50':>11s}{'p95':>8s}"
+          f"{'widgets':>9s}{'instr':>8s}")
+    for board in args.board or list(BOARDS):
+        for scenario in args.scenario or list(SCENARIOS):
+            # The prototypes print on every touch; keep the table readable.
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                r = run_scenario(event_loop, BOARDS[board], scenario, args.reps)
+            results.append(r)
+            f, t, d = r["frame_ms"], r["touch_ms"], r["drawn_ms"]
+            print(f"{board:14s}{scenario:11s}{f['p50']:10.2f}{f['p95']:8.2f}{f['p99']:8.2f}"
+                  f"{t['p50']:11.2f}{t['p95']:8.2f}{d['p50']:11.2f}{d['p95']:8.2f}"
+                  f"{r['widgets']:9d}{r['instructions']:8d}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"size": [width, height], "reps": args.reps, "results": results},
+                      f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+from collections import namedtuple
+
+from kivy.clock import Clock
+
+# Where the board goes: bottom-left corner of the squares, one square's size
+# and the whole board's size, all in window px.
+BoardGeometry = namedtuple("BoardGeometry", "origin square_size board_size")
+
+
+def fit_board(x, y, width, height, left=0, right=0, margin=0):
+    """
+    The largest board that fits in the box (x, y, width, height) after
+    reserving `left`/`right` px for side panels and `margin` px below and to
+    the left of the squares (e.g. for coordinates), centred in what is left.
+    Squares are whole pixels so square edges never fall between pixels.
+    """
+    free_width = width - left - right - margin
+    free_height = height - margin
+    square_size = max(1, int(min(free_width, free_height) // 8))
+    board_size = 8 * square_size
+    origin = (int(x + left + margin + (free_width - board_size) / 2.0),
+              int(y + margin + (free_height - board_size) / 2.0))
+    return BoardGeometry(origin, square_size, board_size)
+
+
+class BoardLayout(object):
+    """
+    Keeps a board fitted to a widget. Whenever the widget's size (or pos)
+    changes, e.g. a window resize or a screen rotation, the board geometry is
+    recomputed once per frame and passed to on_layout(geometry) if it
+    changed. The callback is expected to move what already exists rather
+    than rebuild it.
+    """
+    def __init__(self, widget, on_layout=None, left=0, right=0, margin=0, use_pos=True):
+        self.widget = widget
+        self.on_layout = on_layout
+        self.left = left
+        self.right = right
+        self.margin = margin
+        self.use_pos = use_pos
+        self.geometry = None
+        self._trigger = Clock.create_trigger(self.update)
+        widget.bind(size=self._trigger)
+        if use_pos:
+            widget.bind(pos=self._trigger)
+
+    def compute(self, width=None, height=None):
+        """Geometry for the widget's current size (or the one given)."""
+        x, y = self.widget.pos if self.use_pos else (0, 0)
+        return fit_board(x, y, self.widget.width if width is None else width,
+                         self.widget.height if height is None else height,
+                         self.left, self.right, self.margin)
+
+    def update(self, *args):
+        geometry = self.compute()
+        if geometry == self.geometry:
+            return
+        self.geometry = geometry
+        if self.on_layout is not None:
+            self.on_layout(geometry)
@@ -0,0 +1,139 @@
+from kivy.clock import Clock
+from kivy.graphics import (Color, InstructionGroup, Mesh, PopMatrix, PushMatrix,
+                           Rectangle, Translate)
+
+# Highlight kinds and their colours; each kind is drawn as one mesh.
+HIGHLIGHT_COLORS = {
+    "move": (0, 1, 0, 0.5),     # green for quiet moves
+    "capture": (1, 0, 0, 0.5),  # red for captures
+}
+
+
+class HighlightOverlay(object):
+    """
+    A persistent layer of square highlights.
+
+    The instructions (one Color and one Mesh per highlight kind) are created
+    once and added to the canvas once. Showing highlights rewrites the mesh
+    vertex buffers in place and clearing empties them, so selecting pieces
+    never adds or removes canvas instructions and nothing accumulates.
+    Squares are (col, row) grid cells counted from the board's bottom-left.
+    """
+    def __init__(self, canvas, origin, square_size, colors=HIGHLIGHT_COLORS):
+        self.origin = origin
+        self.square_size = square_size
+        self.group = InstructionGroup()
+        self.colors = {}
+        self.meshes = {}
+        for kind, rgba in colors.items():
+            self.colors[kind] = Color(*rgba)
+            self.meshes[kind] = Mesh(mode='triangles', vertices=[], indices=[])
+            self.group.add(self.colors[kind])
+            self.group.add(self.meshes[kind])
+        self.squares = {kind: [] for kind in colors}
+        canvas.add(self.group)
+
+    def show(self, squares):
+        """
+        Replace the highlights. `squares` maps a kind to its (col, row) cells;
+        kinds that are left out are cleared.
+        """
+        for kind, mesh in self.meshes.items():
+            cells = list(squares.get(kind, ()))
+            if not cells and not self.squares[kind]:
+                continue
+            self.squares[kind] = cells
+            self._fill(mesh, cells)
+
+    def clear(self):
+        self.show({})
+
+    def set_geometry(self, origin, square_size):
+        """Follow a moved or resized board, keeping the current highlights."""
+        self.origin = origin
+        self.square_size = square_size
+        for kind, mesh in self.meshes.items():
+            self._fill(mesh, self.squares[kind])
+
+    def _fill(self, mesh, cells):
+        ox, oy = self.origin
+        s = self.square_size
+        vertices = []
+        indices = []
+        for i, (col, row) in enumerate(cells):
+            x, y = ox + col * s, oy + row * s
+            vertices += [x, y, 0, 0, x + s, y, 0, 0, x + s, y + s, 0, 0, x, y + s, 0, 0]
+            n = 4 * i
+            indices += [n, n + 1, n + 2, n, n + 2, n + 3]
+        mesh.vertices = vertices
+        mesh.indices = indices
+
+
+RETURN_TIME = 0.15  # seconds for a dropped piece to glide back to its square
+
+
+class DragOverlay(object):
+    """
+    Draws a dragged widget (a piece) on top of the board as a single textured
+    rectangle behind a Translate, so following the finger is one matrix
+    update per touch event: no widget properties change and nothing is laid
+    out. The widget itself is hidden while it is lifted.
+    """
+    def __init__(self, canvas):
+        self.group = InstructionGroup()
+        self.translate = Translate(0, 0)
+        self.color = Color(1, 1, 1, 0)
+        self.rect = Rectangle()
+        for instruction in (PushMatrix(), self.translate, self.color, self.rect, PopMatrix()):
+            self.group.add(instruction)
+        canvas.add(self.group)
+        self.widget = None
+        self._return = None
+
+    @property
+    def active(self):
+        return self.widget is not None
+
+    def lift(self, widget):
+        """Hide `widget` and draw its texture where it was."""
+        self.drop()
+        self.widget = widget
+        self.rect.texture = widget.texture
+        self.rect.pos = widget.pos
+        self.rect.size = widget.size
+        self.translate.xy = (0, 0)
+        self.color.a = 1
+        widget.opacity = 0
+
+    def move_by(self, dx, dy):
+        """Offset the lifted widget from where it was lifted."""
+        self.translate.xy = (dx, dy)
+
+    def drop(self):
+        """Stop drawing the drag and show the widget again, wherever it is now."""
+        if self._return is not None:
+            self._return.cancel()
+            self._return = None
+        if self.widget is not None:
+            self.widget.opacity = 1
+            self.widget = None
+        self.color.a = 0
+        self.rect.texture = None
+
+    def return_home(self, duration=RETURN_TIME):
+        """Glide back to where the widget was lifted (an illegal drop), then drop."""
+        start = self.translate.xy
+        elapsed = [0.0]
+
+        def step(dt):
+            elapsed[0] += dt
+            t = min(1.0, elapsed[0] / duration) if duration else 1.0
+            ease = 1 - (1 - t) ** 3  # ease-out cubic
+            self.translate.xy = (start[0] * (1 - ease), start[1] * (1 - ease))
+            if t >= 1.0:
+                self.drop()
+                return False
+
+        if self._return is not None:
+            self._return.cancel()
+        self._return = Clock.schedule_interval(step, 0)
@@ -0,0 +1,101 @@
+from kivy.core.text import Label as CoreLabel
+from kivy.graphics import Color, Fbo, ClearColor, ClearBuffers, Line, Rectangle
+
+# Square colours as (even, odd) by (file + rank) parity, a1 being even.
+BOARD_COLORS = ((0.2, 0.2, 0.2, 1), (1, 1, 1, 1))
+LABEL_COLOR = (1, 1, 1, 1)
+BORDER_COLOR = (0.1, 0.1, 0.1, 1)
+
+
+class BoardBackground(object):
+    """
+    The static part of the board (squares, coordinates, border) rendered once
+    into an offscreen framebuffer and drawn as a single textured rectangle.
+
+    update() re-renders only when the square size, orientation or look
+    changes; moving the board just moves the rectangle.
+
+    origin: (x, y) of the bottom-left corner of a1 (h8 when flipped)
+    label_margin: px left of and below the board reserved for coordinates;
+        0 draws no coordinates
+    """
+    def __init__(self, canvas, origin, square_size, colors=BOARD_COLORS, flipped=False,
+                 label_margin=0, font_size=16, border=0):
+        self.origin = origin
+        self.square_size = square_size
+        self.colors = colors
+        self.flipped = flipped
+        self.label_margin = label_margin
+        self.font_size = font_size
+        self.border = border
+        self.fbo = None
+        self.renders = 0
+        self._rendered = None
+
+        self.color = Color(1, 1, 1, 1)
+        self.rect = Rectangle()
+        canvas.add(self.color)
+        canvas.add(self.rect)
+        self.render()
+
+    def update(self, origin=None, square_size=None, flipped=None):
+        if origin is not None:
+            self.origin = origin
+        if square_size is not None:
+            self.square_size = square_size
+        if flipped is not None:
+            self.flipped = flipped
+        if self._key() != self._rendered:
+            self.render()
+        else:
+            self._place()
+
+    def render(self):
+        s = self.square_size
+        m = self.label_margin
+        board = 8 * s
+        size = (int(round(board + m)), int(round(board + m)))
+        if self.fbo is None or tuple(self.fbo.size) != size:
+            self.fbo = Fbo(size=size)
+        fbo = self.fbo
+        fbo.clear()
+        with fbo:
+            ClearColor(0, 0, 0, 0)
+            ClearBuffers()
+            for row in range(8):
+                for col in range(8):
+                    Color(*self.colors[(col + row) % 2])
+                    Rectangle(pos=(m + col * s, m + row * s), size=(s, s))
+            if self.border:
+                Color(*BORDER_COLOR)
+                Line(rectangle=(m, m, board, board), width=self.border)
+            if m:
+                Color(*LABEL_COLOR)
+                files = "abcdefgh"[::-1] if self.flipped else "abcdefgh"
+                ranks = "87654321" if self.flipped else "12345678"
+                for i in range(8):
+                    self._text(files[i], (m + i * s, 0), (s, m))
+                    self._text(ranks[i], (0, m + i * s), (m, s))
+        fbo.draw()
+        self.rect.texture = fbo.texture
+        self.renders += 1
+        self._rendered = self._key()
+        self._place()
+
+    def _text(self, text, pos, box):
+        """Draw `text` centred in the box at `pos`. Must be inside the fbo."""
+        label = CoreLabel(text=text, font_size=self.font_size)
+        label.refresh()
+        texture = label.texture
+        x = pos[0] + (box[0] - texture.width) / 2.0
+        y = pos[1] + (box[1] - texture.height) / 2.0
+        Rectangle(texture=texture, pos=(x, y), size=texture.size)
+
+    def _place(self):
+        m = self.label_margin
+        self.rect.pos = (self.origin[0] - m, self.origin[1] - m)
+        self.rect.size = self.fbo.size
+
+    def _key(self):
+        return (self.square_size, self.flipped, self.colors, self.label_margin,
+                self.font_size, self.border)
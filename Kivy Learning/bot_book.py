@@ -0,0 +1,68 @@
+import mmap
+import struct
+from collections import OrderedDict
+
+BOOK_CACHE = 256  # positions whose book moves are kept in memory
+
+ENTRY = struct.Struct(">QHHI")  # key, move, weight, learn; 16 bytes, big-endian
+KEY = struct.Struct(">Q")
+
+
+class OpeningBook(object):
+    """
+    A Polyglot opening book (.bin), read in place through mmap. The file is
+    a list of 16-byte entries sorted by position key, so a lookup is a
+    binary search touching a few pages, and the book never has to fit in
+    memory. Keys are Polyglot Zobrist hashes, the same as bitboard.Position.key.
+
+    Moves are returned as (code, weight) with code in the engine's layout,
+    from | to << 6 | promotion piece type << 12. Castling is as Polyglot
+    stores it, king takes own rook (e1h1, e1a1, ...).
+    """
+    def __init__(self, path, cache_size=BOOK_CACHE):
+        self.path = path
+        self.capacity = cache_size
+        self._cache = OrderedDict()
+        self._file = open(path, "rb")
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # an empty file cannot be mapped
+            self._data = b""
+        self.size = len(self._data) // ENTRY.size
+
+    def _first(self, key):
+        """Index of the first entry with a key >= `key`."""
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if KEY.unpack_from(self._data, mid * ENTRY.size)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def moves(self, key):
+        """Book moves for the position with Polyglot key `key`, best first."""
+        moves = self._cache.get(key)
+        if moves is not None:
+            self._cache.move_to_end(key)
+            return moves
+        moves = []
+        for i in range(self._first(key), self.size):
+            entry_key, raw, weight, _ = ENTRY.unpack_from(self._data, i * ENTRY.size)
+            if entry_key != key:
+                break
+            if weight:
+                promotion = (raw >> 12) & 7
+                moves.append(((raw >> 6) & 63 | (raw & 63) << 6
+                              | (promotion + 1 if promotion else 0) << 12, weight))
+        moves.sort(key=lambda m: -m[1])
+        self._cache[key] = moves
+        if len(self._cache) > self.capacity:
+            self._cache.popitem(last=False)
+        return moves
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
@@ -0,0 +1,595 @@
+"""
+The built-in opponent: an alpha-beta searcher for the "Play Bot" mode.
+
+    searcher = Searcher()
+    result = searcher.search(board, time_left=120, increment=2)
+    board.push(result.move)
+
+Search is iterative deepening with principal variation search, a quiescence
+search over captures, null-move pruning and a fixed-size transposition
+table. Moves are ordered hash move first, then captures by MVV-LVA, then
+killer moves and finally quiet moves by their history score. The search
+runs on a bitboard.Position (make/unmake, incremental evaluation); boards
+and moves going in and out are python-chess's. Everything runs in the
+calling thread; bot_worker runs it in a separate process so the UI never
+waits on it.
+"""
+import random
+import time
+from collections import namedtuple
+
+import chess
+
+from bitboard import CASTLES, CASTLING, EN_PASSANT, KING, PAWN, Position
+
+INFINITY = 100000
+MATE = 32000             # score of mate at the root; mate in n plies is MATE - n
+MATE_BOUND = MATE - 1000  # scores beyond this are mates
+TB_WIN = MATE_BOUND - 1000  # tablebase win, below any mate, above any evaluation
+MAX_PLY = 64
+TT_BITS = 18             # 2**18 entries, ~4 MB
+CHECK_EVERY = 2048       # nodes between clock / stop checks
+
+# Time management: the share of the remaining clock one move may use.
+MOVES_TO_GO = 30         # assume this many moves are still to be played
+HARD_LIMIT_FACTOR = 3.0  # a move may overrun its budget up to this factor...
+MAX_SHARE = 0.3          # ...but never use more than this share of the clock
+SAFETY_MARGIN = 0.05     # s kept back for process and UI overhead
+
+# Transposition table bound types.
+EXACT, LOWER, UPPER = 1, 2, 3
+
+PIECE_VALUES = {chess.PAWN: 100, chess.KNIGHT: 320, chess.BISHOP: 330,
+                chess.ROOK: 500, chess.QUEEN: 900, chess.KING: 0}
+
+# Piece-square tables from white's point of view, a8 first (as printed).
+PST = {
+    chess.PAWN: (
+        0, 0, 0, 0, 0, 0, 0, 0,
+        50, 50, 50, 50, 50, 50, 50, 50,
+        10, 10, 20, 30, 30, 20, 10, 10,
+        5, 5, 10, 25, 25, 10, 5, 5,
+        0, 0, 0, 20, 20, 0, 0, 0,
+        5, -5, -10, 0, 0, -10, -5, 5,
+        5, 10, 10, -20, -20, 10, 10, 5,
+        0, 0, 0, 0, 0, 0, 0, 0),
+    chess.KNIGHT: (
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20, 0, 0, 0, 0, -20, -40,
+        -30, 0, 10, 15, 15, 10, 0, -30,
+        -30, 5, 15, 20, 20, 15, 5, -30,
+        -30, 0, 15, 20, 20, 15, 0, -30,
+        -30, 5, 10, 15, 15, 10, 5, -30,
+        -40, -20, 0, 5, 5, 0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50),
+    chess.BISHOP: (
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 10, 10, 5, 0, -10,
+        -10, 5, 5, 10, 10, 5, 5, -10,
+        -10, 0, 10, 10, 10, 10, 0, -10,
+        -10, 10, 10, 10, 10, 10, 10, -10,
+        -10, 5, 0, 0, 0, 0, 5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20),
+    chess.ROOK: (
+        0, 0, 0, 0, 0, 0, 0, 0,
+        5, 10, 10, 10, 10, 10, 10, 5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        0, 0, 0, 5, 5, 0, 0, 0),
+    chess.QUEEN: (
+        -20, -10, -10, -5, -5, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 5, 5, 5, 0, -10,
+        -5, 0, 5, 5, 5, 5, 0, -5,
+        0, 0, 5, 5, 5, 5, 0, -5,
+        -10, 5, 5, 5, 5, 5, 0, -10,
+        -10, 0, 5, 0, 0, 0, 0, -10,
+        -20, -10, -10, -5, -5, -10, -10, -20),
+    chess.KING: (
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+        20, 20, 0, 0, 0, 0, 20, 20,
+        20, 30, 10, 0, 0, 10, 30, 20),
+}
+
+# Value + square bonus per [colour][piece type][square], white positive;
+# the position keeps their sum up to date as pieces move.
+SQUARE_VALUES = [[[0] * 64], [[0] * 64]]
+for _pt in range(1, 7):
+    SQUARE_VALUES[chess.WHITE].append([PIECE_VALUES[_pt] + PST[_pt][sq ^ 56] for sq in chess.SQUARES])
+    SQUARE_VALUES[chess.BLACK].append([-PIECE_VALUES[_pt] - PST[_pt][sq] for sq in chess.SQUARES])
+
+# One search's outcome. score is in centipawns from the side to move.
+SearchResult = namedtuple("SearchResult", "move score depth nodes nps time pv ponder")
+
+
+def allocate_time(time_left, increment=0.0, moves_to_go=None):
+    """
+    Split the remaining clock into (soft, hard) limits in seconds for one move.
+    Iterative deepening does not start a new depth after the soft limit and
+    a running search is aborted at the hard limit.
+    """
+    usable = max(0.0, time_left - SAFETY_MARGIN)
+    soft = usable / (moves_to_go or MOVES_TO_GO) + 0.8 * increment
+    hard = min(usable * MAX_SHARE, soft * HARD_LIMIT_FACTOR)
+    soft = min(soft, hard)
+    return soft, hard
+
+
+def evaluate(pos):
+    """Static evaluation in centipawns from the side to move's point of view."""
+    return pos.score if pos.turn else -pos.score
+
+
+def tablebase_score(wdl, ply):
+    """Search score of a tablebase WDL result `ply` plies from the root."""
+    if wdl == 2:
+        return TB_WIN - ply
+    if wdl == -2:
+        return -TB_WIN + ply
+    return 0  # drawn, or decided only after the 50-move rule
+
+
+def encode_move(move):
+    """A python-chess move as a 15-bit code, the low bits of a bitboard move."""
+    return move.from_square | move.to_square << 6 | (move.promotion or 0) << 12
+
+
+class TranspositionTable(object):
+    """
+    A fixed-size hash table of search results, one entry per slot, newer or
+    deeper results replacing older ones. Each entry is two 64-bit words in
+    one flat buffer, so the table never grows and its memory is known up
+    front.
+
+    The buffer can be a multiprocessing.shared_memory block shared by
+    several search processes (see SharedTranspositionTable). Entries are
+    read and written without locks: the first word holds key XOR data, so an
+    entry half-written by another process simply fails to match its key
+    and counts as a miss.
+
+    Packed data: move (16 bits) | depth (8) | bound (2) | score + 2**17 (18).
+    """
+    SCORE_OFFSET = 1 << 17
+
+    def __init__(self, bits=TT_BITS, buffer=None):
+        self.size = 1 << bits
+        self.mask = self.size - 1
+        self.buffer = bytearray(self.nbytes(bits)) if buffer is None else buffer
+        self.table = memoryview(self.buffer).cast('Q')
+
+    @staticmethod
+    def nbytes(bits):
+        return 16 << bits
+
+    def clear(self):
+        for i in range(len(self.table)):
+            self.table[i] = 0
+
+    def probe(self, key):
+        """(move code, depth, bound, score) for `key`, or None."""
+        i = (key & self.mask) << 1
+        table = self.table
+        d = table[i + 1]
+        if table[i] ^ d != key:
+            return None
+        return (d & 0xFFFF, (d >> 16) & 0xFF, (d >> 24) & 3,
+                (d >> 26) - self.SCORE_OFFSET)
+
+    def store(self, key, move_code, depth, bound, score):
+        i = (key & self.mask) << 1
+        table = self.table
+        old = table[i + 1]
+        if table[i] ^ old == key and ((old >> 16) & 0xFF) > depth and bound != EXACT:
+            return  # keep the deeper result for this position
+        d = (move_code | depth << 16 | bound << 24
+             | (score + self.SCORE_OFFSET) << 26)
+        table[i] = key ^ d
+        table[i + 1] = d
+
+    def usage(self):
+        """Share of slots in use, sampled over the first 1000."""
+        n = min(1000, self.size)
+        return sum(1 for i in range(n) if self.table[2 * i + 1]) / float(n)
+
+    def close(self):
+        self.table.release()
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """
+    A TranspositionTable in a named shared memory block. The creator
+    (name=None) owns the block and unlinks it in close(); other processes
+    attach by passing its name.
+    """
+    def __init__(self, bits=TT_BITS, name=None):
+        from multiprocessing import shared_memory
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.nbytes(bits))
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        super(SharedTranspositionTable, self).__init__(bits, self.shm.buf)
+
+    def close(self):
+        super(SharedTranspositionTable, self).close()
+        self.buffer = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class SearchAborted(Exception):
+    pass
+
+
+class Searcher(object):
+    """
+    Iterative-deepening alpha-beta search.
+
+    on_info(info) is called after every completed depth with a dict of
+    depth, score, nodes, nps, time (s) and pv (list of UCI strings).
+    should_stop() is polled every CHECK_EVERY nodes; returning True ends the
+    search with the best move found so far. on_nodes(nodes), if set, is
+    called at the same points, and so is ponder_hit() while pondering (see
+    search).
+
+    For a parallel (Lazy SMP) search several searchers share one `tt`.
+    Helpers (helper > 0) run the same iterative deepening, odd helpers one
+    ply deeper, so they fill the table ahead of the main searcher; only the
+    main searcher's result is used.
+
+    An opening `book` (bot_book.OpeningBook) and endgame `tablebase`
+    (bot_tablebase.Tablebase) are optional. A book or tablebase move at the
+    root is played without searching; inside the search, positions the
+    tables cover are scored from them.
+    """
+    def __init__(self, tt_bits=TT_BITS, on_info=None, should_stop=None, tt=None, helper=0,
+                 book=None, tablebase=None):
+        self.tt = tt if tt is not None else TranspositionTable(tt_bits)
+        self.helper = helper
+        self.book = book
+        self.tablebase = tablebase
+        self.on_info = on_info
+        self.should_stop = should_stop
+        self.on_nodes = None
+        self.ponder_hit = None
+        self.pondering = False
+        self.nodes = 0
+        self.killers = [[0, 0] for _ in range(MAX_PLY + 1)]
+        self.history = [[0] * 4096 for _ in range(2)]
+
+    def new_game(self):
+        if not self.helper:
+            self.tt.clear()
+        self.history = [[0] * 4096 for _ in range(2)]
+
+    def search(self, board, time_left=None, increment=0.0, movetime=None, depth=None,
+               moves_to_go=None, ponder=False):
+        """
+        Find a move for the side to move on `board`, a python-chess board
+        (left as it was; its move history is used to spot repetitions).
+
+        Limits: `movetime` seconds, or a budget from `time_left`/`increment`
+        (see allocate_time), and/or a maximum `depth`. With no limits the
+        search runs until should_stop() says otherwise.
+
+        ponder=True searches on the opponent's time: the time limits are
+        ignored until ponder_hit() returns True (the predicted move was
+        played) and are counted from then on, so the tree built so far is
+        kept and the clock only pays for the rest.
+        """
+        if movetime is not None:
+            self.soft_limit = self.hard_limit = movetime
+        elif time_left is not None:
+            self.soft_limit, self.hard_limit = allocate_time(time_left, increment, moves_to_go)
+        else:
+            self.soft_limit = self.hard_limit = None
+        max_depth = min(depth or MAX_PLY, MAX_PLY)
+
+        self.pos = Position.from_board(board, SQUARE_VALUES)
+        self.start = self.clock_start = time.perf_counter()
+        self.pondering = ponder
+        self.nodes = 0
+        self.next_check = CHECK_EVERY
+        self.killers = [[0, 0] for _ in range(MAX_PLY + 1)]
+        for table in self.history:
+            for i in range(len(table)):
+                table[i] >>= 3  # age last move's history
+
+        legal = self.pos.legal_moves()
+        if not legal:
+            return SearchResult(None, 0, 0, 0, 0, 0.0, [], None)
+        known = self.known_move(legal)
+        if known is not None:
+            return known
+        first = self.pos.to_chess(legal[0])
+        best = SearchResult(first, 0, 0, 0, 0, 0.0, [first.uci()], None)
+        for d in range(1, max_depth + 1):
+            try:
+                score = self.root(min(d + (self.helper & 1), MAX_PLY))
+            except SearchAborted:
+                break  # every level unmade its move on the way out
+            elapsed = time.perf_counter() - self.start
+            pv = self.principal_variation(d)
+            if not pv or pv[0] != self.root_move:
+                pv = [self.root_move]
+            if pv[0] is not None:
+                pv = [self.pos.to_chess(move) for move in pv]
+                best = SearchResult(pv[0], score, d, self.nodes,
+                                    int(self.nodes / elapsed) if elapsed else 0, elapsed,
+                                    [m.uci() for m in pv], pv[1] if len(pv) > 1 else None)
+            if self.on_info is not None:
+                self.on_info({"depth": d, "score": score, "nodes": self.nodes,
+                              "nps": best.nps, "time": elapsed, "pv": best.pv})
+            if len(legal) == 1 or abs(score) >= MATE_BOUND:
+                break
+            if self.pondering:
+                self.check_ponder_hit()
+            elif (self.soft_limit is not None
+                  and time.perf_counter() - self.clock_start >= self.soft_limit):
+                break
+        elapsed = time.perf_counter() - self.start
+        return best._replace(nodes=self.nodes, time=elapsed,
+                             nps=int(self.nodes / elapsed) if elapsed else 0)
+
+    def known_move(self, legal):
+        """A SearchResult from the book or the tablebase, or None."""
+        move, score = None, 0
+        if self.book is not None:
+            entries = dict(self.book.moves(self.pos.key))
+            if entries:
+                choices = []
+                for m in legal:
+                    to = (m >> 6) & 63
+                    if m >> 15 == CASTLING:
+                        to = CASTLES[to][0]  # the book has the king take the rook
+                    weight = entries.get(m & 63 | to << 6 | m & 0x7000)
+                    if weight:
+                        choices.append((m, weight))
+                if choices:
+                    move = random.choices([m for m, _ in choices],
+                                          [w for _, w in choices])[0]
+        if move is None and self.tablebase is not None:
+            found = self.tablebase.root_move(self.pos, legal)
+            if found is not None:
+                move, score = found[0], tablebase_score(found[1], 0)
+        if move is None:
+            return None
+        move = self.pos.to_chess(move)
+        return SearchResult(move, score, 0, 0, 0, time.perf_counter() - self.start,
+                            [move.uci()], None)
+
+    # ---------------------
+    # Search
+    # ---------------------
+    def check_limits(self):
+        self.next_check = self.nodes + CHECK_EVERY
+        if self.on_nodes is not None:
+            self.on_nodes(self.nodes)
+        if self.pondering:
+            self.check_ponder_hit()
+        elif (self.hard_limit is not None
+              and time.perf_counter() - self.clock_start >= self.hard_limit):
+            raise SearchAborted()
+        if self.should_stop is not None and self.should_stop():
+            raise SearchAborted()
+
+    def check_ponder_hit(self):
+        """Switch from pondering to a normal, timed search once the move is played."""
+        if self.ponder_hit is not None and self.ponder_hit():
+            self.pondering = False
+            self.clock_start = time.perf_counter()
+
+    def root(self, depth):
+        self.root_move = None
+        return self.negamax(depth, -INFINITY, INFINITY, 0, True)
+
+    def negamax(self, depth, alpha, beta, ply, allow_null):
+        pos = self.pos
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            self.check_limits()
+
+        if ply:
+            if pos.halfmove >= 100 or pos.is_repetition():
+                return 0
+            if ply >= MAX_PLY:
+                return evaluate(pos)  # check extensions can run past the depth cap
+            # Mate distance pruning.
+            alpha = max(alpha, -MATE + ply)
+            beta = min(beta, MATE - ply - 1)
+            if alpha >= beta:
+                return alpha
+            # Right after a capture or pawn move the tables may know the result.
+            if self.tablebase is not None and pos.halfmove == 0:
+                wdl = self.tablebase.wdl(pos)
+                if wdl is not None:
+                    return tablebase_score(wdl, ply)
+
+        in_check = pos.is_check()
+        if in_check:
+            depth += 1
+        if depth <= 0:
+            return self.quiesce(alpha, beta, ply)
+
+        key = pos.key
+        pv_node = beta - alpha > 1
+        hash_move = 0
+        entry = self.tt.probe(key)
+        if entry is not None:
+            hash_move, tt_depth, bound, tt_score = entry
+            if ply and tt_depth >= depth and not pv_node:
+                tt_score = self.score_from_tt(tt_score, ply)
+                if bound == EXACT or (bound == LOWER and tt_score >= beta) or \
+                        (bound == UPPER and tt_score <= alpha):
+                    return tt_score
+
+        # Null move: if passing still fails high, the position is good enough.
+        us = pos.turn
+        if allow_null and not pv_node and not in_check and depth >= 3 and ply and \
+                pos.occupied[us] & ~(pos.pieces[us][PAWN] | pos.pieces[us][KING]) and \
+                evaluate(pos) >= beta:
+            pos.make_null()
+            try:
+                score = -self.negamax(depth - 3, -beta, -beta + 1, ply + 1, False)
+            finally:
+                pos.unmake_null()
+            if score >= beta:
+                return beta if score < MATE_BOUND else score
+
+        best_score = -INFINITY
+        best_code = 0
+        original_alpha = alpha
+        moves = 0
+        for move in self.ordered_moves(hash_move, ply):
+            capture = pos.is_capture(move)
+            pos.make(move)
+            try:
+                if moves == 0:
+                    score = -self.negamax(depth - 1, -beta, -alpha, ply + 1, True)
+                else:
+                    score = -self.negamax(depth - 1, -alpha - 1, -alpha, ply + 1, True)
+                    if alpha < score < beta:
+                        score = -self.negamax(depth - 1, -beta, -alpha, ply + 1, True)
+            finally:
+                pos.unmake()
+            moves += 1
+            if score > best_score:
+                best_score = score
+                best_code = move & 0x7FFF
+                if score > alpha:
+                    alpha = score
+                    if not ply:
+                        self.root_move = move
+                    if score >= beta:
+                        if not capture:
+                            self.record_cutoff(best_code, depth, ply)
+                        break
+
+        if moves == 0:
+            return -MATE + ply if in_check else 0
+
+        if best_score >= beta:
+            bound = LOWER
+        elif best_score > original_alpha:
+            bound = EXACT
+        else:
+            bound = UPPER
+        self.tt.store(key, best_code, min(depth, 255), bound, self.score_to_tt(best_score, ply))
+        return best_score
+
+    def quiesce(self, alpha, beta, ply):
+        pos = self.pos
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            self.check_limits()
+        stand_pat = evaluate(pos)
+        if stand_pat >= beta or ply >= MAX_PLY:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+        for move in self.ordered_captures():
+            pos.make(move)
+            try:
+                score = -self.quiesce(-beta, -alpha, ply + 1)
+            finally:
+                pos.unmake()
+            if score >= beta:
+                return score
+            alpha = max(alpha, score)
+        return alpha
+
+    # ---------------------
+    # Move ordering
+    # ---------------------
+    def mvv_lva(self, move):
+        mailbox = self.pos.mailbox
+        victim = mailbox[(move >> 6) & 63] & 7
+        if not victim and move >> 15 == EN_PASSANT:
+            victim = PAWN
+        attacker = mailbox[move & 63] & 7
+        promotion = (move >> 12) & 7
+        return 10 * (PIECE_VALUES[victim] if victim else 0) + (KING - attacker) + \
+            (PIECE_VALUES[promotion] if promotion else 0)
+
+    def ordered_moves(self, hash_move, ply):
+        pos = self.pos
+        mailbox = pos.mailbox
+        killers = self.killers[ply] if ply <= MAX_PLY else (0, 0)
+        history = self.history[pos.turn]
+        scored = []
+        for move in pos.legal_moves():
+            code = move & 0x7FFF
+            if code == hash_move:
+                score = 1 << 30
+            elif mailbox[(move >> 6) & 63] or code >> 12 or move >> 15 == EN_PASSANT:
+                score = (1 << 24) + self.mvv_lva(move)
+            elif code == killers[0]:
+                score = (1 << 23) + 1
+            elif code == killers[1]:
+                score = 1 << 23
+            else:
+                score = history[code & 0xFFF]
+            scored.append((score, move))
+        scored.sort(reverse=True)
+        return [move for _, move in scored]
+
+    def ordered_captures(self):
+        moves = self.pos.legal_moves(captures_only=True)
+        moves.sort(key=self.mvv_lva, reverse=True)
+        return moves
+
+    def record_cutoff(self, code, depth, ply):
+        if ply <= MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != code:
+                killers[1] = killers[0]
+                killers[0] = code
+        history = self.history[self.pos.turn]
+        history[code & 0xFFF] = min(history[code & 0xFFF] + depth * depth, (1 << 22))
+
+    # ---------------------
+    # Helpers
+    # ---------------------
+    def score_to_tt(self, score, ply):
+        """Mate scores are stored relative to the node, not the root."""
+        if score >= MATE_BOUND:
+            return score + ply
+        if score <= -MATE_BOUND:
+            return score - ply
+        return score
+
+    def score_from_tt(self, score, ply):
+        if score >= MATE_BOUND:
+            return score - ply
+        if score <= -MATE_BOUND:
+            return score + ply
+        return score
+
+    def principal_variation(self, depth):
+        """Follow hash moves from the root, checking each is still legal."""
+        pos = self.pos
+        pv = []
+        seen = set()
+        for _ in range(depth):
+            entry = self.tt.probe(pos.key)
+            if entry is None or pos.key in seen:
+                break
+            seen.add(pos.key)
+            move = next((m for m in pos.legal_moves() if m & 0x7FFF == entry[0]), None)
+            if move is None:
+                break
+            pv.append(move)
+            pos.make(move)
+        for _ in pv:
+            pos.unmake()
+        return pv
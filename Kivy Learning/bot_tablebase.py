@@ -0,0 +1,82 @@
+import os
+from collections import OrderedDict
+
+import chess
+import chess.syzygy
+
+TB_CACHE = 4096    # positions whose WDL result is kept in memory
+TB_MAX_FILES = 16  # table files kept open (and mapped) at once
+
+# Win/draw/loss from the side to move: 2 win, 1 win spoilt by the 50-move
+# rule, 0 draw, -1 loss saved by the 50-move rule, -2 loss.
+WIN, CURSED_WIN, DRAW, BLESSED_LOSS, LOSS = 2, 1, 0, -1, -2
+
+
+class Tablebase(object):
+    """
+    Syzygy endgame tables from a local directory, probed with python-chess
+    (which maps the files rather than loading them). Only TB_MAX_FILES
+    tables are open at a time and WDL results are cached per position key,
+    so memory stays small on the Pi.
+
+    Positions are bitboard.Positions; anything with castling rights or more
+    pieces than the largest table present is not probed.
+    """
+    def __init__(self, directory, cache_size=TB_CACHE, max_files=TB_MAX_FILES):
+        self.tables = chess.syzygy.open_tablebase(directory, load_dtz=True, max_fds=max_files)
+        self.max_pieces = 0
+        for name in os.listdir(directory):
+            table, ext = os.path.splitext(name)
+            if ext == ".rtbw" and chess.syzygy.is_tablename(table):
+                self.max_pieces = max(self.max_pieces, len(table) - 1)  # 'v' is no piece
+        self.capacity = cache_size
+        self._cache = OrderedDict()
+        self.hits = 0
+
+    def covers(self, pos):
+        occupied = pos.occupied[0] | pos.occupied[1]
+        return not pos.castling and 2 < bin(occupied).count("1") <= self.max_pieces
+
+    def wdl(self, pos):
+        """WDL of `pos` for the side to move, or None if it is not in the tables."""
+        if not self.covers(pos):
+            return None
+        key = pos.key
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return self._cache[key]
+        wdl = self.tables.get_wdl(chess.Board(pos.fen()))
+        self._cache[key] = wdl
+        if len(self._cache) > self.capacity:
+            self._cache.popitem(last=False)
+        return wdl
+
+    def root_move(self, pos, moves):
+        """
+        (move, wdl) for the best of `moves` (legal moves of `pos`) by the
+        tables, or None if they do not cover it. Wins are converted by the
+        shortest distance to a zeroing move (DTZ), losses are drawn out by
+        the longest.
+        """
+        if not self.covers(pos):
+            return None
+        board = chess.Board(pos.fen())
+        best = None
+        for move in moves:
+            board.push(pos.to_chess(move))
+            wdl = self.tables.get_wdl(board)
+            dtz = self.tables.get_dtz(board)
+            board.pop()
+            if wdl is None or dtz is None:
+                return None
+            # WDL and DTZ are theirs after our move: we want their worst WDL,
+            # then the highest DTZ, which is nearest zero when they lose
+            # (DTZ < 0) and furthest from it when they win.
+            rank = (-wdl, dtz)
+            if best is None or rank > best[0]:
+                best = (rank, move, -wdl)
+        return best[1:] if best else None
+
+    def close(self):
+        self.tables.close()
@@ -0,0 +1,284 @@
+import multiprocessing
+import os
+import queue
+import time
+
+import chess
+
+from bot_book import OpeningBook
+from bot_engine import TT_BITS, Searcher, SharedTranspositionTable
+from bot_tablebase import Tablebase
+
+POLL_INTERVAL = 0.05  # s between UI polls for engine output
+ENGINE_NICE = 5       # lower the engine's priority so the UI wins any contention
+PONDER_WAIT = 0.005   # s between checks while a finished ponder search waits for its move
+
+
+def _run(commands, results, wanted, ponderhit, tt_bits, helper=0, tt_name=None, done=None,
+         node_counts=None, book=None, tablebase=None):
+    """
+    The engine process: wait for a command, search, report, repeat. Progress
+    goes out on `results` as ("info", search_id, info) after every depth and
+    ("bestmove", search_id, result) at the end. A search stops early as soon
+    as `wanted` (shared with the UI) no longer holds its id. A ponder search
+    starts its clock when `ponderhit` is set to its id, and never reports its
+    move before then unless it is stopped.
+
+    With several processes (see BotWorker's `threads`) they all search the
+    same position over the shared table named `tt_name`. Only the main one
+    (helper 0) reports; when it finishes it sets `done` to the search id,
+    which stops the helpers. Each process keeps its node count in
+    node_counts[helper] so the main one can report the total.
+
+    `book` and `tablebase` are the paths of a Polyglot book and a Syzygy
+    directory; each process maps its own view of the files.
+    """
+    try:
+        os.nice(ENGINE_NICE)
+    except (AttributeError, OSError):
+        pass  # not available on this platform
+    tt = SharedTranspositionTable(tt_bits, name=tt_name) if tt_name else None
+    searcher = Searcher(tt_bits=tt_bits, tt=tt, helper=helper,
+                        book=_open(OpeningBook, book), tablebase=_open(Tablebase, tablebase))
+    while True:
+        command = commands.get()
+        kind = command[0]
+        if kind == "quit":
+            break
+        if kind == "new_game":
+            searcher.new_game()
+            continue
+        if kind == "go":
+            _, search_id, fen, moves, limits = command
+            if abs(wanted.value) != search_id:
+                continue  # superseded before it started
+            board = chess.Board(fen)
+            for uci in moves:
+                board.push_uci(uci)
+            if node_counts is None:
+                searcher.should_stop = lambda: wanted.value != search_id
+            else:
+                node_counts[helper] = 0
+                searcher.on_nodes = lambda nodes: node_counts.__setitem__(helper, nodes)
+                searcher.should_stop = lambda: (wanted.value != search_id
+                                                or done.value == search_id)
+            searcher.ponder_hit = lambda: ponderhit.value == search_id
+            if helper:
+                searcher.search(board, **limits)
+                continue
+            searcher.on_info = lambda info: results.put(("info", search_id, _total(info, node_counts)))
+            result = searcher.search(board, **limits)
+            if done is not None:
+                done.value = search_id
+            while (searcher.pondering and wanted.value == search_id
+                   and ponderhit.value != search_id):
+                time.sleep(PONDER_WAIT)  # searched out before the opponent moved
+            results.put(("bestmove", search_id, _total({
+                "move": result.move.uci() if result.move else None,
+                "ponder": result.ponder.uci() if result.ponder else None,
+                "score": result.score, "depth": result.depth, "nodes": result.nodes,
+                "nps": result.nps, "time": result.time, "pv": result.pv}, node_counts)))
+    for resource in (tt, searcher.book, searcher.tablebase):
+        if resource is not None:
+            resource.close()
+
+
+def _open(cls, path):
+    if path is None:
+        return None
+    try:
+        return cls(path)
+    except OSError as e:
+        print(f"Engine: cannot open {path}: {e}")
+        return None
+
+
+def _total(report, node_counts):
+    """`report` with nodes and nps summed over every search process."""
+    if node_counts is not None:
+        nodes = report["nodes"] + sum(node_counts[1:])
+        report.update(nodes=nodes, nps=int(nodes / report["time"]) if report["time"] else 0)
+    return report
+
+
+class BotWorker(object):
+    """
+    Runs the engine in its own process so a search never blocks the Kivy or
+    Qt event loop.
+
+    go() hands a position to the engine and returns at once. The UI calls
+    poll() from its own timer (e.g. Clock.schedule_interval(worker.poll,
+    POLL_INTERVAL)); it never blocks and delivers, on the UI thread:
+
+        on_info(info)     after every completed depth: depth, score, nodes,
+                          nps, time, pv
+        on_move(result)   when the search ends: move and ponder (UCI or
+                          None) plus the final depth, score, nodes, nps,
+                          time and pv
+
+    Output from a search that was superseded by a newer go() is discarded.
+
+    While the opponent thinks the engine need not sit idle:
+
+        ponder(board, move)   searches the position after the opponent's
+                              predicted `move` (the ponder move of the last
+                              result). If that move is played, ponderhit()
+                              turns it into the real search, keeping
+                              everything found so far; otherwise cancel() it
+                              and go() as usual.
+        analyse(board)        searches `board` with no limit, only for its
+                              on_info reports; it never calls on_move.
+
+    analysis() returns the latest report of whatever is being searched
+    (depth, score, pv, ..., and the mode), polling first. It never blocks,
+    so it is cheap enough to call from any UI timer.
+
+    threads > 1 runs a Lazy SMP search: that many engine processes search
+    every position together, sharing one transposition table in shared
+    memory. Reported nodes and nps are the totals over all of them.
+
+    `book` (a Polyglot .bin file) and `tablebase` (a directory of Syzygy
+    files) let the engine answer book and endgame positions without a
+    search; depth 0 in a result means the move came from one of them.
+    """
+    def __init__(self, tt_bits=TT_BITS, on_info=None, on_move=None, threads=1,
+                 book=None, tablebase=None):
+        self.on_info = on_info
+        self.on_move = on_move
+        self.search_id = 0
+        self.searching = False
+        self.mode = None        # "search", "ponder" or "analyse" while searching
+        self.ponder_move = None
+        self.last_info = None
+        self.threads = max(1, threads)
+        # Forking starts the engine without re-running the UI script, which
+        # "spawn" would do (opening a second window). The child only ever
+        # runs the search. Spawn is the fallback where fork does not exist.
+        method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+        context = multiprocessing.get_context(method)
+        self._results = context.Queue()
+        self._wanted = context.Value('i', 0, lock=False)  # id of the search still wanted
+        self._ponderhit = context.Value('i', 0, lock=False)  # id of the ponder search played into
+        self._tt = None
+        shared = ()
+        if self.threads > 1:
+            self._tt = SharedTranspositionTable(tt_bits)
+            shared = (self._tt.name, context.Value('i', 0, lock=False),
+                      context.Array('q', self.threads, lock=False))
+        self._queues = []
+        self._processes = []
+        for helper in range(self.threads):
+            commands = context.Queue()
+            process = context.Process(target=_run, daemon=True,
+                                      args=(commands, self._results, self._wanted,
+                                            self._ponderhit, tt_bits, helper) + shared,
+                                      kwargs={"book": book, "tablebase": tablebase})
+            process.start()
+            self._queues.append(commands)
+            self._processes.append(process)
+
+    def _send(self, command):
+        for commands in self._queues:
+            commands.put(command)
+
+    def go(self, board, time_left=None, increment=0.0, movetime=None, depth=None):
+        """
+        Start searching `board` (a python-chess board; its move history is
+        sent too, for repetition detection). Any running search is stopped.
+        """
+        return self._start(board, "search", {"time_left": time_left, "increment": increment,
+                                             "movetime": movetime, "depth": depth})
+
+    def ponder(self, board, move, time_left=None, increment=0.0):
+        """
+        Search the reply to `move`, the opponent's expected move on `board`,
+        until ponderhit() or cancel(). The limits are the engine's clock,
+        which only starts at ponderhit().
+        """
+        board = board.copy()
+        board.push(move)
+        search_id = self._start(board, "ponder", {"time_left": time_left,
+                                                  "increment": increment, "ponder": True})
+        self.ponder_move = move
+        return search_id
+
+    def ponderhit(self):
+        """The ponder move was played: carry on as a normal search. False if not pondering."""
+        if not self.searching or self.mode != "ponder":
+            return False
+        self._ponderhit.value = self.search_id
+        self.mode = "search"
+        self.ponder_move = None
+        return True
+
+    def analyse(self, board):
+        """Search `board` indefinitely in the background; see analysis()."""
+        return self._start(board, "analyse", {})
+
+    def analysis(self):
+        """Latest report from the running (or last) search, after a poll()."""
+        self.poll()
+        return self.last_info
+
+    def _start(self, board, mode, limits):
+        self.search_id += 1
+        self._wanted.value = self.search_id  # also stops the previous search
+        root = board.root()
+        self._send(("go", self.search_id, root.fen(),
+                    [move.uci() for move in board.move_stack], limits))
+        self.searching = True
+        self.mode = mode
+        self.ponder_move = None
+        self.last_info = None
+        return self.search_id
+
+    def stop(self):
+        """Ask the running search to finish now; its move still arrives via poll()."""
+        if self.searching:
+            self._wanted.value = -self.search_id
+
+    def cancel(self):
+        """Stop the running search and throw its result away."""
+        self.stop()
+        self.search_id += 1
+        self.searching = False
+        self.mode = None
+        self.ponder_move = None
+
+    def new_game(self):
+        self.cancel()
+        self._send(("new_game",))
+
+    def poll(self, *args):
+        """Deliver everything the engine has reported so far. Never blocks."""
+        while True:
+            try:
+                kind, search_id, payload = self._results.get_nowait()
+            except queue.Empty:
+                return
+            if search_id != self.search_id:
+                continue  # from a search nobody is waiting for any more
+            payload["mode"] = self.mode
+            if kind == "info":
+                self.last_info = payload
+                if self.on_info is not None:
+                    self.on_info(payload)
+            elif kind == "bestmove":
+                mode = self.mode
+                self.searching = False
+                self.mode = None
+                if mode == "analyse":
+                    self.last_info = payload
+                elif self.on_move is not None:
+                    self.on_move(payload)
+
+    def close(self):
+        self._wanted.value = 0
+        self._send(("quit",))
+        for process in self._processes:
+            process.join(timeout=2)
+            if process.is_alive():
+                process.terminate()
+        if self._tt is not None:
+            self._tt.close()
+            self._tt = None
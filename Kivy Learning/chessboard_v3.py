@@ -4,6 +4,8 @@ from kivy.uix.image import Image
 from kivy.graphics import Color, Rectangle
 from kivy.core.window import Window
 
+from piece_assets import get_atlas
+
 # Set window size for clarity
 Window.size = (960, 540)
 Window.left = 0
@@ -88,27 +90,15 @@ class ChessBoard(Widget):
             'black_pawn': [(1, col) for col in range(8)],
         }
 
-        piece_images = {
-            'white_rook': 'figures/white_rook.png',
-            'white_knight': 'figures/white_knight.png',
-            'white_bishop': 'figures/white_bishop.png',
-            'white_queen': 'figures/white_queen.png',
-            'white_king': 'figures/white_king.png',
-            'white_pawn': 'figures/white_pawn.png',
-            'black_rook': 'figures/black_rook.png',
-            'black_knight': 'figures/black_knight.png',
-            'black_bishop': 'figures/black_bishop.png',
-            'black_queen': 'figures/black_queen.png',
-            'black_king': 'figures/black_king.png',
-            'black_pawn': 'figures/black_pawn.png',
-        }
+        # Every piece shares one atlas texture; no image files are read per piece.
+        atlas = get_atlas(self.square_size)
 
         for piece, positions in piece_positions.items():
             for row, col in positions:
                 piece_image = SelectablePiece(
                     square_size=self.square_size,
                     board_offset=(self.center_x, self.center_y),
-                    source=piece_images[piece],  # Load the appropriate image
+                    texture=atlas.texture(piece),  # Region of the shared atlas
                     size_hint=(None, None),
                     size=(self.square_size, self.square_size),
                     pos=(self.center_x + col * self.square_size,
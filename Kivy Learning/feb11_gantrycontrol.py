@@ -1,17 +1,33 @@
-import glob
+import queue
 import serial
-import time
 import threading
+import time
+from concurrent.futures import Future
 
 from kivy.clock import Clock
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.gridlayout import GridLayout
 from kivy.uix.button import Button
-from kivy.uix.textinput import TextInput
 from kivy.uix.label import Label
 
+from grbl_streamer import GrblStreamer, GrblError
+from jog_controller import JogController
+from grbl_status import GrblStatusPoller
+from grbl_discovery import GrblDiscovery
+from gcode_compiler import compile_move
+from link_metrics import LinkMetrics
+from log_view import LogView
+try:
+    from grbl_sim import GrblSimulator
+except ImportError:  # pseudo-terminals need a POSIX system
+    GrblSimulator = None
+
 # Constant feedrate as in your original code
 FEEDRATE = 10000  # mm/min
+STATUS_INTERVAL = 0.2  # seconds between "?" status polls (GRBL suggests <= 5 Hz)
+QUEUE_TIMEOUT = 1.0    # seconds send_gcode waits for room in a full command queue
+HEALTH_INTERVAL = 1.0  # seconds between link health panel refreshes
+DEBUG_LOG_FILE = None  # e.g. "gantry_debug.log" to keep a rotating copy of the debug log
 
 class GantryControlWidget(BoxLayout):
     def __init__(self, **kwargs):
@@ -21,9 +37,20 @@ class GantryControlWidget(BoxLayout):
         self.padding = 10
 
         # Internal state variables
-        self.active_movements = {}
-        self.jog_step = 1
         self.simulate = False  # When True, widget is in simulation mode.
+        self.streamer = None   # GrblStreamer once connected.
+        self.simulator = None  # GrblSimulator used when no hardware is found.
+        self.discovery = GrblDiscovery()
+        self._connect_thread = None
+        self._stop_event = threading.Event()  # Set to abandon the current connect attempt.
+        self.jog = JogController(self.send_gcode, self.send_realtime, FEEDRATE)
+        # Status reports arrive on the reader thread; the trigger folds all the
+        # samples received during one frame into a single UI update.
+        self._status_trigger = Clock.create_trigger(self.update_position)
+        self.status = GrblStatusPoller(interval=STATUS_INTERVAL,
+                                       on_sample=self._status_trigger)
+        # Latency histograms and error counts; kept across reconnects.
+        self.metrics = LinkMetrics()
 
         # ---------------------
         # LEFT PANEL: Directional Buttons
@@ -58,24 +85,34 @@ class GantryControlWidget(BoxLayout):
         # ---------------------
         right_panel = BoxLayout(orientation='vertical', spacing=10, size_hint=(0.3, 1))
 
-        # Step size controls
-        step_label = Label(text="Step Size (mm):", size_hint_y=0.1)
-        self.step_input = TextInput(text=str(self.jog_step), multiline=False,
-                                    input_filter='int', size_hint_y=0.1)
-        self.step_input.bind(text=self.on_step_change)
+        # Look for GRBL again (e.g. after plugging the controller back in)
+        button_row = BoxLayout(orientation='horizontal', spacing=5, size_hint_y=0.2)
+        extra_button = Button(text="Reconnect to GRBL")
+        extra_button.bind(on_press=self.on_extra_press)
+        dump_button = Button(text="Dump Link Stats")
+        dump_button.bind(on_press=self.on_dump_press)
+        button_row.add_widget(extra_button)
+        button_row.add_widget(dump_button)
+
+        # Live machine position from GRBL status reports
+        self.position_label = Label(text="X: -  Y: -  (Unknown)", size_hint_y=0.1)
 
-        # Placeholder for any extra action
-        extra_button = Button(text="Reconnect to GRBL", size_hint_y=0.2)
-        
         # Debug log area (visible in simulation mode)
         debug_label = Label(text="Debug Log:", size_hint_y=0.1)
-        self.debug_log = TextInput(text="", readonly=True, multiline=True, size_hint_y=0.6)
+        log_row = BoxLayout(orientation='horizontal', spacing=5, size_hint_y=0.5)
+        self.debug_log = LogView(log_file=DEBUG_LOG_FILE, size_hint_x=0.6)
+
+        # Link health next to the log: counters and per-kind latency percentiles
+        self.health_label = Label(text="No traffic yet", size_hint_x=0.4, font_size='11sp',
+                                  halign='left', valign='top')
+        self.health_label.bind(size=self.health_label.setter('text_size'))
+        log_row.add_widget(self.debug_log)
+        log_row.add_widget(self.health_label)
 
-        right_panel.add_widget(step_label)
-        right_panel.add_widget(self.step_input)
-        right_panel.add_widget(extra_button)
+        right_panel.add_widget(button_row)
+        right_panel.add_widget(self.position_label)
         right_panel.add_widget(debug_label)
-        right_panel.add_widget(self.debug_log)
+        right_panel.add_widget(log_row)
 
         # Add both panels to the widget.
         self.add_widget(left_panel)
@@ -83,120 +120,298 @@ class GantryControlWidget(BoxLayout):
 
         # Schedule the connection attempt after initialization.
         Clock.schedule_once(lambda dt: self.connect_to_grbl(), 0)
+        Clock.schedule_interval(self.update_health, HEALTH_INTERVAL)
 
     def connect_to_grbl(self):
         """
-        Attempt to connect to a GRBL device via serial. If no device is found
-        or an error occurs, the widget switches to simulation mode.
+        Start looking for GRBL in the background so the UI never blocks on
+        port probing. If no device is found the widget switches to simulation
+        mode and talks to a GrblSimulator on a pseudo-terminal instead; if that
+        is unavailable too, commands are only written to the debug log.
         """
-        grbl_port = self.find_grbl_port()
-        if not grbl_port:
+        if (self._connect_thread is not None and self._connect_thread.is_alive()
+                and not self._stop_event.is_set()):
+            return
+        # A fresh event per attempt, so a stopped attempt that is still
+        # finishing a probe cannot be revived by this one.
+        self._stop_event = threading.Event()
+        self._connect_thread = threading.Thread(target=self._connect_worker,
+                                                args=(self._stop_event,), daemon=True)
+        self._connect_thread.start()
+
+    def _connect_worker(self, stop_event):
+        found = self.discovery.discover()
+        if stop_event.is_set():
+            self._abandon(found)
+            return
+        if found is None:
             print("No GRBL device found, switching to simulation mode.")
             self.simulate = True
-            self.log_debug("Simulation mode enabled: No GRBL device found.")
+            grbl_port = self.start_simulator()
+            if not grbl_port:
+                self.log_debug("Simulation mode enabled: No GRBL device found.")
+                return
+            self.log_debug(f"Simulation mode enabled: simulated GRBL on {grbl_port}")
+            try:
+                ser = serial.Serial(grbl_port, 115200, timeout=1)
+            except Exception as e:
+                print(f"Error connecting to GRBL: {e}")
+                self.log_debug(f"Simulation mode enabled due to error: {e}")
+                return
+        else:
+            grbl_port, ser, banner = found
+            self.simulate = False
+            self.log_debug(f"Found {banner} on {grbl_port}")
+        self.attach_serial(ser, grbl_port)
+
+    def attach_serial(self, ser, grbl_port):
+        """
+        Start streaming to an open, identified GRBL port.
+        """
+        self.ser = ser
+        self.streamer = GrblStreamer(self.ser, on_message=self.on_grbl_message,
+                                     status=self.status,
+                                     on_disconnect=self.on_grbl_disconnect,
+                                     metrics=self.metrics)
+        self.streamer.start()
+        self.send_gcode("$X")  # Clear alarms.
+        print(f"Connected to GRBL on {grbl_port}")
+
+    def disconnect_grbl(self):
+        """
+        Stop streaming and close the port, e.g. before reconnecting. Any
+        connect or reconnect attempt still running is abandoned.
+        """
+        self._stop_event.set()
+        self._close_streamer()
+
+    def _close_streamer(self):
+        streamer, self.streamer = self.streamer, None
+        if streamer is not None:
+            streamer.stop()
+            try:
+                streamer.ser.close()
+            except Exception:
+                pass
+
+    def on_grbl_disconnect(self, error):
+        """
+        Called on the reader thread when the port goes away (cable unplugged).
+        Closes the dead port and keeps retrying with exponential backoff until
+        GRBL comes back.
+        """
+        self._close_streamer()
+        self.log_debug(f"GRBL disconnected: {error}")
+        if self.simulate or self._stop_event.is_set():
             return
+        self._stop_event = threading.Event()
+        self._connect_thread = threading.Thread(target=self._reconnect_worker,
+                                                args=(self._stop_event,), daemon=True)
+        self._connect_thread.start()
 
-        try:
-            self.ser = serial.Serial(grbl_port, 9600, timeout=1)
-            time.sleep(2)  # Allow GRBL to initialize.
-            self.send_gcode("$X")  # Clear alarms.
-            print(f"Connected to GRBL on {grbl_port}")
-        except Exception as e:
-            print(f"Error connecting to GRBL: {e}")
-            self.simulate = True
-            self.log_debug(f"Simulation mode enabled due to error: {e}")
+    def _reconnect_worker(self, stop_event):
+        def on_retry(delay):
+            self.metrics.count("retries")
+            self.log_debug(f"GRBL not found, retrying in {delay:.1f} s")
+
+        found = self.discovery.connect_with_backoff(stop_event, on_retry=on_retry)
+        if stop_event.is_set():
+            self._abandon(found)
+            return
+        if found is not None:
+            grbl_port, ser, banner = found
+            self.log_debug(f"Reconnected to {banner} on {grbl_port}")
+            self.attach_serial(ser, grbl_port)
+
+    def _abandon(self, found):
+        """Close a port found by an attempt that was stopped meanwhile."""
+        if found is not None:
+            try:
+                found[1].close()
+            except Exception:
+                pass
+
+    def close(self):
+        """
+        Release everything before the app exits: connect attempts, the port,
+        the jog thread, the simulator and the debug log file (flushing any
+        lines still queued for it).
+        """
+        self.disconnect_grbl()
+        self.jog.stop()
+        if self.simulator is not None:
+            self.simulator.stop()
+            self.simulator = None
+        self.debug_log.close()
 
-    def find_grbl_port(self):
-        ports = glob.glob("/dev/ttyUSB*")
-        return ports[0] if ports else None
+    def start_simulator(self):
+        """
+        Start a simulated GRBL on a pseudo-terminal and return its port, or
+        None where ptys are not available (e.g. Windows).
+        """
+        if GrblSimulator is None:
+            return None
+        if self.simulator is None:
+            try:
+                self.simulator = GrblSimulator()
+                self.simulator.start()
+            except OSError as e:
+                print(f"Could not start GRBL simulator: {e}")
+                self.simulator = None
+                return None
+        return self.simulator.port
 
     def send_gcode(self, command):
         """
-        Send a G-code command to GRBL. In simulation mode, append the command
-        to the debug log instead.
+        Queue a G-code command for GRBL and return a Future that resolves when
+        GRBL acknowledges it. The call does not wait for the "ok"; lines are
+        streamed as fast as GRBL's RX buffer allows. If the streamer's queue is
+        full the call waits up to QUEUE_TIMEOUT seconds for room. In simulation
+        mode without a simulator, append the command to the debug log instead.
+        While GRBL is not connected (e.g. during a reconnect) the Future fails
+        with a ConnectionError.
         """
         print(f"Sending: {command}")
-        if self.simulate:
-            self.log_debug(f"Simulated send: {command}")
-            return
+        future = Future()
+        if self.streamer is None:
+            if self.simulate:
+                self.log_debug(f"Simulated send: {command}")
+                future.set_result("ok")
+                return future
+            self.metrics.count("dropped")
+            future.set_exception(ConnectionError("GRBL is not connected"))
+            future.add_done_callback(self.on_gcode_done)
+            return future
 
         try:
-            self.ser.write(f"{command}\n".encode())
-            while True:
-                response = self.ser.readline().decode().strip()
-                if response:
-                    print(f"GRBL Response: {response}")
-                if response == "ok":
-                    break
+            future = self.streamer.send(command, timeout=QUEUE_TIMEOUT)
+        except queue.Full as e:
+            self.metrics.count("dropped")
+            future.set_exception(e)
+        future.add_done_callback(self.on_gcode_done)
+        return future
+
+    def stream_gcode(self, lines):
+        """
+        Stream a whole block of G-code (e.g. one chess move) to GRBL, keeping
+        several lines in flight so the planner never runs dry between segments.
+        Returns the list of per-line Futures.
+        """
+        return [self.send_gcode(line) for line in lines if line.strip()]
+
+    def execute_move(self, path, retreat=None):
+        """
+        Move a piece: compile the approach, magnet on, the dragged path,
+        magnet off and retreat into one blended absolute program and stream
+        it as a unit. `path` is a list of (x, y) in mm starting at the piece.
+        """
+        return self.stream_gcode(compile_move(path, retreat))
+
+    def send_realtime(self, byte):
+        """
+        Send a GRBL realtime byte (jog cancel, feed hold, status query), which
+        bypasses the RX buffer and takes effect immediately.
+        """
+        if self.streamer is None:
+            if self.simulate:
+                self.log_debug(f"Simulated realtime: {byte!r}")
+            else:
+                self.log_debug(f"Realtime command not sent, GRBL is not connected: {byte!r}")
+            return
+        try:
+            self.streamer.send_realtime(byte)
         except Exception as e:
+            print(f"Error sending realtime command: {e}")
+            self.log_debug(f"Error sending realtime command: {e}")
+
+    def on_gcode_done(self, future):
+        """
+        Report errors from GRBL. Runs on the streamer's reader thread.
+        """
+        if future.cancelled():
+            return
+        e = future.exception()
+        if e is None:
+            return
+        if isinstance(e, GrblError):
+            print(f"GRBL Response: {e.response} for {e.command}")
+        else:
             print(f"Error sending command: {e}")
-            self.log_debug(f"Error sending command: {e}")
+        self.log_debug(f"Error sending command: {e}")
+
+    def on_grbl_message(self, message):
+        """
+        Handle lines from GRBL that are not command responses (alarms, messages).
+        Runs on the streamer's reader thread.
+        """
+        print(f"GRBL Response: {message}")
+        if message.startswith("ALARM") or message.startswith("[MSG"):
+            self.log_debug(message)
 
     def log_debug(self, message):
         """
-        Append a message to the debug log widget on the main thread.
+        Append a message to the debug log. Safe from any thread; the widget
+        batches messages into one update per frame.
         """
-        Clock.schedule_once(lambda dt: self._append_debug(message), 0)
+        self.debug_log.log(message)
 
-    def _append_debug(self, message):
-        self.debug_log.text += message + "\n"
-        self.debug_log.cursor = (0, len(self.debug_log.text))
+    def update_position(self, dt):
+        """
+        Show the newest status sample. Scheduled at most once per frame.
+        """
+        sample = self.status.ring.latest()
+        if sample is None:
+            return
+        state, t, mx, my, mz, wx, wy, wz, feed, spindle = sample
+        self.position_label.text = f"X: {wx:.2f}  Y: {wy:.2f}  ({state})"
 
-    def send_jog_command(self, dx, dy):
+    def update_health(self, dt):
         """
-        Construct and send the jogging command based on dx, dy, and the current
-        jog step size.
+        Refresh the link health panel.
         """
-        step = self.jog_step
-        cmd = "$J=G21G91"
-        if dx:
-            cmd += f"X{dx * step}"
-        if dy:
-            cmd += f"Y{dy * step}"
-        cmd += f"F{FEEDRATE}"
-        self.send_gcode(cmd)
+        self.health_label.text = self.metrics.summary()
 
-    def movement_thread(self, dx, dy, direction_id):
+    def dump_metrics(self, prefix="link_metrics"):
         """
-        This thread repeatedly sends jog commands until the movement is stopped.
+        Write the histograms and counters to <prefix>_<time>.json and .csv and
+        return the two paths.
         """
-        self.active_movements[direction_id] = True
-        while self.active_movements.get(direction_id, False):
-            self.send_jog_command(dx, dy)
-            time.sleep(0.1)
-        print(f"Stopped movement: {direction_id}")
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        json_path, csv_path = f"{prefix}_{stamp}.json", f"{prefix}_{stamp}.csv"
+        self.metrics.dump_json(json_path)
+        self.metrics.dump_csv(csv_path)
+        return json_path, csv_path
 
     def on_extra_press(self, instance):
-        
+        """
+        Drop the current connection and look for GRBL again.
+        """
+        self.disconnect_grbl()
         self.connect_to_grbl()
 
-
-    def on_move_press(self, instance):
+    def on_dump_press(self, instance):
         """
-        Start a movement thread when a directional button is pressed.
+        Save the link statistics for later analysis.
         """
-        dx = instance.dx
-        dy = instance.dy
-        direction_id = instance.direction_id
-        t = threading.Thread(target=self.movement_thread, args=(dx, dy, direction_id))
-        t.daemon = True
-        t.start()
+        try:
+            json_path, csv_path = self.dump_metrics()
+        except OSError as e:
+            self.log_debug(f"Could not write link stats: {e}")
+            return
+        self.log_debug(f"Link stats written to {json_path} and {csv_path}")
 
-    def on_move_release(self, instance):
+
+    def on_move_press(self, instance):
         """
-        Stop the movement when the directional button is released.
+        Start jogging in the button's direction while it is held.
         """
-        direction_id = instance.direction_id
-        self.active_movements[direction_id] = False
+        self.jog.press(instance.direction_id, instance.dx, instance.dy)
 
-    def on_step_change(self, instance, value):
+    def on_move_release(self, instance):
         """
-        Update the jog step size when the user modifies the TextInput.
+        Cancel the jog when the directional button is released.
         """
-        try:
-            self.jog_step = int(value)
-        except ValueError:
-            self.jog_step = 1
+        self.jog.release(instance.direction_id)
 
 # ---------------------
 # Example Integration
@@ -211,6 +426,10 @@ if __name__ == '__main__':
             # Instantiate the GantryControlWidget and add it to the app.
             gantry_widget = GantryControlWidget()
             root.add_widget(gantry_widget)
+            self.gantry_widget = gantry_widget
             return root
 
+        def on_stop(self):
+            self.gantry_widget.close()
+
     TestApp().run()
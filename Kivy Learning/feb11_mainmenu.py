@@ -7,6 +7,8 @@ from kivy.uix.button import Button
 from kivy.uix.label import Label
 from kivy.uix.image import Image
 
+from feb11_gantrycontrol import GantryControlWidget
+
 # Global font size for the whole application.
 FONT_SIZE = 32
 
@@ -78,7 +80,9 @@ class GantryControlScreen(BaseScreen):
         super(GantryControlScreen, self).__init__(**kwargs)
         root = FloatLayout()
         content = BoxLayout(orientation='vertical', size_hint=(1, 1), padding=[0, 60, 0, 0])
-        content.add_widget(Label(text="Manual Gantry Control", font_size=FONT_SIZE))
+        # The widget owns the GRBL connection (one GrblStreamer for the whole app).
+        self.gantry = GantryControlWidget()
+        content.add_widget(self.gantry)
         root.add_widget(content)
         self.add_back_button(root)
         self.add_widget(root)
@@ -113,5 +117,8 @@ class FullApp(App):
         sm.add_widget(RFIDScreen(name="newwidget"))
         return sm
 
+    def on_stop(self):
+        self.root.get_screen("gantry").gantry.close()
+
 if __name__ == '__main__':
     FullApp().run()
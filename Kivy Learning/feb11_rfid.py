@@ -3,7 +3,6 @@ from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.gridlayout import GridLayout
 from kivy.uix.button import Button
 from kivy.uix.label import Label
-from kivy.uix.scrollview import ScrollView
 from kivy.uix.image import Image
 from kivy.clock import Clock
 import threading
@@ -11,6 +10,8 @@ import time
 import sys
 from kivy.app import App
 
+from log_view import LogView
+
 # Check platform for compatibility
 running_on_pi = sys.platform.startswith("linux")
 
@@ -37,11 +38,9 @@ class NFCReaderScreen(Screen):
         
         # Left side layout for the log
         log_layout = BoxLayout(orientation='vertical', size_hint=(0.4, 1))
-        self.log_label = Label(text="Scan Log:\n", size_hint=(1, 1), halign="left", valign="top")
-        self.log_label.bind(size=self.log_label.setter('text_size'))
-        scroll_view = ScrollView()
-        scroll_view.add_widget(self.log_label)
-        log_layout.add_widget(scroll_view)
+        log_layout.add_widget(Label(text="Scan Log:", size_hint=(1, 0.1)))
+        self.log_view = LogView(size_hint=(1, 0.9))
+        log_layout.add_widget(self.log_view)
         self.layout.add_widget(log_layout)
         
         # Right side layout
@@ -111,7 +110,7 @@ class NFCReaderScreen(Screen):
         self.log(f"Updated display to {icon_source}")
 
     def log(self, message):
-        self.log_label.text += f"\n{message}"
+        self.log_view.log(message)
 
 class NFCApp(App):
     def build(self):
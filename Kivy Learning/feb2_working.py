@@ -1,35 +1,38 @@
+import time
+
 import chess
 import chess.pgn
 
 from kivy.app import App
+from kivy.clock import Clock
 from kivy.uix.widget import Widget
 from kivy.uix.image import Image
 from kivy.uix.label import Label
 from kivy.uix.floatlayout import FloatLayout
 from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.scrollview import ScrollView
-from kivy.graphics import Color, Rectangle
 from kivy.core.window import Window
 
+from move_cache import MoveCache
+from board_overlay import DragOverlay, HighlightOverlay
+from board_texture import BoardBackground
+from piece_assets import PIECE_NAMES, get_atlas
+from move_list import MoveList
+from board_layout import BoardLayout
+from bot_worker import POLL_INTERVAL, BotWorker
+
 # --- Settings ---
 Window.fullscreen = True
-
-# --- Image File Mapping ---
-# Map chess piece symbols (as returned by chess.Piece.symbol()) to image file paths.
-piece_images = {
-    'P': 'figures/white_pawn.png',
-    'R': 'figures/white_rook.png',
-    'N': 'figures/white_knight.png',
-    'B': 'figures/white_bishop.png',
-    'Q': 'figures/white_queen.png',
-    'K': 'figures/white_king.png',
-    'p': 'figures/black_pawn.png',
-    'r': 'figures/black_rook.png',
-    'n': 'figures/black_knight.png',
-    'b': 'figures/black_bishop.png',
-    'q': 'figures/black_queen.png',
-    'k': 'figures/black_king.png',
-}
+DRAG_THRESHOLD = 10  # px a touch must travel before a tap becomes a drag
+PANEL_WIDTH = 200    # px for the captured pieces (left) and move list (right) panels
+CAPTURED_SCALE = 0.8  # captured pieces are drawn smaller than board pieces
+BOT_COLOR = None     # chess.BLACK (or WHITE) to play against the built-in engine
+BOT_TIME = 300       # s on the bot's clock for the game
+BOT_INCREMENT = 2    # s added to the bot's clock after each of its moves
+BOT_THREADS = 1      # engine processes searching together; at most the free cores
+BOT_PONDER = True    # let the bot think on the player's time too
+BOT_CLOCK_PLAYER = None  # 1 or 2: the bot plays on that feb6_chessclock clock, not BOT_TIME
+BOT_BOOK = None      # path of a Polyglot .bin opening book for the bot
+BOT_TABLEBASE = None  # directory of Syzygy .rtbw/.rtbz endgame tables for the bot
 
 # ------------------------------------------------------------
 # ChessPiece: a widget representing one chess piece.
@@ -42,7 +45,9 @@ class ChessPiece(Image):
         square_size: size in pixels of one square on the board
         board_origin: (x, y) position of the bottom‑left corner of the board
         """
-        super().__init__(**kwargs)
+        # Piece images come from one shared atlas texture, not separate files.
+        self.assets = get_atlas(square_size)
+        super().__init__(texture=self.assets.piece(piece_symbol), **kwargs)
         self.chess_square = chess_square
         self.piece_symbol = piece_symbol
         self.square_size = square_size
@@ -53,6 +58,22 @@ class ChessPiece(Image):
         self.keep_ratio = True
         self.update_position()
 
+    def set_piece(self, chess_square, piece_symbol):
+        """Reuse this widget for another piece (pooling or promotion)."""
+        if piece_symbol != self.piece_symbol:
+            self.piece_symbol = piece_symbol
+            self.texture = self.assets.piece(piece_symbol)
+        self.chess_square = chess_square
+        self.selected = False
+        self.update_position()
+
+    def set_geometry(self, square_size, board_origin):
+        """Follow a resized board. The texture is stretched, not reloaded."""
+        self.square_size = square_size
+        self.board_origin = board_origin
+        self.size = (square_size, square_size)
+        self.update_position()
+
     def update_position(self):
         """Set this widget’s pos based on its chess_square.
            (Files 0-7 from left to right; ranks 0-7 from bottom to top.)
@@ -80,62 +101,166 @@ class ChessBoard(Widget):
 
         # These will be set later by the parent container:
         self.captured_panel = None      # widget where captured pieces are displayed (left side)
-        self.move_list_container = None # BoxLayout inside the ScrollView for moves
+        self.move_list = None           # MoveList showing the game's moves
+        self.on_position = None         # called with game_board after every move or jump
+        self.human_colors = (chess.WHITE, chess.BLACK)  # sides moved by touch
+
+        # Every move of the current line; game_board may be showing an earlier
+        # position after jumping back in the move list.
+        self.history = []
 
         # For highlighting legal moves
-        self.highlight_rects = []
         self.legal_moves = []
         self.selected_piece = None
 
+        # Piece widgets indexed by square (64 slots) and the reverse map, kept
+        # in step with game_board so finding a piece never scans children.
+        self.square_widgets = [None] * 64
+        self.widget_squares = {}
+        self.piece_pool = []  # spare widgets to reuse
+
         # Create the python‑chess board with the standard starting position.
         self.game_board = chess.Board()
-
-        # Draw the board background (use canvas.before so it appears behind pieces)
-        with self.canvas.before:
-            for row in range(8):
-                for col in range(8):
-                    # Standard chessboard coloring: dark and light squares.
-                    if (col + row) % 2 == 0:
-                        Color(0.2, 0.2, 0.2, 1)
-                    else:
-                        Color(1, 1, 1, 1)
-                    Rectangle(
-                        pos=(self.board_origin[0] + col * self.square_size,
-                             self.board_origin[1] + row * self.square_size),
-                        size=(self.square_size, self.square_size)
-                    )
+        # Legal moves per position, shared by highlighting and touch handling.
+        self.move_cache = MoveCache()
+
+        # Draw the board background (use canvas.before so it appears behind pieces).
+        # Standard chessboard coloring: dark and light squares, cached in one texture.
+        self.background = BoardBackground(self.canvas.before, self.board_origin, self.square_size,
+                                          colors=((0.2, 0.2, 0.2, 1), (1, 1, 1, 1)))
+
+        # Legal-move highlights, drawn over the pieces.
+        self.highlights = HighlightOverlay(self.canvas.after, self.board_origin, self.square_size)
+        # A dragged piece is drawn here, above everything, and follows the
+        # touch through a Translate instead of moving its widget.
+        self.drag = DragOverlay(self.canvas.after)
+        self.drag_piece = None
+        self.drag_start = None
 
         # Place piece widgets on top.
         self.add_piece_widgets()
 
-    def add_piece_widgets(self):
-        """Remove any existing ChessPiece widgets and add one for every piece on the board."""
-        for child in list(self.children):
-            if isinstance(child, ChessPiece):
-                self.remove_widget(child)
-
-        for sq in chess.SQUARES:
+    def set_geometry(self, board_origin, board_size):
+        """Move and resize the board in place: the background, highlights and
+           existing piece widgets are updated, nothing is rebuilt.
+        """
+        self.drag.drop()
+        self.board_origin = board_origin
+        self.board_size = board_size
+        self.square_size = board_size / 8.0
+        self.background.update(board_origin, self.square_size)
+        self.highlights.set_geometry(board_origin, self.square_size)
+        for piece_widget in list(self.widget_squares) + self.piece_pool:
+            piece_widget.set_geometry(self.square_size, board_origin)
+        if self.captured_panel:
+            size = self.square_size * CAPTURED_SCALE
+            for child in self.captured_panel.children:
+                if isinstance(child, ChessPiece):
+                    child.square_size = self.square_size
+                    child.size = (size, size)
+
+    def add_piece_widgets(self, squares=chess.SQUARES):
+        """Make the piece widgets on `squares` match the game board.
+           Squares that already show the right piece are left alone; other
+           widgets go back to the pool and are reused for new pieces.
+        """
+        for sq in squares:
             piece = self.game_board.piece_at(sq)
-            if piece is not None:
-                symbol = piece.symbol()  # e.g., 'P' or 'k'
-                if symbol in piece_images:
-                    source = piece_images[symbol]
-                    piece_widget = ChessPiece(
-                        chess_square=sq,
-                        piece_symbol=symbol,
-                        square_size=self.square_size,
-                        board_origin=self.board_origin,
-                        source=source
-                    )
-                    self.add_widget(piece_widget)
+            symbol = piece.symbol() if piece is not None else None  # e.g., 'P' or 'k'
+            widget = self.square_widgets[sq]
+            if widget is not None:
+                if widget.piece_symbol == symbol:
+                    continue
+                self.release_piece(widget)
+            if symbol in PIECE_NAMES:
+                self.acquire_piece(sq, symbol)
+
+    def pooled_piece(self, sq, symbol):
+        """A piece widget for `symbol` on `sq`, from the pool if there is one."""
+        if self.piece_pool:
+            piece_widget = self.piece_pool.pop()
+            piece_widget.set_piece(sq, symbol)
+            return piece_widget
+        return ChessPiece(
+            chess_square=sq,
+            piece_symbol=symbol,
+            square_size=self.square_size,
+            board_origin=self.board_origin
+        )
+
+    def acquire_piece(self, sq, symbol):
+        """Put a piece widget on `sq`, reusing a pooled one if there is one."""
+        piece_widget = self.pooled_piece(sq, symbol)
+        self.place_piece(piece_widget, sq)
+        self.add_widget(piece_widget)
+        return piece_widget
+
+    def release_piece(self, piece_widget):
+        """Take a piece widget off the board and keep it for reuse."""
+        if piece_widget in self.widget_squares:
+            self.take_piece(self.widget_squares[piece_widget])
+        self.remove_widget(piece_widget)
+        self.piece_pool.append(piece_widget)
+
+    def update_piece_widgets(self, move, captured_sq, rook_move):
+        """Apply a just-pushed move to the piece widgets, touching only the
+           squares it changed.
+           captured_sq: square of the captured piece (differs from
+               move.to_square for en passant), or None
+           rook_move: (from, to) of the rook when castling, or None
+        """
+        if captured_sq is not None:
+            captured = self.take_piece(captured_sq)
+            if captured is not None:
+                self.remove_widget(captured)
+                if self.captured_panel:
+                    self.add_captured(captured)
+                else:
+                    self.piece_pool.append(captured)
+
+        moves = [(move.from_square, move.to_square)]
+        if rook_move is not None:
+            moves.append(rook_move)
+        for from_sq, to_sq in moves:
+            piece_widget = self.take_piece(from_sq)
+            if piece_widget is None:
+                continue
+            piece = self.game_board.piece_at(to_sq)
+            # A promoted pawn keeps its widget and only changes image.
+            piece_widget.set_piece(to_sq, piece.symbol())
+            self.place_piece(piece_widget, to_sq)
+
+        # Anything the widgets still disagree with (e.g. a missing image).
+        self.add_piece_widgets([sq for sq, _ in moves] + [sq for _, sq in moves])
+
+    def add_captured(self, piece_widget):
+        """Show a captured piece in the captured panel."""
+        # Optionally, scale the captured piece down.
+        piece_widget.size_hint = (None, None)
+        piece_widget.size = (self.square_size * CAPTURED_SCALE, self.square_size * CAPTURED_SCALE)
+        self.captured_panel.add_widget(piece_widget)
+
+    def place_piece(self, piece_widget, sq):
+        """Record `piece_widget` as the widget on `sq` in both indexes."""
+        self.square_widgets[sq] = piece_widget
+        self.widget_squares[piece_widget] = sq
+
+    def take_piece(self, sq):
+        """Remove and return the widget indexed on `sq` (None if empty)."""
+        piece_widget = self.square_widgets[sq]
+        if piece_widget is not None:
+            self.square_widgets[sq] = None
+            del self.widget_squares[piece_widget]
+        return piece_widget
 
     def ui_to_chess_square(self, x, y):
         """Convert a UI (x, y) coordinate to a chess square (0‑63) if inside the board."""
         bx, by = self.board_origin
         if not (bx <= x <= bx + self.board_size and by <= y <= by + self.board_size):
             return None
-        col = int((x - bx) / self.square_size)
-        row = int((y - by) / self.square_size)
+        # The far edges belong to the last file/rank.
+        col = min(7, int((x - bx) / self.square_size))
+        row = min(7, int((y - by) / self.square_size))
         return chess.square(col, row)
 
     def chess_square_to_ui_pos(self, sq):
@@ -150,79 +275,121 @@ class ChessBoard(Widget):
         """Highlight all legal moves for the given piece using python‑chess.
            Capture moves are highlighted in red; non-captures in green.
         """
-        self.clear_highlights()
-        from_sq = piece_widget.chess_square
-        self.legal_moves = [move for move in self.game_board.legal_moves if move.from_square == from_sq]
-        with self.canvas:
-            for move in self.legal_moves:
-                pos = self.chess_square_to_ui_pos(move.to_square)
-                if self.game_board.is_capture(move):
-                    Color(1, 0, 0, 0.5)  # red for captures
-                else:
-                    Color(0, 1, 0, 0.5)  # green for non-captures
-                rect = Rectangle(pos=pos, size=(self.square_size, self.square_size))
-                self.highlight_rects.append(rect)
+        entries = self.move_cache.table(self.game_board).moves_from(piece_widget.chess_square)
+        self.legal_moves = [entry.move for entry in entries]
+        squares = {"move": [], "capture": []}
+        for entry in entries:
+            if entry.promotion and entry.move.promotion != chess.QUEEN:
+                continue  # one highlight per promotion square
+            to_sq = entry.move.to_square
+            cell = (chess.square_file(to_sq), chess.square_rank(to_sq))
+            squares["capture" if entry.capture else "move"].append(cell)
+        self.highlights.show(squares)
 
     def clear_highlights(self):
-        """Remove any highlighted rectangles from the board."""
-        for rect in self.highlight_rects:
-            self.canvas.remove(rect)
-        self.highlight_rects = []
+        """Hide the legal-move highlights."""
+        self.highlights.clear()
 
     def execute_move(self, legal_move):
         """Push the move, update piece positions, handle captures, and update the move list."""
         san_move = self.game_board.san(legal_move)
+        # Work out what the move does to the board before pushing it.
+        table = self.move_cache.table(self.game_board)
+        entry = table.find(legal_move.from_square, legal_move.to_square,
+                           legal_move.promotion)
+        captured_sq = table.captured_square(legal_move) if entry.capture else None
+        rook_move = table.castling_rook(legal_move)
+        ply = len(self.game_board.move_stack)
         self.game_board.push(legal_move)
-        # Update the moving piece’s square and position.
-        self.selected_piece.chess_square = legal_move.to_square
-        self.selected_piece.update_position()
-
-        # If a capture occurred, remove the captured piece widget.
-        for child in list(self.children):
-            if (isinstance(child, ChessPiece) and child is not self.selected_piece and
-                child.chess_square == legal_move.to_square):
-                self.remove_widget(child)
-                if self.captured_panel:
-                    # Optionally, scale the captured piece down.
-                    child.size_hint = (None, None)
-                    scale = 0.8
-                    child.size = (self.square_size * scale, self.square_size * scale)
-                    self.captured_panel.add_widget(child)
+        # Playing a move from an earlier position starts a new line.
+        del self.history[ply:]
+        self.history.append(legal_move)
 
         self.clear_highlights()
         self.selected_piece.selected = False
         self.selected_piece = None
         self.legal_moves = []
-        # Refresh piece widgets (in case of promotions, etc.).
+        self.update_piece_widgets(legal_move, captured_sq, rook_move)
+        if self.move_list:
+            if len(self.move_list.sans) > ply:
+                self.move_list.truncate(ply)
+            self.move_list.append(san_move)
+        if self.on_position:
+            self.on_position(self.game_board)
+
+    def jump_to(self, ply):
+        """Show the position after `ply` half-moves of the current line."""
+        self.drag.drop()
+        self.drag_piece = None
+        if self.selected_piece:
+            self.selected_piece.selected = False
+            self.selected_piece = None
+        self.clear_highlights()
+        self.legal_moves = []
+
+        board = chess.Board()
+        captured = []
+        for move in self.history[:ply]:
+            if board.is_capture(move):
+                table = self.move_cache.table(board)
+                captured.append(board.piece_at(table.captured_square(move)).symbol())
+            board.push(move)
+        self.game_board = board
+
+        # Captured pieces go back to the pool first, so the board and the
+        # panel are both refilled from it.
+        if self.captured_panel:
+            for child in list(self.captured_panel.children):
+                if isinstance(child, ChessPiece):
+                    self.captured_panel.remove_widget(child)
+                    child.set_geometry(self.square_size, self.board_origin)
+                    self.piece_pool.append(child)
         self.add_piece_widgets()
-        if self.move_list_container:
-            label = Label(text=san_move, size_hint_y=None, height=30, font_size='16sp')
-            self.move_list_container.add_widget(label)
+        if self.captured_panel:
+            for symbol in captured:
+                self.add_captured(self.pooled_piece(0, symbol))
+        if self.move_list:
+            self.move_list.set_current(ply)
+        if self.on_position:
+            self.on_position(self.game_board)
+
+    def play_move(self, move):
+        """Play a move that did not come from a touch (e.g. the bot's)."""
+        if self.selected_piece:
+            self.selected_piece.selected = False
+        self.drag.drop()
+        self.drag_piece = None
+        self.selected_piece = self.square_widgets[move.from_square]
+        self.execute_move(move)
 
     def on_touch_down(self, touch):
         bx, by = self.board_origin
         # Only consider touches inside the board area.
         if not (bx <= touch.x <= bx + self.board_size and by <= touch.y <= by + self.board_size):
             return False
+        # While the bot is to move the board only shows the position.
+        if self.game_board.turn not in self.human_colors:
+            return True
 
         # First, get the destination square regardless of widgets.
         dest_sq = self.ui_to_chess_square(touch.x, touch.y)
 
         # If a piece is already selected and the touched square is one of its legal move destinations, execute the move.
         if self.selected_piece and dest_sq is not None:
-            for move in self.legal_moves:
-                if move.to_square == dest_sq:
-                    self.execute_move(move)
-                    return True
+            entry = self.move_cache.table(self.game_board).find(
+                self.widget_squares[self.selected_piece], dest_sq)
+            if entry is not None:
+                self.execute_move(entry.move)
+                return True
 
         # Otherwise, check if a piece was touched.
-        touched_piece = None
-        for child in self.children:
-            if isinstance(child, ChessPiece) and child.collide_point(touch.x, touch.y):
-                touched_piece = child
-                break
+        touched_piece = self.square_widgets[dest_sq] if dest_sq is not None else None
 
         if touched_piece:
+            # The touch may turn into a drag once it moves far enough.
+            touch.grab(self)
+            self.drag_piece = touched_piece
+            self.drag_start = (touch.x, touch.y)
             # If the same piece is touched twice, deselect it.
             if self.selected_piece == touched_piece:
                 self.selected_piece.selected = False
@@ -244,57 +411,171 @@ class ChessBoard(Widget):
 
         return False
 
+    def on_touch_move(self, touch):
+        if touch.grab_current is not self or self.drag_piece is None:
+            return super().on_touch_move(touch)
+        dx = touch.x - self.drag_start[0]
+        dy = touch.y - self.drag_start[1]
+        if not self.drag.active:
+            if abs(dx) < DRAG_THRESHOLD and abs(dy) < DRAG_THRESHOLD:
+                return True
+            self.lift_piece(self.drag_piece)
+        self.drag.move_by(dx, dy)
+        return True
+
+    def on_touch_up(self, touch):
+        if touch.grab_current is not self:
+            return super().on_touch_up(touch)
+        touch.ungrab(self)
+        piece, self.drag_piece = self.drag_piece, None
+        if piece is None or not self.drag.active:
+            return True  # a tap; handled on touch down
+
+        dest_sq = self.ui_to_chess_square(touch.x, touch.y)
+        entry = None
+        if dest_sq is not None:
+            entry = self.move_cache.table(self.game_board).find(self.widget_squares[piece], dest_sq)
+        if entry is None:
+            # Illegal drop or off the board: glide back to the square.
+            self.drag.return_home()
+            return True
+
+        self.drag.drop()
+        self.selected_piece = piece
+        self.execute_move(entry.move)
+        return True
+
+    def lift_piece(self, piece):
+        """Hide the piece widget and draw it in the drag layer instead."""
+        if not piece.selected:
+            # Dragging a piece always shows its moves, even if this touch
+            # had just deselected it.
+            if self.selected_piece:
+                self.selected_piece.selected = False
+            self.selected_piece = piece
+            piece.selected = True
+            self.highlight_legal_moves(piece)
+        self.drag.lift(piece)
+
 
 # ------------------------------------------------------------
 # ChessGameWidget: the root widget that arranges the board, move list, and captured pieces.
 # ------------------------------------------------------------
 class ChessGameWidget(FloatLayout):
-    def __init__(self, **kwargs):
+    def __init__(self, bot_color=BOT_COLOR, **kwargs):
         super().__init__(**kwargs)
 
-        # --- Define panel sizes ---
-        panel_width = 200  # width (in pixels) for left (captured pieces) and right (move list) panels
-        screen_width = Window.width
-        screen_height = Window.height
-
-        # The board size will be the maximum square that fits in the central area.
-        board_size = min(screen_height, screen_width - 2 * panel_width)
-
-        # Center the board in the area between the panels.
-        board_origin_x = panel_width + ((screen_width - 2 * panel_width - board_size) / 2)
-        board_origin_y = (screen_height - board_size) / 2
-        board_origin = (board_origin_x, board_origin_y)
+        # The board is the largest square that fits between the panels. It is
+        # refitted whenever this widget is resized (window resize, rotation).
+        self.board_layout = BoardLayout(self, on_layout=self.on_board_layout,
+                                        left=PANEL_WIDTH, right=PANEL_WIDTH)
+        # Until we are added to the window our own size is meaningless, so
+        # start from the window's; the first layout pass corrects it if needed.
+        geometry = self.board_layout.compute(*Window.size)
 
         # --- Create the captured pieces panel (left side) ---
         self.captured_panel = BoxLayout(
             orientation='vertical',
             size_hint=(None, 1),
-            width=panel_width,
-            pos=(0, 0)
+            width=PANEL_WIDTH,
+            pos_hint={'x': 0, 'y': 0}
         )
         self.captured_panel.add_widget(Label(text="Captured", size_hint_y=None, height=40, font_size='18sp'))
         self.add_widget(self.captured_panel)
 
         # --- Create the move list panel (right side) ---
-        move_list_scroll = ScrollView(
+        # Tapping a move shows that position on the board.
+        self.move_list = MoveList(
             size_hint=(None, 1),
-            width=panel_width,
-            pos=(screen_width - panel_width, 0)
+            width=PANEL_WIDTH,
+            pos_hint={'right': 1, 'y': 0}
         )
-        self.move_list_container = BoxLayout(
-            orientation='vertical',
-            size_hint_y=None
-        )
-        self.move_list_container.bind(minimum_height=self.move_list_container.setter('height'))
-        move_list_scroll.add_widget(self.move_list_container)
-        self.add_widget(move_list_scroll)
+        self.add_widget(self.move_list)
 
         # --- Create the chessboard ---
-        self.chess_board = ChessBoard(board_origin=board_origin, board_size=board_size)
+        self.chess_board = ChessBoard(board_origin=geometry.origin, board_size=geometry.board_size)
         self.chess_board.captured_panel = self.captured_panel
-        self.chess_board.move_list_container = self.move_list_container
+        self.chess_board.move_list = self.move_list
+        self.move_list.on_jump = self.chess_board.jump_to
         self.add_widget(self.chess_board)
 
+        # --- The bot, if playing ---
+        # The engine searches in its own process; its output is picked up
+        # by polling, so the board stays responsive while it thinks.
+        self.bot = None
+        self.bot_color = bot_color
+        if bot_color is not None:
+            self.bot_clock = BOT_TIME
+            self.bot_increment = BOT_INCREMENT
+            self.bot_started = None
+            self.bot_ponder = None  # the reply the bot expects to its last move
+            self.chess_clock = None
+            if BOT_CLOCK_PLAYER is not None:
+                # The clock module keeps its times in module globals; it adds
+                # its own increments, so none is assumed here.
+                import feb6_chessclock
+                self.chess_clock = feb6_chessclock
+                self.bot_increment = 0
+            self.bot = BotWorker(on_move=self.on_bot_move, threads=BOT_THREADS,
+                                 book=BOT_BOOK, tablebase=BOT_TABLEBASE)
+            self.chess_board.human_colors = (not bot_color,)
+            self.chess_board.on_position = self.on_position
+            Clock.schedule_interval(self.bot.poll, POLL_INTERVAL)
+            self.on_position(self.chess_board.game_board)
+
+    def on_board_layout(self, geometry):
+        self.chess_board.set_geometry(geometry.origin, geometry.board_size)
+
+    def bot_time_left(self):
+        if self.chess_clock is not None:
+            return getattr(self.chess_clock, "player%d_time" % BOT_CLOCK_PLAYER)
+        return self.bot_clock
+
+    def on_position(self, board):
+        """
+        Start the bot when it is its turn. On the player's turn it ponders
+        the reply it expects (or just analyses the position), so if the
+        player makes that move it carries on instead of starting over.
+        """
+        ponder, self.bot_ponder = self.bot_ponder, None
+        if board.is_game_over():
+            self.bot.cancel()
+            return
+        if board.turn == self.bot_color:
+            self.bot_started = time.monotonic()
+            if (self.bot.ponder_move is not None and board.move_stack
+                    and board.peek() == self.bot.ponder_move and self.bot.ponderhit()):
+                return
+            self.bot.cancel()
+            self.bot.go(board, time_left=self.bot_time_left(), increment=self.bot_increment)
+            return
+        self.bot.cancel()
+        if not BOT_PONDER:
+            return
+        if ponder is not None and board.is_legal(ponder):
+            self.bot.ponder(board, ponder, time_left=self.bot_time_left(),
+                            increment=self.bot_increment)
+        else:
+            self.bot.analyse(board)
+
+    def on_bot_move(self, result):
+        self.bot_clock += self.bot_increment - (time.monotonic() - self.bot_started)
+        print(f"Bot: {result['move']} depth {result['depth']} score {result['score']} "
+              f"{result['nodes']} nodes {result['nps']} nodes/s")
+        board = self.chess_board.game_board
+        move = chess.Move.from_uci(result['move']) if result['move'] else None
+        if move is None or not board.is_legal(move):
+            return
+        if self.chess_clock is not None and self.chess_clock.active_player == BOT_CLOCK_PLAYER:
+            self.chess_clock.toggle_active_player()  # the bot presses its clock
+        self.bot_ponder = chess.Move.from_uci(result['ponder']) if result['ponder'] else None
+        self.chess_board.play_move(move)
+
+    def close(self):
+        if self.bot is not None:
+            Clock.unschedule(self.bot.poll)
+            self.bot.close()
+
 
 # ------------------------------------------------------------
 # The App
@@ -303,6 +584,9 @@ class ChessApp(App):
     def build(self):
         return ChessGameWidget()
 
+    def on_stop(self):
+        self.root.close()
+
 
 if __name__ == '__main__':
     ChessApp().run()
\ No newline at end of file
@@ -0,0 +1,148 @@
+import math
+
+# The electromagnet is switched from GRBL's spindle-enable output.
+MAGNET_ON = "M3S1000"
+MAGNET_OFF = "M5"
+MAGNET_DWELL = 0.15    # seconds for the magnet field to build up / collapse
+
+PATH_FEED = 6000       # mm/min while dragging a piece
+RESOLUTION = 0.01      # mm; coordinates are rounded to this grid
+BLEND_TOLERANCE = 0.05 # mm a merged path may deviate from the original points
+
+
+def _digits(resolution):
+    return max(0, int(math.ceil(-math.log10(resolution) - 1e-9)))
+
+
+def _snap(value, resolution):
+    return round(round(value / resolution) * resolution, _digits(resolution))
+
+
+def _fmt(value, digits):
+    text = f"{value:.{digits}f}"
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return "0" if text in ("-0", "") else text
+
+
+def _deviation(a, b, p):
+    """
+    Distance of p from segment a-b, or None if p does not project onto the
+    segment (the path would double back).
+    """
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0:
+        return None
+    t = ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / length_sq
+    if t < 0 or t > 1:
+        return None
+    return abs((p[0] - a[0]) * dy - (p[1] - a[1]) * dx) / math.sqrt(length_sq)
+
+
+def blend_path(points, tolerance=BLEND_TOLERANCE):
+    """
+    Drop intermediate points that lie within `tolerance` of the straight line
+    through their neighbours, so runs of short collinear segments become one
+    longer segment the planner can cruise through.
+    """
+    out = []
+    skipped = []
+    for p in points:
+        if out and p == out[-1]:
+            continue
+        if len(out) >= 2:
+            anchor = out[-2]
+            candidates = skipped + [out[-1]]
+            deviations = [_deviation(anchor, p, m) for m in candidates]
+            if all(d is not None and d <= tolerance for d in deviations):
+                skipped.append(out[-1])
+                out[-1] = p
+                continue
+        skipped = []
+        out.append(p)
+    return out
+
+
+def compile_program(steps, resolution=RESOLUTION, tolerance=BLEND_TOLERANCE):
+    """
+    Turn a list of steps into G-code lines in absolute millimetres.
+
+    Steps are tuples:
+        ("travel", (x, y))            rapid move (G0), magnet off
+        ("path", [(x, y), ...], feed) dragged move (G1) through the points
+        ("magnet", True/False)        switch the electromagnet
+        ("dwell", seconds)            pause (G4)
+
+    Consecutive path points are blended, coordinates are rounded to
+    `resolution`, and modal words (G0/G1, F, unchanged X/Y) are only written
+    when they change, which keeps every line short for the RX buffer.
+    """
+    digits = _digits(resolution)
+    lines = ["G21G90"]
+    motion = None
+    feed = None
+    pos = (None, None)
+
+    def move(code, point, new_feed=None):
+        nonlocal motion, feed, pos
+        x, y = _snap(point[0], resolution), _snap(point[1], resolution)
+        if (x, y) == pos:
+            return
+        words = []
+        if code != motion:
+            words.append(code)
+            motion = code
+        if x != pos[0]:
+            words.append("X" + _fmt(x, digits))
+        if y != pos[1]:
+            words.append("Y" + _fmt(y, digits))
+        if new_feed is not None and new_feed != feed:
+            words.append("F" + _fmt(new_feed, 0))
+            feed = new_feed
+        pos = (x, y)
+        lines.append("".join(words))
+
+    for step in steps:
+        kind = step[0]
+        if kind == "travel":
+            move("G0", step[1])
+        elif kind == "path":
+            path_feed = step[2] if len(step) > 2 else PATH_FEED
+            snapped = [(_snap(x, resolution), _snap(y, resolution)) for x, y in step[1]]
+            if pos != (None, None):
+                snapped.insert(0, pos)
+            for point in blend_path(snapped, tolerance):
+                move("G1", point, path_feed)
+        elif kind == "magnet":
+            lines.append(MAGNET_ON if step[1] else MAGNET_OFF)
+            if MAGNET_DWELL:
+                lines.append("G4P" + _fmt(MAGNET_DWELL, 3))
+        elif kind == "dwell":
+            lines.append("G4P" + _fmt(step[1], 3))
+        else:
+            raise ValueError(f"Unknown step {step!r}")
+    return lines
+
+
+def compile_move(path, retreat=None, feed=PATH_FEED, resolution=RESOLUTION,
+                 tolerance=BLEND_TOLERANCE):
+    """
+    Compile one physical piece move into a single program: rapid to the
+    piece at path[0], magnet on, drag it through the rest of `path`, magnet
+    off, then optionally rapid to `retreat`.
+    """
+    steps = [("travel", path[0]), ("magnet", True),
+             ("path", path[1:], feed), ("magnet", False)]
+    if retreat is not None:
+        steps.append(("travel", retreat))
+    return compile_program(steps, resolution, tolerance)
+
+
+if __name__ == '__main__':
+    # Knight g1-f3 on a 50 mm board, dragged along the square edges in 5 mm steps.
+    path = [(325, 25)] + [(325, 25 + 5 * i) for i in range(1, 6)] \
+        + [(325 - 5 * i, 50) for i in range(1, 6)] + [(300, 50 + 5 * i) for i in range(1, 11)] \
+        + [(300 - 5 * i, 100) for i in range(1, 6)] + [(275, 125)]
+    for line in compile_move(path, retreat=(0, 0)):
+        print(line)
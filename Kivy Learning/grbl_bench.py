@@ -0,0 +1,115 @@
+"""
+Measure GRBL link throughput and command round-trip latency.
+
+    python grbl_bench.py                         # simulator at each baud rate
+    python grbl_bench.py --port /dev/ttyUSB0     # real hardware (rate negotiated)
+    python grbl_bench.py --line "G91G1X0.1F5000" --count 200
+"""
+import argparse
+import time
+
+import serial
+
+from grbl_discovery import GrblDiscovery, BAUD_RATES
+from grbl_sim import GrblSimulator
+from grbl_streamer import GrblStreamer
+
+# A modal-only line: GRBL acknowledges it without moving the gantry, so the
+# numbers show the link rather than the motors.
+BENCH_LINE = "G21G90"
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure_latency(ser, line, count):
+    """
+    Send-and-wait, one line at a time. Returns the sorted round trips in ms.
+    """
+    data = f"{line}\n".encode()
+    ser.reset_input_buffer()
+    times = []
+    for _ in range(count):
+        start = time.perf_counter()
+        ser.write(data)
+        while True:
+            response = ser.readline().decode(errors="replace").strip()
+            if response == "ok" or response.startswith("error"):
+                break
+            if not response:
+                raise RuntimeError("GRBL stopped answering")
+        times.append((time.perf_counter() - start) * 1000.0)
+    return sorted(times)
+
+
+def measure_throughput(ser, line, count):
+    """
+    Stream `count` lines with character counting. Returns lines per second.
+    """
+    streamer = GrblStreamer(ser)
+    streamer.start()
+    try:
+        start = time.perf_counter()
+        futures = streamer.send_program([line] * count)
+        if not streamer.wait_idle(timeout=count):
+            raise RuntimeError("timed out waiting for GRBL")
+        elapsed = time.perf_counter() - start
+        errors = sum(1 for f in futures if f.exception() is not None)
+    finally:
+        streamer.stop()
+    if errors:
+        print(f"  warning: {errors} lines answered with an error")
+    return count / elapsed
+
+
+def run(ser, label, line, count):
+    rtt = measure_latency(ser, line, count)
+    rate = measure_throughput(ser, line, count)
+    print(f"{label}")
+    print(f"  send-and-wait  {len(rtt) / (sum(rtt) / 1000.0):8.1f} lines/s   "
+          f"rtt p50 {percentile(rtt, 50):6.2f} ms  p90 {percentile(rtt, 90):6.2f} ms  "
+          f"p99 {percentile(rtt, 99):6.2f} ms  max {rtt[-1]:6.2f} ms")
+    print(f"  streaming      {rate:8.1f} lines/s   "
+          f"({rate * (len(line) + 1):.0f} bytes/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", help="serial device of a real GRBL board")
+    parser.add_argument("--baud", type=int, action="append",
+                        help="baud rate(s) to try/simulate (default: all of %s)" % (BAUD_RATES,))
+    parser.add_argument("--line", default=BENCH_LINE, help="G-code line to send")
+    parser.add_argument("--count", type=int, default=300, help="lines per measurement")
+    args = parser.parse_args()
+    rates = args.baud or list(BAUD_RATES)
+
+    if args.port:
+        found = GrblDiscovery(baudrates=rates).probe(args.port)
+        if found is None:
+            print(f"No GRBL answered on {args.port} at {rates}")
+            return
+        ser, banner = found
+        try:
+            run(ser, f"{banner} on {args.port} @ {ser.baudrate} baud", args.line, args.count)
+        finally:
+            ser.close()
+        return
+
+    for rate in sorted(rates):
+        sim = GrblSimulator(baudrate=rate)
+        port = sim.start()
+        ser = serial.Serial(port, rate, timeout=1)
+        try:
+            run(ser, f"simulator @ {rate} baud", args.line, args.count)
+        finally:
+            ser.close()
+            sim.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+import fnmatch
+import glob
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import serial
+
+try:
+    from serial.tools import list_ports
+except ImportError:
+    list_ports = None
+
+# Where GRBL may enumerate on the Pi: FTDI/CH340 boards show up as ttyUSB,
+# native-USB Arduinos as ttyACM.
+CANDIDATE_PATTERNS = ("/dev/ttyUSB*", "/dev/ttyACM*")
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".checkmate_grbl.json")
+BANNER_RE = re.compile(r"Grbl \d+\.\d+")
+
+# Rates tried in order. GRBL's rate is fixed when the firmware is compiled;
+# 9600 is last so older boards flashed for this project still connect.
+BAUD_RATES = (115200, 230400, 250000, 9600)
+
+PROBE_TIMEOUT = 2.0      # seconds to wait for a banner (Arduino bootloader ~1-2 s)
+HANDSHAKE_TIMEOUT = 0.5  # seconds to wait for a banner after a soft reset
+SOFT_RESET = b"\x18"
+
+
+class GrblDiscovery(object):
+    """
+    Find the serial port GRBL is attached to.
+
+    Every candidate port is opened in parallel and identified by the
+    "Grbl 1.1h ['$' for help]" banner it prints after reset, so no fixed
+    start-up sleep is needed. The last good port and its USB serial number
+    are cached on disk and tried first, which makes reconnecting instant even
+    if the device was renumbered (ttyUSB0 -> ttyUSB1).
+
+    Opening a port resets most Arduinos and probing sends soft resets, so
+    other USB serial devices (RFID bridges, stepper Arduinos) that fail
+    identification are remembered, by USB serial number or else by path.
+    connect_with_backoff() never probes them again, only devices plugged in
+    since. A device is forgotten once it disappears, so replugging it gets
+    it probed again.
+
+    The baud rate is negotiated too: each rate in `baudrates` is tried in turn
+    with a soft reset, and only a correctly decoded banner counts as a match.
+    """
+    def __init__(self, baudrates=BAUD_RATES, timeout=PROBE_TIMEOUT, cache_path=CACHE_PATH):
+        self.baudrates = tuple(baudrates)
+        self.timeout = timeout
+        self.cache_path = cache_path
+        self.rejected = set()  # identities of ports that are not GRBL
+
+    @staticmethod
+    def identity(device, serial_number):
+        return serial_number or device
+
+    def candidates(self):
+        """
+        Return a list of (device, serial_number) for every possible port.
+        """
+        found = {}
+        if list_ports is not None:
+            for info in list_ports.comports():
+                if any(fnmatch.fnmatch(info.device, p) for p in CANDIDATE_PATTERNS):
+                    found[info.device] = info.serial_number
+        for pattern in CANDIDATE_PATTERNS:
+            for device in glob.glob(pattern):
+                found.setdefault(device, None)
+        return sorted(found.items())
+
+    def probe(self, device, baudrates=None):
+        """
+        Open `device` and find the baud rate at which it prints the GRBL
+        banner. Returns (ser, banner) with the port left open at that rate,
+        or None if it is not a GRBL controller.
+        """
+        rates = tuple(baudrates or self.baudrates)
+        try:
+            ser = serial.Serial(device, rates[0], timeout=0.1)
+        except (serial.SerialException, OSError):
+            return None
+        try:
+            # Opening the port resets most Arduinos; catch that banner if it
+            # comes at the first rate, but stop waiting once garbage arrives.
+            banner = self._wait_banner(ser, self.timeout, stop_on_noise=True)
+            if banner is None:
+                for rate in rates:
+                    ser.baudrate = rate
+                    ser.reset_input_buffer()
+                    ser.write(SOFT_RESET)
+                    banner = self._wait_banner(ser, HANDSHAKE_TIMEOUT)
+                    if banner is not None:
+                        break
+            if banner is not None:
+                ser.timeout = 1
+                return ser, banner
+        except (serial.SerialException, OSError):
+            pass
+        ser.close()
+        return None
+
+    def _wait_banner(self, ser, timeout, stop_on_noise=False):
+        start = time.monotonic()
+        pending = b""
+        noise_at = None
+        while time.monotonic() - start < timeout:
+            pending += ser.read(ser.in_waiting or 1)
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                text = line.decode(errors="replace").strip()
+                if BANNER_RE.search(text):
+                    return text
+            if pending and noise_at is None:
+                noise_at = time.monotonic()
+            if stop_on_noise and noise_at is not None and time.monotonic() - noise_at > 0.3:
+                return None
+        return None
+
+    def discover(self, skip_rejected=False):
+        """
+        Return (device, ser, banner) for the GRBL controller, or None.
+        The cached port is tried on its own first; otherwise all candidates
+        are probed concurrently and the first one to answer wins. Ports that
+        do not answer are recorded as rejected; with skip_rejected they are
+        not probed at all.
+        """
+        candidates = self.candidates()
+        present = {self.identity(*c) for c in candidates}
+        self.rejected &= present  # unplugged devices are forgotten
+        if skip_rejected:
+            candidates = [c for c in candidates if self.identity(*c) not in self.rejected]
+        if not candidates:
+            return None
+
+        cached, cached_rate = self.cached_device(candidates)
+        if cached is not None:
+            rates = (cached_rate,) + self.baudrates if cached_rate else None
+            result = self.probe(cached, rates)
+            if result is not None:
+                self.save_cache(cached, dict(candidates).get(cached), result[0].baudrate)
+                return (cached,) + result
+            candidates = [c for c in candidates if c[0] != cached]
+
+        winner = None
+        with ThreadPoolExecutor(max_workers=max(1, len(candidates))) as pool:
+            futures = {pool.submit(self.probe, device): device for device, _ in candidates}
+            for future in as_completed(futures):
+                result = future.result()
+                if result is None:
+                    device = futures[future]
+                    self.rejected.add(self.identity(device, dict(candidates).get(device)))
+                    continue
+                if winner is None:
+                    winner = (futures[future],) + result
+                else:
+                    result[0].close()
+        if winner is not None:
+            self.save_cache(winner[0], dict(candidates).get(winner[0]), winner[1].baudrate)
+        return winner
+
+    def connect_with_backoff(self, stop_event, initial=0.5, maximum=30.0, on_retry=None):
+        """
+        Call discover() until it succeeds or `stop_event` is set, doubling the
+        wait between attempts up to `maximum` seconds. Ports already found not
+        to be GRBL are left alone.
+        """
+        delay = initial
+        while not stop_event.is_set():
+            result = self.discover(skip_rejected=True)
+            if result is not None:
+                return result
+            if on_retry:
+                on_retry(delay)
+            stop_event.wait(delay)
+            delay = min(maximum, delay * 2)
+        return None
+
+    # ---------------------
+    # Last-known-good cache
+    # ---------------------
+    def cached_device(self, candidates):
+        """
+        Return (device, baudrate) for the candidate matching the cache,
+        preferring the USB serial number over the device path.
+        """
+        try:
+            with open(self.cache_path) as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return None, None
+        rate = cache.get("baudrate")
+        serial_number = cache.get("serial_number")
+        if serial_number:
+            for device, number in candidates:
+                if number == serial_number:
+                    return device, rate
+        if cache.get("device") in dict(candidates):
+            return cache["device"], rate
+        return None, None
+
+    def save_cache(self, device, serial_number, baudrate):
+        try:
+            with open(self.cache_path, "w") as f:
+                json.dump({"device": device, "serial_number": serial_number,
+                           "baudrate": baudrate}, f)
+        except OSError as e:
+            print(f"Could not save GRBL port cache: {e}")
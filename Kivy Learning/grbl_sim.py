@@ -0,0 +1,524 @@
+import math
+import os
+import re
+import select
+import threading
+import time
+import tty
+from collections import deque
+
+# Firmware limits of an Arduino Uno running GRBL 1.1.
+RX_BUFFER_SIZE = 127   # usable bytes in the serial receive ring buffer
+PLANNER_BLOCKS = 15    # usable motion blocks in the planner
+BANNER = "Grbl 1.1h ['$' for help]"
+
+MAX_RATE = 10000       # mm/min, used for G0 and as the feed ceiling
+ACCELERATION = 500     # mm/s^2
+TICK = 0.002           # seconds between simulation steps
+
+# Lines containing these words wait for the planner to empty, as GRBL does.
+# Matched as whole words (M3 and M03, but not M30; G4 but not G40).
+SYNC_WORDS = {("M", 3), ("M", 4), ("M", 5), ("M", 7), ("M", 8), ("M", 9), ("G", 4)}
+
+WORD_RE = re.compile(r"([A-Z])([-+]?(?:\d+\.?\d*|\.\d+))")
+
+
+def needs_sync(line):
+    """True if the cleaned G-code `line` has a word that waits for the planner."""
+    return any((letter, float(number)) in SYNC_WORDS for letter, number in WORD_RE.findall(line))
+
+
+class _Segment(object):
+    """
+    One planner block moving in a straight line with a trapezoidal velocity
+    profile: accelerate from v0 to the feed rate, cruise, then decelerate to
+    a stop at the target. Blocks do not blend into each other, so simulated
+    times are an upper bound on what the real planner achieves.
+    """
+    __slots__ = ("start", "target", "unit", "length", "feed", "jog",
+                 "accel", "v0", "vp", "t_acc", "t_cruise", "t_dec", "duration")
+
+    def __init__(self, start, target, feed, accel, v0=0.0, jog=False):
+        self.start = tuple(start)
+        self.target = tuple(target)
+        delta = [t - s for s, t in zip(start, target)]
+        self.length = math.sqrt(sum(d * d for d in delta))
+        self.unit = tuple(d / self.length for d in delta) if self.length else (0.0, 0.0, 0.0)
+        self.feed = feed    # mm/s
+        self.jog = jog
+        self.accel = accel
+        self.v0 = v0
+
+        vmax = max(feed, v0)
+        d_acc = (vmax * vmax - v0 * v0) / (2 * accel)
+        d_dec = vmax * vmax / (2 * accel)
+        if d_acc + d_dec > self.length:
+            # Triangle profile: never reaches the feed rate.
+            vmax = max(v0, math.sqrt((2 * accel * self.length + v0 * v0) / 2))
+            d_acc = (vmax * vmax - v0 * v0) / (2 * accel)
+            d_dec = min(self.length - d_acc, vmax * vmax / (2 * accel))
+        self.vp = vmax
+        self.t_acc = (vmax - v0) / accel
+        self.t_cruise = max(0.0, self.length - d_acc - d_dec) / vmax if vmax else 0.0
+        self.t_dec = vmax / accel
+        self.duration = self.t_acc + self.t_cruise + self.t_dec
+
+    def distance_at(self, t):
+        a, v0, vp = self.accel, self.v0, self.vp
+        if t <= 0:
+            return 0.0
+        if t < self.t_acc:
+            return v0 * t + 0.5 * a * t * t
+        d = v0 * self.t_acc + 0.5 * a * self.t_acc * self.t_acc
+        t -= self.t_acc
+        if t < self.t_cruise:
+            return d + vp * t
+        d += vp * self.t_cruise
+        t = min(t - self.t_cruise, self.t_dec)
+        return min(self.length, d + vp * t - 0.5 * a * t * t)
+
+    def speed_at(self, t):
+        if t <= 0:
+            return self.v0
+        if t < self.t_acc:
+            return self.v0 + self.accel * t
+        t -= self.t_acc
+        if t < self.t_cruise:
+            return self.vp
+        t -= self.t_cruise
+        return max(0.0, self.vp - self.accel * t)
+
+    def position_at(self, t):
+        d = self.distance_at(t)
+        return tuple(s + u * d for s, u in zip(self.start, self.unit))
+
+
+class GrblSimulator(object):
+    """
+    A stand-in for a GRBL controller on the far side of a pseudo-terminal.
+
+    start() returns a device path that can be opened with serial.Serial()
+    exactly like /dev/ttyUSB0. The simulator speaks the GRBL 1.1 line
+    protocol (banner, ok, error:N, ALARM:N, "?" status reports, $J= jogs,
+    jog cancel, feed hold/resume and soft reset) and models the 127-byte RX
+    buffer, the 15-block planner and trapezoidal acceleration. Bytes that
+    arrive while the RX buffer is full are dropped, as on the real board.
+
+    time_scale > 1 runs the machine faster than real time. If baudrate is
+    given, incoming bytes are only taken off the pty at that line rate (10 bits
+    per byte), so link throughput can be compared between baud rates.
+    """
+    def __init__(self, max_rate=MAX_RATE, acceleration=ACCELERATION,
+                 rx_buffer_size=RX_BUFFER_SIZE, planner_blocks=PLANNER_BLOCKS,
+                 time_scale=1.0, baudrate=None):
+        self.max_rate = max_rate
+        self.acceleration = acceleration
+        self.rx_buffer_size = rx_buffer_size
+        self.planner_blocks = planner_blocks
+        self.time_scale = time_scale
+        self.baudrate = baudrate
+        self.port = None
+
+        self.settings = {
+            110: max_rate, 111: max_rate, 112: max_rate,
+            120: acceleration, 121: acceleration, 122: acceleration,
+        }
+        # Counters for benchmarks and tests.
+        self.stats = {"lines": 0, "ok": 0, "errors": 0, "overflows": 0,
+                      "starvations": 0, "status": 0}
+
+        self._master = None
+        self._slave = None
+        self._thread = None
+        self._running = False
+        self._t0 = 0.0
+        self._reset_state()
+
+    def _reset_state(self):
+        self.position = (0.0, 0.0, 0.0)
+        self.state = "Idle"
+        self.absolute = True
+        self.inches = False
+        self.feed = None
+        self.magnet = False
+        self.rx = bytearray()
+        self.planner = deque()
+        self.segment = None
+        self.hold = False
+        self._seg_start = 0.0
+        self._last_end = None
+        self._busy_until = 0.0
+        self._deferred = None
+        self._idle_since = None
+
+    # ---------------------
+    # Lifecycle
+    # ---------------------
+    def start(self):
+        """
+        Open the pseudo-terminal, start the simulation thread and return the
+        device path to connect to.
+        """
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._t0 = time.monotonic()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._write("")
+        self._write(BANNER)
+        return self.port
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                os.close(fd)
+        self._master = self._slave = None
+
+    def now(self):
+        """Simulated time in seconds since start()."""
+        return (time.monotonic() - self._t0) * self.time_scale
+
+    def _run(self):
+        budget, last = 0.0, time.monotonic()
+        while self._running:
+            try:
+                ready, _, _ = select.select([self._master], [], [], TICK)
+                wanted = 1024
+                if self.baudrate:
+                    t = time.monotonic()
+                    budget = min(budget + (t - last) * self.baudrate / 10.0, 64)
+                    last = t
+                    wanted = int(budget)
+                if ready and not wanted:
+                    time.sleep(TICK)
+                data = os.read(self._master, wanted) if ready and wanted else b""
+                budget -= len(data)
+            except OSError:
+                return
+            now = self.now()
+            if data:
+                self._receive(data, now)
+            self._advance(now)
+            self._process_lines(now)
+
+    def _write(self, text):
+        try:
+            os.write(self._master, (text + "\r\n").encode())
+        except OSError:
+            pass
+
+    # ---------------------
+    # Serial input
+    # ---------------------
+    def _receive(self, data, now):
+        for byte in data:
+            if byte == 0x3F:            # '?'
+                self._report_status(now)
+            elif byte == 0x21:          # '!'
+                self._feed_hold(now)
+            elif byte == 0x7E:          # '~'
+                self._cycle_start(now)
+            elif byte == 0x18:          # ctrl-x
+                self._soft_reset(now)
+            elif byte == 0x85:
+                self._jog_cancel(now)
+            elif byte >= 0x80:
+                pass                    # overrides and other realtime bytes
+            elif len(self.rx) >= self.rx_buffer_size:
+                self.stats["overflows"] += 1
+            else:
+                self.rx.append(byte)
+
+    def _process_lines(self, now):
+        if self._deferred is not None:
+            if now < self._busy_until:
+                return
+            self._respond(self._deferred)
+            self._deferred = None
+        while True:
+            end = self.rx.find(b"\n")
+            if end < 0:
+                return
+            line = self._clean(self.rx[:end].decode(errors="replace"))
+            if self._planner_full():
+                return
+            if needs_sync(line) and not self._idle():
+                return
+            del self.rx[:end + 1]
+            self.stats["lines"] += 1
+            response = self._execute(line, now)
+            if self._busy_until > now:
+                # G4 dwell: "ok" is only sent once the pause is over.
+                self._deferred = response
+                return
+            self._respond(response)
+
+    def _respond(self, response):
+        if response is None:
+            response = "ok"
+        if response == "ok":
+            self.stats["ok"] += 1
+        else:
+            self.stats["errors"] += 1
+        self._write(response)
+
+    def _clean(self, line):
+        line = re.sub(r"\(.*?\)", "", line).split(";")[0]
+        return line.replace(" ", "").replace("\r", "").upper()
+
+    def _planner_full(self):
+        return len(self.planner) + (1 if self.segment else 0) >= self.planner_blocks
+
+    def _idle(self):
+        return self.segment is None and not self.planner
+
+    # ---------------------
+    # Command execution
+    # ---------------------
+    def _execute(self, line, now):
+        if not line:
+            return "ok"
+        if line.startswith("$"):
+            return self._execute_system(line, now)
+        if self.state == "Alarm":
+            return "error:9"
+        if self.state == "Jog":
+            return "error:9"
+        return self._execute_gcode(line, now, jog=False)
+
+    def _execute_system(self, line, now):
+        if line.startswith("$J="):
+            if self.state not in ("Idle", "Jog"):
+                return "error:8"
+            return self._execute_gcode(line[3:], now, jog=True)
+        if line == "$X":
+            if self.state == "Alarm":
+                self.state = "Idle"
+                self._write("[MSG:Caution: Unlocked]")
+            return "ok"
+        if self.state not in ("Idle", "Alarm"):
+            return "error:8"
+        if line == "$H":
+            self.position = (0.0, 0.0, 0.0)
+            self.state = "Idle"
+            return "ok"
+        if line == "$$":
+            for key in sorted(self.settings):
+                self._write(f"${key}={self.settings[key]:.3f}")
+            return "ok"
+        if line == "$I":
+            self._write("[VER:1.1h.20190825:]")
+            self._write(f"[OPT:V,{self.planner_blocks},{self.rx_buffer_size + 1}]")
+            return "ok"
+        if line == "$G":
+            self._write("[GC:G0 G54 G17 G21 G90 G94 M5 M9 T0 F0 S0]")
+            return "ok"
+        if line == "$":
+            self._write("[HLP:$$ $# $G $I $N $x=val $Nx=line $J=line $SLP $C $X $H ~ ! ? ctrl-x]")
+            return "ok"
+        match = re.fullmatch(r"\$(\d+)=([-+]?\d*\.?\d*)", line)
+        if match:
+            self.settings[int(match.group(1))] = float(match.group(2))
+            return "ok"
+        return "error:3"
+
+    def _execute_gcode(self, line, now, jog):
+        words = WORD_RE.findall(line)
+        if "".join(l + v for l, v in words) != line:
+            return "error:1"
+        absolute = self.absolute
+        inches = self.inches
+        motion = None
+        target = {}
+        feed = None if jog else self.feed
+        dwell = None
+        for letter, value in words:
+            value = float(value)
+            if letter == "G":
+                if value in (0, 1) and not jog:
+                    motion = int(value)
+                elif value == 4 and not jog:
+                    motion = 4
+                elif value == 20:
+                    inches = True
+                elif value == 21:
+                    inches = False
+                elif value == 90:
+                    absolute = True
+                elif value == 91:
+                    absolute = False
+                elif value in (17, 53, 54, 94):
+                    pass
+                else:
+                    return "error:20"
+            elif letter == "M" and not jog:
+                if value in (3, 4):
+                    self.magnet = True
+                elif value == 5:
+                    self.magnet = False
+                elif value not in (2, 7, 8, 9, 30):
+                    return "error:20"
+            elif letter in "XYZ":
+                target["XYZ".index(letter)] = value * (25.4 if inches else 1.0)
+            elif letter == "F":
+                feed = value * (25.4 if inches else 1.0)
+            elif letter == "P":
+                dwell = value
+            elif letter == "S":
+                pass
+            else:
+                return "error:20"
+
+        if not jog:
+            self.absolute, self.inches = absolute, inches
+            if feed is not None:
+                self.feed = feed
+        if motion == 4:
+            self._busy_until = now + (dwell or 0.0)
+            return "ok"
+        if not target:
+            return "ok" if not jog else "error:22"
+        if jog:
+            motion = 1
+            if feed is None:
+                return "error:22"
+        if motion is None:
+            motion = 1
+        if motion == 1 and feed is None:
+            return "error:22"
+
+        start = self.planner[-1].target if self.planner else (
+            self.segment.target if self.segment else self.position)
+        end = list(start)
+        for axis, value in target.items():
+            end[axis] = value if absolute else start[axis] + value
+        rate = self.max_rate if motion == 0 else min(feed, self.max_rate)
+        segment = _Segment(start, end, rate / 60.0, self.acceleration, jog=jog)
+        if segment.length > 0:
+            if self._idle() and self._idle_since is not None and now - self._idle_since < 0.5:
+                self.stats["starvations"] += 1
+            self.planner.append(segment)
+            if jog:
+                self.state = "Jog"
+            elif self.state == "Idle":
+                self.state = "Run"
+        return "ok"
+
+    # ---------------------
+    # Motion
+    # ---------------------
+    def _advance(self, now):
+        while True:
+            if self.segment is None:
+                if self.hold or not self.planner:
+                    break
+                self.segment = self.planner.popleft()
+                self._seg_start = self._last_end if self._last_end is not None else now
+            end = self._seg_start + self.segment.duration
+            if end > now:
+                break
+            self.position = self.segment.target
+            self.segment = None
+            self._last_end = end
+        if self.segment is None:
+            self._last_end = None
+            if not self.planner and self.state in ("Run", "Jog"):
+                self.state = "Idle"
+                self._idle_since = now
+
+    def _current(self, now):
+        """Return (position, speed in mm/s) at `now`."""
+        if self.segment is None:
+            return self.position, 0.0
+        t = now - self._seg_start
+        return self.segment.position_at(t), self.segment.speed_at(t)
+
+    def _decelerate(self, now):
+        """
+        Replace the running block with a stop at full deceleration and return
+        the block covering the distance that was not travelled.
+        """
+        seg = self.segment
+        t = now - self._seg_start
+        pos, speed = seg.position_at(t), seg.speed_at(t)
+        remaining = seg.length - seg.distance_at(t)
+        stop = min(remaining, speed * speed / (2 * self.acceleration))
+        stop_at = tuple(p + u * stop for p, u in zip(pos, seg.unit))
+        self.segment = _Segment(pos, stop_at, speed, self.acceleration, v0=speed, jog=seg.jog)
+        self._seg_start = now
+        if remaining - stop > 1e-6:
+            return _Segment(stop_at, seg.target, seg.feed, self.acceleration, jog=seg.jog)
+        return None
+
+    def _feed_hold(self, now):
+        if self.state == "Jog":
+            self._jog_cancel(now)
+            return
+        if self.state != "Run" or self.hold:
+            return
+        self.hold = True
+        self.state = "Hold"
+        if self.segment is not None:
+            rest = self._decelerate(now)
+            if rest is not None:
+                self.planner.appendleft(rest)
+
+    def _cycle_start(self, now):
+        if self.hold:
+            self.hold = False
+            self.state = "Run" if not self._idle() else "Idle"
+
+    def _jog_cancel(self, now):
+        if self.state != "Jog":
+            return
+        self.planner = deque(s for s in self.planner if not s.jog)
+        if self.segment is not None:
+            self._decelerate(now)
+
+    def _soft_reset(self, now):
+        moving = self.segment is not None
+        position = self._current(now)[0]
+        settings, stats = self.settings, self.stats
+        self._reset_state()
+        self.settings, self.stats = settings, stats
+        self.position = position
+        if moving:
+            # Steps were lost; GRBL refuses to move until unlocked or homed.
+            self.state = "Alarm"
+            self._write("ALARM:3")
+        self._write("")
+        self._write(BANNER)
+
+    # ---------------------
+    # Status reports
+    # ---------------------
+    def _report_status(self, now):
+        self._advance(now)
+        pos, speed = self._current(now)
+        state = self.state
+        if state == "Hold":
+            state = "Hold:1" if self.segment is not None else "Hold:0"
+        blocks_free = self.planner_blocks - len(self.planner) - (1 if self.segment else 0)
+        rx_free = self.rx_buffer_size - len(self.rx)
+        mpos = ",".join(f"{p:.3f}" for p in pos)
+        report = f"<{state}|MPos:{mpos}|Bf:{blocks_free},{rx_free}|FS:{speed * 60:.0f},0"
+        if self.stats["status"] % 10 == 0:
+            report += "|WCO:0.000,0.000,0.000"
+        self.stats["status"] += 1
+        self._write(report + ">")
+
+
+if __name__ == '__main__':
+    sim = GrblSimulator()
+    port = sim.start()
+    print(f"Simulated GRBL listening on {port} (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        sim.stop()
@@ -0,0 +1,186 @@
+import threading
+import time
+from array import array
+
+# Machine states reported in GRBL 1.1 status reports, stored by index.
+STATES = ("Unknown", "Idle", "Run", "Hold", "Jog", "Alarm", "Door", "Check", "Home", "Sleep")
+MOVING_STATES = (STATES.index("Run"), STATES.index("Jog"))
+
+# Column layout of one sample in the ring buffer.
+T, MX, MY, MZ, WX, WY, WZ, FEED, SPINDLE = range(9)
+FIELDS = 9
+
+
+def parse_status(line, wco):
+    """
+    Parse a report like "<Idle|MPos:1.000,2.000,0.000|FS:0,0|WCO:0,0,0>".
+
+    Returns (state, mpos, wpos, feed, spindle, wco). GRBL only sends one of
+    MPos/WPos (depending on $10) and only sends WCO now and then, so the other
+    position is derived from the last known work coordinate offset, which the
+    caller passes in and gets back updated. Returns None for malformed lines.
+    """
+    if not (line.startswith("<") and line.endswith(">")):
+        return None
+    fields = line[1:-1].split("|")
+    state_name = fields[0].split(":")[0]
+    state = STATES.index(state_name) if state_name in STATES else 0
+    mpos = wpos = None
+    feed = spindle = 0.0
+    try:
+        for field in fields[1:]:
+            key, _, value = field.partition(":")
+            if key == "MPos":
+                mpos = tuple(float(v) for v in value.split(","))
+            elif key == "WPos":
+                wpos = tuple(float(v) for v in value.split(","))
+            elif key == "WCO":
+                wco = tuple(float(v) for v in value.split(","))
+            elif key == "FS":
+                feed, spindle = (float(v) for v in value.split(","))
+            elif key == "F":
+                feed = float(value)
+    except ValueError:
+        return None
+    if mpos is None and wpos is None:
+        return None
+    if mpos is None:
+        mpos = tuple(w + o for w, o in zip(wpos, wco))
+    if wpos is None:
+        wpos = tuple(m - o for m, o in zip(mpos, wco))
+    return state, mpos, wpos, feed, spindle, wco
+
+
+class StatusRing(object):
+    """
+    Fixed-size ring buffer of status samples.
+
+    Samples are stored flat in one preallocated array of doubles (FIELDS per
+    sample) plus a byte array of states, so the ring never grows and old
+    samples are overwritten in place.
+
+    The streamer's reader thread appends while the UI thread reads, so every
+    method takes a lock: a reader always sees whole samples, and the scans in
+    is_stalled() and last_move_duration() see one consistent ring.
+    """
+    def __init__(self, capacity=512):
+        self.capacity = capacity
+        self._values = array("d", bytes(8 * FIELDS * capacity))
+        self._states = array("B", bytes(capacity))
+        self._count = 0  # total samples ever written
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    def append(self, t, state, mpos, wpos, feed, spindle):
+        mpos = (tuple(mpos) + (0.0, 0.0, 0.0))[:3]
+        wpos = (tuple(wpos) + (0.0, 0.0, 0.0))[:3]
+        with self._lock:
+            slot = self._count % self.capacity
+            base = slot * FIELDS
+            v = self._values
+            v[base + T] = t
+            v[base + MX], v[base + MY], v[base + MZ] = mpos
+            v[base + WX], v[base + WY], v[base + WZ] = wpos
+            v[base + FEED] = feed
+            v[base + SPINDLE] = spindle
+            self._states[slot] = state
+            self._count += 1
+
+    def get(self, age=0):
+        """
+        Return sample `age` steps back from the newest (0 = latest) as
+        (state_name, t, mx, my, mz, wx, wy, wz, feed, spindle), or None.
+        """
+        with self._lock:
+            return self._get(age)
+
+    def _get(self, age):
+        if age >= len(self):
+            return None
+        slot = (self._count - 1 - age) % self.capacity
+        base = slot * FIELDS
+        return (STATES[self._states[slot]],) + tuple(self._values[base:base + FIELDS])
+
+    def latest(self):
+        return self.get(0)
+
+    def is_stalled(self, window, tolerance=0.001):
+        """
+        True if GRBL has reported Run/Jog for at least `window` seconds
+        without the machine position changing.
+        """
+        with self._lock:
+            return self._is_stalled(window, tolerance)
+
+    def _is_stalled(self, window, tolerance):
+        newest = self._get(0)
+        if newest is None:
+            return False
+        t_end = newest[1 + T]
+        for age in range(len(self)):
+            slot = (self._count - 1 - age) % self.capacity
+            base = slot * FIELDS
+            if self._states[slot] not in MOVING_STATES:
+                return False
+            for axis in (MX, MY, MZ):
+                if abs(self._values[base + axis] - newest[1 + axis]) > tolerance:
+                    return False
+            if t_end - self._values[base + T] >= window:
+                return True
+        return False
+
+    def last_move_duration(self):
+        """
+        Duration in seconds of the most recent completed Run/Jog stretch,
+        measured between the surrounding non-moving samples, or None.
+        """
+        with self._lock:
+            return self._last_move_duration()
+
+    def _last_move_duration(self):
+        end = None
+        newer_moving, newer_t = True, 0.0
+        for age in range(len(self)):
+            slot = (self._count - 1 - age) % self.capacity
+            moving = self._states[slot] in MOVING_STATES
+            t = self._values[slot * FIELDS + T]
+            if end is None:
+                if moving and not newer_moving:
+                    end = newer_t
+            elif not moving:
+                return end - t
+            newer_moving, newer_t = moving, t
+        return None
+
+
+class GrblStatusPoller(object):
+    """
+    Decides when to send "?" and records the replies in a StatusRing.
+
+    The streamer's reader thread calls due() in its loop and handle() for
+    every "<...>" report; on_sample is then called (still on the reader
+    thread) so the UI can schedule a redraw.
+    """
+    def __init__(self, interval=0.2, capacity=512, on_sample=None):
+        self.interval = interval
+        self.ring = StatusRing(capacity)
+        self.on_sample = on_sample
+        self.wco = (0.0, 0.0, 0.0)
+        self._next_poll = 0.0
+
+    def due(self, now):
+        if not self.interval or now < self._next_poll:
+            return False
+        self._next_poll = now + self.interval
+        return True
+
+    def handle(self, line):
+        parsed = parse_status(line, self.wco)
+        if parsed is None:
+            return
+        state, mpos, wpos, feed, spindle, self.wco = parsed
+        self.ring.append(time.monotonic(), state, mpos, wpos, feed, spindle)
+        if self.on_sample:
+            self.on_sample()
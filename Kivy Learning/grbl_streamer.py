@@ -0,0 +1,91 @@
+from serial_actor import SerialActor, JOG, MOVE, QUEUE_SIZE
+
+# GRBL's serial receive buffer is 128 bytes; one is kept free by the firmware.
+RX_BUFFER_SIZE = 127
+
+# GRBL realtime commands.
+JOG_CANCEL = b"\x85"  # cancel the current jog and flush queued jogs
+SOFT_RESET = b"\x18"
+
+
+class GrblError(Exception):
+    """
+    Set on a command's future when GRBL answers it with "error:N".
+    """
+    def __init__(self, command, response):
+        super(GrblError, self).__init__(f"{command!r} -> {response}")
+        self.command = command
+        self.response = response
+
+
+class GrblStreamer(SerialActor):
+    """
+    Stream G-code to GRBL using the character-counting protocol.
+
+    Instead of waiting for "ok" after every line, the streamer keeps track of
+    how many bytes are sitting in GRBL's RX buffer and writes the next line as
+    soon as it fits. Every line sent gets a Future that is resolved (or failed
+    with GrblError) when its "ok"/"error:N" comes back on the reader thread, so
+    GRBL's planner always has the next segments queued up.
+
+    "$J=" jogs go into the jog lane and are written ahead of queued moves;
+    a jog cancel drops jogs that have not been written yet, and a soft reset
+    fails everything GRBL is about to forget.
+    """
+    def __init__(self, ser, rx_buffer_size=RX_BUFFER_SIZE, on_message=None, status=None,
+                 on_disconnect=None, queue_size=QUEUE_SIZE, metrics=None):
+        super(GrblStreamer, self).__init__(ser, rx_buffer_size, queue_size,
+                                           on_message=on_message,
+                                           on_disconnect=on_disconnect,
+                                           metrics=metrics)
+        # Optional GrblStatusPoller; "?" is sent from the reader thread.
+        self.status = status
+        if status is not None and status.interval:
+            # readline must return often enough to keep polling on time.
+            self.ser.timeout = min(self.ser.timeout or status.interval, status.interval)
+
+    def send(self, command, lane=None, timeout=None):
+        """
+        Queue one line of G-code and return a Future for its response.
+        Jogs go to the jog lane unless a lane is given.
+        """
+        if lane is None:
+            lane = JOG if command.startswith("$J=") else MOVE
+        return super(GrblStreamer, self).send(command, lane, timeout)
+
+    def send_program(self, lines, lane=None, timeout=None):
+        return [self.send(line, lane, timeout) for line in lines if line.strip()]
+
+    def send_realtime(self, byte):
+        """
+        Send a realtime command (e.g. b"?", b"!", b"~", b"\\x85"). These are
+        picked off the stream by GRBL immediately and do not use the RX buffer.
+        """
+        if byte == JOG_CANCEL:
+            # A jog still queued here would start after the cancel.
+            self.flush_lane(JOG)
+        elif byte == SOFT_RESET:
+            # GRBL drops its RX buffer and planner; nothing will be answered.
+            self._fail_all(RuntimeError("GRBL soft reset"))
+        super(GrblStreamer, self).send_realtime(byte)
+
+    def poll(self, now):
+        if self.status is not None and self.status.due(now):
+            self.send_realtime(b"?")
+
+    def handle_line(self, line):
+        if line == "ok":
+            self.complete(line)
+        elif line.startswith("error"):
+            self.complete(line, GrblError(self._oldest_command(), line))
+        elif line.startswith("<") and self.status is not None:
+            self.status.handle(line)
+        else:
+            if line.startswith("ALARM") and self.metrics is not None:
+                self.metrics.count("alarms")
+            if self.on_message:
+                self.on_message(line)
+
+    def _oldest_command(self):
+        with self._lock:
+            return self._in_flight[0][0] if self._in_flight else None
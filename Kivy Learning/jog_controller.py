@@ -0,0 +1,95 @@
+import queue
+import threading
+
+from grbl_streamer import JOG_CANCEL
+
+# Length of a continuous jog. Longer than the gantry travel, so the head keeps
+# moving until the button is released and the jog is cancelled.
+JOG_DISTANCE = 1000  # mm
+
+
+class JogController(object):
+    """
+    One long-lived thread that turns button presses into GRBL jogs.
+
+    Pressing a direction issues a single long "$J=" jog; releasing it sends the
+    realtime jog-cancel byte so the head stops within GRBL's deceleration
+    distance instead of after the next fixed step. Directions that are held at
+    the same time are merged into one vector (e.g. X+ and Y+ jog diagonally).
+    All writes happen on this one thread, so presses can never race each other
+    on the serial port.
+    """
+    def __init__(self, send_gcode, send_realtime, feedrate, distance=JOG_DISTANCE):
+        self.send_gcode = send_gcode
+        self.send_realtime = send_realtime
+        self.feedrate = feedrate
+        self.distance = distance
+
+        self._events = queue.Queue()
+        self._held = {}          # direction_id -> (dx, dy)
+        self._vector = (0, 0)    # direction of the jog currently running
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def press(self, direction_id, dx, dy):
+        self._events.put(("press", direction_id, dx, dy))
+
+    def release(self, direction_id):
+        self._events.put(("release", direction_id, 0, 0))
+
+    def stop(self):
+        """
+        Cancel any running jog and end the controller thread.
+        """
+        self._events.put(None)
+        self._thread.join(timeout=1)
+
+    def _run(self):
+        while True:
+            event = self._events.get()
+            # Apply every event that is already waiting before touching the
+            # port, so a quick press/release pair or a two-finger diagonal
+            # results in a single command.
+            while event is not None:
+                self._apply(event)
+                try:
+                    event = self._events.get_nowait()
+                except queue.Empty:
+                    break
+            if event is None:
+                self._update((0, 0))
+                return
+            self._update(self._merged_vector())
+
+    def _apply(self, event):
+        kind, direction_id, dx, dy = event
+        if kind == "press":
+            self._held[direction_id] = (dx, dy)
+        else:
+            self._held.pop(direction_id, None)
+
+    def _merged_vector(self):
+        dx = sum(v[0] for v in self._held.values())
+        dy = sum(v[1] for v in self._held.values())
+        return (max(-1, min(1, dx)), max(-1, min(1, dy)))
+
+    def _update(self, vector):
+        if vector == self._vector:
+            return
+        if self._vector != (0, 0):
+            self.send_realtime(JOG_CANCEL)
+        self._vector = vector
+        if vector != (0, 0):
+            self.send_gcode(self.jog_command(*vector))
+
+    def jog_command(self, dx, dy):
+        """
+        Build the long incremental jog for a unit direction vector.
+        """
+        cmd = "$J=G21G91"
+        if dx:
+            cmd += f"X{dx * self.distance}"
+        if dy:
+            cmd += f"Y{dy * self.distance}"
+        cmd += f"F{self.feedrate}"
+        return cmd
@@ -3,30 +3,32 @@ from kivy.app import App
 from kivy.uix.widget import Widget
 from kivy.uix.image import Image
 from kivy.uix.behaviors import ButtonBehavior
-from kivy.graphics import Color, Rectangle
 from kivy.core.window import Window
-from kivy.metrics import dp, sp
 
-# Force Kivy to use a density of 1
-
-# Set the window size
-Window.size = (dp(1024), dp(600))
-Window.top = 0
-Window.left = 0
-Window.dpi = 96
+from board_layout import BoardLayout
+from board_texture import BoardBackground
 
+# No size or DPI overrides: the board is fitted to whatever window we get
+# (1024x600 on the panels, anything on a desktop) and refitted on resize.
 print(f"Window size: {Window.size}")
-print(f"Window DPI: {Window.dpi}")
 
 
 class ChessPiece(ButtonBehavior, Image):
     """A chess piece that can be clicked."""
-    def __init__(self, square_size, board_offset, **kwargs):
+    def __init__(self, square_size, board_offset, grid=(0, 0), **kwargs):
         super().__init__(**kwargs)
         self.square_size = square_size
         self.board_offset = board_offset
+        self.grid = grid  # (col, row) of the piece's square
         self.selected = False
-        
+
+    def set_geometry(self, square_size, board_offset):
+        """Follow a resized board; the piece stays on its square."""
+        self.square_size = square_size
+        self.board_offset = board_offset
+        self.size = (square_size, square_size)
+        self.pos = (board_offset[0] + self.grid[0] * square_size,
+                    board_offset[1] + self.grid[1] * square_size)
 
     def select(self):
         """Mark the piece as selected."""
@@ -42,32 +44,38 @@ class ChessPiece(ButtonBehavior, Image):
 class ChessBoard(Widget):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.board_size = 480  # Chessboard size
-        self.square_size = self.board_size // 8  # Size of each square
+        self.board_layout = BoardLayout(self, on_layout=self.on_board_layout, use_pos=False)
+        self.geometry = self.board_layout.compute(*Window.size)
+        self.board_size = self.geometry.board_size  # Chessboard size
+        self.square_size = self.geometry.square_size  # Size of each square
         self.selected_piece = None  # Currently selected piece
         self.occupied_squares = set()  # Keep track of occupied squares
+        self.background = None
         self.build_board()
         self.add_pawn()
 
     def build_board(self):
         """Draw the chessboard grid."""
-        self.canvas.clear()
-        colors = [(1, 1, 1, 1), (0.5, 0.5, 0.5, 1)]  # Alternating colors (white and gray)
+        colors = ((1, 1, 1, 1), (0.5, 0.5, 0.5, 1))  # Alternating colors (white and gray)
 
         # Center the chessboard within the Kivy window
-        self.center_x = (Window.width - self.board_size) / 2
-        self.center_y = (Window.height - self.board_size) / 2
-
-        with self.canvas:
-            for row in range(8):
-                for col in range(8):
-                    color_index = (row + col) % 2
-                    Color(*colors[color_index])
-                    Rectangle(
-                        pos=(self.center_x + col * self.square_size,
-                             self.center_y + row * self.square_size),
-                        size=(self.square_size, self.square_size)
-                    )
+        self.center_x, self.center_y = self.geometry.origin
+
+        if self.background is None:
+            self.background = BoardBackground(self.canvas.before, self.geometry.origin,
+                                              self.square_size, colors=colors)
+        else:
+            self.background.update(self.geometry.origin, self.square_size)
+
+    def on_board_layout(self, geometry):
+        """Refit the board to a resized window without rebuilding the pieces."""
+        self.geometry = geometry
+        self.board_size = geometry.board_size
+        self.square_size = geometry.square_size
+        self.build_board()
+        for child in self.children:
+            if isinstance(child, ChessPiece):
+                child.set_geometry(self.square_size, geometry.origin)
 
     def add_pawn(self):
         """Add a clickable pawn to the chessboard."""
@@ -80,6 +88,7 @@ class ChessBoard(Widget):
         pawn = ChessPiece(
             square_size=self.square_size,
             board_offset=(self.center_x, self.center_y),
+            grid=(col, row),
             source="figures/white_pawn.png",  # Replace with your pawn image path
             size_hint=(None, None),
             size=(self.square_size, self.square_size),
@@ -111,6 +120,7 @@ class ChessBoard(Widget):
             # Check if the square is empty
             if (col, row) not in self.occupied_squares:
                 # Update piece position
+                self.selected_piece.grid = (col, row)
                 new_pos = self.get_square_center(col, row)
 
                 # Safely handle old position
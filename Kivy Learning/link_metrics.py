@@ -0,0 +1,143 @@
+import csv
+import json
+import threading
+import time
+
+# Upper bounds of the histogram buckets in milliseconds; the last catches the rest.
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float("inf"))
+
+KINDS = ("jog", "move", "setting", "realtime")
+# enqueue -> write, write -> ok/error, enqueue -> ok/error
+STAGES = ("queue", "response", "total")
+COUNTERS = ("sent", "errors", "alarms", "retries", "dropped")
+
+
+def command_kind(command):
+    """Classify a line for the histograms."""
+    if command.startswith("$J="):
+        return "jog"
+    if command.startswith("$"):
+        return "setting"
+    return "move"
+
+
+class LatencyHistogram(object):
+    """
+    Fixed-bucket latency histogram. Recording is a bucket search and an
+    increment, so it is cheap enough to run for every command.
+    """
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, ms):
+        for i, bound in enumerate(self.buckets):
+            if ms <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, p):
+        """
+        Upper bound of the bucket holding the p-th percentile (the exact
+        maximum for the overflow bucket).
+        """
+        if not self.count:
+            return 0.0
+        rank = p / 100.0 * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if n and seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class LinkMetrics(object):
+    """
+    Timings and counters for everything sent over the GRBL link.
+
+    The serial actor reports each command when it is written and when its
+    response arrives; histograms are kept per command kind (jog, move, $
+    setting, realtime) and per stage. Safe to call from any thread.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.histograms = {(kind, stage): LatencyHistogram()
+                           for kind in KINDS for stage in STAGES}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def record_written(self, kind, enqueued, written):
+        with self._lock:
+            self.counters["sent"] += 1
+            self.histograms[(kind, "queue")].record((written - enqueued) * 1000.0)
+
+    def record_response(self, kind, enqueued, written, answered, error=False):
+        with self._lock:
+            self.histograms[(kind, "response")].record((answered - written) * 1000.0)
+            self.histograms[(kind, "total")].record((answered - enqueued) * 1000.0)
+            if error:
+                self.counters["errors"] += 1
+
+    def count(self, counter, n=1):
+        with self._lock:
+            self.counters[counter] += n
+
+    def summary(self):
+        """
+        A few lines of text for the on-screen link health panel.
+        """
+        with self._lock:
+            lines = [" ".join(f"{k}:{v}" for k, v in self.counters.items())]
+            for kind in KINDS:
+                h = self.histograms[(kind, "total" if kind != "realtime" else "queue")]
+                if not h.count:
+                    continue
+                lines.append(f"{kind:8s} n={h.count} p50={h.percentile(50):.0f} "
+                             f"p99={h.percentile(99):.0f} max={h.max:.0f} ms")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "started": self.started,
+                "dumped": time.time(),
+                "buckets_ms": [b if b != float("inf") else None for b in BUCKETS_MS],
+                "counters": dict(self.counters),
+                "histograms": {
+                    f"{kind}.{stage}": {"counts": list(h.counts), "count": h.count,
+                                        "mean_ms": h.mean, "max_ms": h.max}
+                    for (kind, stage), h in self.histograms.items()
+                },
+            }
+
+    def dump_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def dump_csv(self, path):
+        """
+        One row per kind/stage with a column per bucket, for spreadsheets.
+        """
+        data = self.to_dict()
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            bounds = ["inf" if b is None else f"<={b}ms" for b in data["buckets_ms"]]
+            writer.writerow(["kind", "stage", "count", "mean_ms", "max_ms"] + bounds)
+            for name, h in data["histograms"].items():
+                kind, stage = name.split(".")
+                writer.writerow([kind, stage, h["count"], f"{h['mean_ms']:.3f}",
+                                 f"{h['max_ms']:.3f}"] + h["counts"])
+            for counter, value in data["counters"].items():
+                writer.writerow(["counter", counter, value])
@@ -0,0 +1,131 @@
+import logging
+import queue
+import threading
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+from kivy.clock import Clock
+from kivy.uix.label import Label
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+
+LOG_CAPACITY = 1000         # lines kept on screen; older lines fall off the top
+LINE_HEIGHT = 22            # px per log line
+FILE_MAX_BYTES = 1_000_000  # rotate the mirror file at this size
+FILE_BACKUPS = 3            # rotated files kept (name.1 ... name.3)
+FILE_QUEUE_SIZE = 10000     # lines waiting for the file writer before dropping
+
+
+class LogLine(Label):
+    """
+    One line of the log. Long lines are cut off rather than wrapped so every
+    row has the same height and the view never needs a text re-layout pass.
+    """
+    def __init__(self, **kwargs):
+        super(LogLine, self).__init__(halign='left', valign='middle', shorten=True,
+                                      shorten_from='right', **kwargs)
+        self.bind(size=self.setter('text_size'))
+
+
+class LogFileWriter(object):
+    """
+    Mirror log lines to a size-rotated file from a background thread, so disk
+    writes never stall the UI. If the disk falls behind, lines are dropped
+    and counted rather than queued without limit.
+    """
+    def __init__(self, path, max_bytes=FILE_MAX_BYTES, backups=FILE_BACKUPS):
+        self.handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups)
+        self.handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=FILE_QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, message):
+        try:
+            self._queue.put_nowait(logging.makeLogRecord({"msg": message}))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=2)
+        self.handler.close()
+
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            if record is None:
+                return
+            self.handler.emit(record)
+
+
+class LogView(RecycleView):
+    """
+    A scrolling log that stays fast however long the session runs.
+
+    - Lines live in a fixed-capacity ring buffer, so memory is bounded.
+    - log() may be called from any thread; everything logged during one frame
+      is applied to the view in a single update.
+    - Only the rows currently visible are backed by widgets (RecycleView), so
+      the cost of a redraw does not depend on the length of the log.
+    - With `log_file` set, lines are also appended to a rotating file by a
+      background writer.
+
+    The view follows new lines while scrolled to the bottom and stays put
+    while the user has scrolled up to read.
+    """
+    def __init__(self, capacity=LOG_CAPACITY, log_file=None, line_height=LINE_HEIGHT,
+                 **kwargs):
+        super(LogView, self).__init__(**kwargs)
+        layout = RecycleBoxLayout(orientation='vertical', size_hint_y=None,
+                                  default_size=(None, line_height),
+                                  default_size_hint=(1, None))
+        layout.bind(minimum_height=layout.setter('height'))
+        self.add_widget(layout)
+        # Only takes effect once the layout manager is in place.
+        self.viewclass = LogLine
+
+        self._lines = deque(maxlen=capacity)
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_trigger = Clock.create_trigger(self._flush)
+        self.file_writer = LogFileWriter(log_file) if log_file else None
+
+    def log(self, message):
+        """
+        Append a message (may contain several lines). Safe from any thread.
+        """
+        if self.file_writer is not None:
+            self.file_writer.write(message)
+        with self._lock:
+            self._pending.extend(message.splitlines() or [""])
+        self._flush_trigger()
+
+    def clear(self):
+        with self._lock:
+            self._pending = []
+        self._lines.clear()
+        self.data = []
+
+    @property
+    def text(self):
+        """The buffered log as one string, e.g. for copying to a file."""
+        return "\n".join(row["text"] for row in self._lines)
+
+    def close(self):
+        if self.file_writer is not None:
+            self.file_writer.close()
+            self.file_writer = None
+
+    def _flush(self, dt):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        # scroll_y is 0 at the bottom; "near" leaves room for rounding.
+        follow = not self.data or self.scroll_y <= 0.01
+        self._lines.extend({"text": line} for line in pending)
+        self.data = list(self._lines)
+        if follow:
+            self.scroll_y = 0
@@ -0,0 +1,126 @@
+from collections import OrderedDict, namedtuple
+
+import chess
+import chess.polyglot
+
+CACHE_SIZE = 64  # positions kept; enough for takebacks and replaying a game
+
+# One legal move plus the facts the UI asks about it.
+MoveEntry = namedtuple("MoveEntry", "move capture promotion en_passant castling")
+
+
+class MoveTable(object):
+    """
+    All legal moves of one position, grouped by from-square. Built once, so
+    highlighting, touch validation and sensor move inference never have to
+    regenerate or re-test moves.
+    """
+    def __init__(self, board, key=None):
+        self.key = chess.polyglot.zobrist_hash(board) if key is None else key
+        self.turn = board.turn
+        self.by_from = {}
+        self._ep_captures = {}
+        self._castling_rooks = {}
+        for move in board.legal_moves:
+            en_passant = board.is_en_passant(move)
+            castling = board.is_castling(move)
+            entry = MoveEntry(move,
+                              capture=board.is_capture(move),
+                              promotion=move.promotion is not None,
+                              en_passant=en_passant,
+                              castling=castling)
+            self.by_from.setdefault(move.from_square, []).append(entry)
+            if en_passant:
+                self._ep_captures[move] = chess.square(chess.square_file(move.to_square),
+                                                       chess.square_rank(move.from_square))
+            if castling:
+                rank = chess.square_rank(move.from_square)
+                if board.is_kingside_castling(move):
+                    self._castling_rooks[move] = (chess.square(7, rank), chess.square(5, rank))
+                else:
+                    self._castling_rooks[move] = (chess.square(0, rank), chess.square(3, rank))
+
+    def __len__(self):
+        return sum(len(entries) for entries in self.by_from.values())
+
+    def moves_from(self, sq):
+        """Legal moves of the piece on `sq` (empty if it has none)."""
+        return self.by_from.get(sq, ())
+
+    def find(self, from_sq, to_sq, promotion=chess.QUEEN):
+        """
+        The legal move from_sq -> to_sq, or None. Pawn moves to the last
+        rank promote to `promotion`.
+        """
+        for entry in self.moves_from(from_sq):
+            if entry.move.to_square == to_sq and \
+                    (not entry.promotion or entry.move.promotion == promotion):
+                return entry
+        return None
+
+    def captured_square(self, move):
+        """Square of the piece `move` captures (not to_square for en passant)."""
+        return self._ep_captures.get(move, move.to_square)
+
+    def castling_rook(self, move):
+        """(from, to) of the rook for a castling move, else None."""
+        return self._castling_rooks.get(move)
+
+    def occupancy_change(self, entry):
+        """
+        Squares a move empties and fills, as seen by per-square presence
+        sensors (which cannot tell a capture's arriving piece from the one it
+        replaced).
+        """
+        move = entry.move
+        vacated = {move.from_square}
+        filled = set()
+        if not entry.capture or entry.en_passant:
+            filled.add(move.to_square)
+        if entry.en_passant:
+            vacated.add(self._ep_captures[move])
+        rook = self._castling_rooks.get(move)
+        if rook is not None:
+            vacated.add(rook[0])
+            filled.add(rook[1])
+        return frozenset(vacated), frozenset(filled)
+
+    def infer(self, vacated, filled):
+        """
+        Legal moves that explain a change in square occupancy. `vacated` and
+        `filled` are the squares that became empty / occupied. Several moves
+        can match (e.g. promotions, or captures on different squares from the
+        same piece until the captured piece is lifted); callers decide.
+        """
+        vacated, filled = frozenset(vacated), frozenset(filled)
+        return [entry for entries in self.by_from.values() for entry in entries
+                if self.occupancy_change(entry) == (vacated, filled)]
+
+
+class MoveCache(object):
+    """
+    LRU of MoveTables keyed by the position's Zobrist hash, so revisiting a
+    position (takeback, replay, repeated selection) costs one hash.
+    """
+    def __init__(self, capacity=CACHE_SIZE):
+        self.capacity = capacity
+        self._tables = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def table(self, board):
+        key = chess.polyglot.zobrist_hash(board)
+        table = self._tables.get(key)
+        if table is not None:
+            self._tables.move_to_end(key)
+            self.hits += 1
+            return table
+        self.misses += 1
+        table = MoveTable(board, key)
+        self._tables[key] = table
+        if len(self._tables) > self.capacity:
+            self._tables.popitem(last=False)
+        return table
+
+    def clear(self):
+        self._tables.clear()
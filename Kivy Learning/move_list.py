@@ -0,0 +1,160 @@
+import math
+from array import array
+
+from kivy.properties import NumericProperty, StringProperty
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.button import Button
+from kivy.uix.label import Label
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+
+ROW_HEIGHT = 30
+CURRENT_COLOR = (0.3, 0.5, 0.9, 1)  # background of the half-move on the board
+NORMAL_COLOR = (0, 0, 0, 0)
+
+
+def format_clock(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+class MoveRow(RecycleDataViewBehavior, BoxLayout):
+    """
+    One numbered row of the move list: "12.  Nf3  Nc6". Rows are recycled, so
+    everything shown comes from the data dict set in refresh_view_attrs.
+    """
+    number = StringProperty("")
+    white = StringProperty("")
+    black = StringProperty("")
+    current = NumericProperty(-1)  # 0 = white's move is current, 1 = black's
+
+    def __init__(self, **kwargs):
+        super(MoveRow, self).__init__(orientation='horizontal', **kwargs)
+        self.move_list = None
+        self.row = 0
+        self.number_label = Label(size_hint_x=0.2, font_size='16sp')
+        self.white_button = Button(size_hint_x=0.4, font_size='16sp', background_normal='',
+                                   background_color=NORMAL_COLOR)
+        self.black_button = Button(size_hint_x=0.4, font_size='16sp', background_normal='',
+                                   background_color=NORMAL_COLOR)
+        self.white_button.bind(on_release=lambda *_: self._jump(0))
+        self.black_button.bind(on_release=lambda *_: self._jump(1))
+        self.add_widget(self.number_label)
+        self.add_widget(self.white_button)
+        self.add_widget(self.black_button)
+
+    def refresh_view_attrs(self, rv, index, data):
+        self.move_list = rv
+        self.row = index
+        self.number_label.text = data['number']
+        self.white_button.text = data['white']
+        self.black_button.text = data['black']
+        self.white_button.background_color = CURRENT_COLOR if data['current'] == 0 else NORMAL_COLOR
+        self.black_button.background_color = CURRENT_COLOR if data['current'] == 1 else NORMAL_COLOR
+        return super(MoveRow, self).refresh_view_attrs(rv, index, data)
+
+    def _jump(self, side):
+        if self.move_list is not None:
+            self.move_list.jump(2 * self.row + side + 1)
+
+
+class MoveList(RecycleView):
+    """
+    The game's moves as numbered white/black pairs.
+
+    Moves are kept in compact arrays (SAN strings plus optional clock and
+    evaluation per half-move) and the view only has widgets for the rows on
+    screen, so a 300-ply replay costs the same to draw as a 10-ply game.
+    Appending a move touches one row of data.
+
+    Tapping a half-move calls on_jump(ply), where ply is the number of
+    half-moves played up to and including it (0 = start position).
+    """
+    def __init__(self, on_jump=None, row_height=ROW_HEIGHT, **kwargs):
+        super(MoveList, self).__init__(**kwargs)
+        layout = RecycleBoxLayout(orientation='vertical', size_hint_y=None,
+                                  default_size=(None, row_height),
+                                  default_size_hint=(1, None))
+        layout.bind(minimum_height=layout.setter('height'))
+        self.add_widget(layout)
+        # Only takes effect once the layout manager is in place.
+        self.viewclass = MoveRow
+        self.on_jump = on_jump
+
+        self.sans = []
+        self.clocks = array('d')  # seconds left after the move, NaN if unknown
+        self.evals = array('d')   # evaluation in pawns from white's side, NaN if unknown
+        self.current_ply = 0
+
+    def append(self, san, clock=None, evaluation=None):
+        """Add the next half-move and make it the current one."""
+        self.sans.append(san)
+        self.clocks.append(math.nan if clock is None else clock)
+        self.evals.append(math.nan if evaluation is None else evaluation)
+        ply = len(self.sans)
+        previous = self.current_ply
+        self.current_ply = ply
+        if ply % 2 == 1:
+            self.data.append(self._row(ply // 2))
+        else:
+            self.data[-1] = self._row(ply // 2 - 1)
+        self._refresh_row(previous)
+        self.scroll_y = 0
+
+    def set_moves(self, sans, clocks=None, evaluations=None):
+        """Replace the whole list, e.g. when loading a game for replay."""
+        self.sans = list(sans)
+        self.clocks = array('d', clocks if clocks is not None else [math.nan] * len(self.sans))
+        self.evals = array('d', evaluations if evaluations is not None
+                           else [math.nan] * len(self.sans))
+        self.current_ply = len(self.sans)
+        self.data = [self._row(row) for row in range((len(self.sans) + 1) // 2)]
+
+    def truncate(self, ply):
+        """Drop every half-move after `ply`, e.g. before playing a new line."""
+        del self.sans[ply:]
+        del self.clocks[ply:]
+        del self.evals[ply:]
+        self.current_ply = min(self.current_ply, ply)
+        rows = (ply + 1) // 2
+        del self.data[rows:]
+        if ply % 2 == 1:
+            self.data[-1] = self._row(rows - 1)
+
+    def set_current(self, ply):
+        """Mark the half-move the board is showing."""
+        previous, self.current_ply = self.current_ply, ply
+        self._refresh_row(previous)
+        self._refresh_row(ply)
+
+    def set_evaluation(self, ply, evaluation):
+        self.evals[ply - 1] = evaluation
+        self._refresh_row(ply)
+
+    def jump(self, ply):
+        if self.on_jump is not None:
+            self.on_jump(ply)
+
+    def _refresh_row(self, ply):
+        row = (ply - 1) // 2
+        if ply > 0 and row < len(self.data):
+            self.data[row] = self._row(row)
+
+    def _cell(self, ply):
+        if ply > len(self.sans):
+            return ""
+        text = self.sans[ply - 1]
+        evaluation = self.evals[ply - 1]
+        if not math.isnan(evaluation):
+            text += f" {evaluation:+.1f}"
+        clock = self.clocks[ply - 1]
+        if not math.isnan(clock):
+            text += f" {format_clock(clock)}"
+        return text
+
+    def _row(self, row):
+        white_ply = 2 * row + 1
+        current = self.current_ply - white_ply if self.current_ply in (white_ply, white_ply + 1) else -1
+        return {'number': f"{row + 1}.", 'white': self._cell(white_ply),
+                'black': self._cell(white_ply + 1), 'current': current}
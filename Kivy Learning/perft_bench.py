@@ -0,0 +1,123 @@
+"""
+Check the engine's move generator against python-chess and time both.
+
+    python perft_bench.py                    # standard positions, default depths
+    python perft_bench.py --depth 3          # every position to depth 3
+    python perft_bench.py --position kiwipete --depth 4 --no-reference
+
+For each position the bitboard generator (bitboard.Position) counts the
+leaf nodes at the given depth. The count is checked against the published
+figure and against python-chess's own perft. Nodes/s are reported for
+both. On a mismatch the per-move counts ("divide") are printed for the
+moves that disagree. The exit status is 1 if any count is wrong.
+"""
+import argparse
+import json
+import sys
+import time
+
+import chess
+
+from bitboard import Position, perft
+
+# name: (FEN, default depth, {depth: published node count})
+POSITIONS = {
+    "start": (chess.STARTING_FEN, 4,
+              {1: 20, 2: 400, 3: 8902, 4: 197281, 5: 4865609}),
+    "kiwipete": ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", 3,
+                 {1: 48, 2: 2039, 3: 97862, 4: 4085603}),
+    "endgame": ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", 4,
+                {1: 14, 2: 191, 3: 2812, 4: 43238, 5: 674624}),
+    "promotions": ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", 3,
+                   {1: 6, 2: 264, 3: 9467, 4: 422333}),
+    "talkchess": ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", 3,
+                  {1: 44, 2: 1486, 3: 62379, 4: 2103487}),
+    "middlegame": ("r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", 3,
+                   {1: 46, 2: 2079, 3: 89890, 4: 3894594}),
+}
+
+
+def reference_perft(board, depth):
+    """Perft with python-chess, for comparison."""
+    if depth <= 1:
+        return board.legal_moves.count() if depth == 1 else 1
+    nodes = 0
+    for move in board.legal_moves:
+        board.push(move)
+        nodes += reference_perft(board, depth - 1)
+        board.pop()
+    return nodes
+
+
+def divide(fen, depth):
+    """Per-move counts from both generators, keyed by UCI."""
+    pos = Position(fen)
+    ours = {}
+    for move in pos.legal_moves():
+        pos.make(move)
+        ours[pos.to_chess(move).uci()] = perft(pos, depth - 1)
+        pos.unmake()
+    board = chess.Board(fen)
+    theirs = {}
+    for move in board.legal_moves:
+        board.push(move)
+        theirs[move.uci()] = reference_perft(board, depth - 1)
+        board.pop()
+    return ours, theirs
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def run_position(name, depth, reference=True):
+    fen, default_depth, known = POSITIONS[name]
+    depth = depth or default_depth
+    nodes, elapsed = timed(perft, Position(fen), depth)
+    result = {"position": name, "depth": depth, "nodes": nodes, "time": elapsed,
+              "nps": nodes / elapsed if elapsed else 0.0, "expected": known.get(depth)}
+    if reference:
+        ref_nodes, ref_elapsed = timed(reference_perft, chess.Board(fen), depth)
+        result.update(reference_nodes=ref_nodes, reference_time=ref_elapsed,
+                      reference_nps=ref_nodes / ref_elapsed if ref_elapsed else 0.0)
+    expected = [n for n in (result["expected"], result.get("reference_nodes")) if n is not None]
+    result["ok"] = all(nodes == n for n in expected)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--position", action="append", choices=list(POSITIONS),
+                        help="position(s) to run (default: all)")
+    parser.add_argument("--depth", type=int, help="depth for every position")
+    parser.add_argument("--no-reference", action="store_true",
+                        help="skip python-chess (only check the published counts)")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'position':12s}{'depth':>6s}{'nodes':>10s}{'nodes/s':>11s}"
+          f"{'ref nodes/s':>13s}{'speedup':>9s}  result")
+    for name in args.position or list(POSITIONS):
+        r = run_position(name, args.depth, reference=not args.no_reference)
+        results.append(r)
+        ref = r.get("reference_nps")
+        print(f"{name:12s}{r['depth']:6d}{r['nodes']:10d}{r['nps']:11.0f}"
+              f"{ref or 0:13.0f}{(r['nps'] / ref) if ref else 0:8.1f}x  "
+              f"{'ok' if r['ok'] else 'MISMATCH'}")
+        if not r["ok"] and r["depth"] > 1:
+            ours, theirs = divide(POSITIONS[name][0], r["depth"])
+            for uci in sorted(set(ours) | set(theirs)):
+                if ours.get(uci) != theirs.get(uci):
+                    print(f"    {uci}: ours {ours.get(uci)}, python-chess {theirs.get(uci)}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0 if all(r["ok"] for r in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
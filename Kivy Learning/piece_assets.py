@@ -0,0 +1,142 @@
+import json
+import math
+import os
+
+from kivy.core.image import Image as CoreImage
+from kivy.graphics import Color, Fbo, ClearColor, ClearBuffers, Rectangle
+
+# The piece images and UI icons live in Figures/ at the top of the repo.
+FIGURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "Figures")
+CACHE_DIR = os.path.expanduser("~/.checkmate_atlas")
+
+# python-chess piece symbols -> image names
+PIECE_NAMES = {
+    'P': 'white_pawn', 'R': 'white_rook', 'N': 'white_knight',
+    'B': 'white_bishop', 'Q': 'white_queen', 'K': 'white_king',
+    'p': 'black_pawn', 'r': 'black_rook', 'n': 'black_knight',
+    'b': 'black_bishop', 'q': 'black_queen', 'k': 'black_king',
+}
+ICON_NAMES = ('Play', 'settings', 'Cpu', 'Globe', 'Icon', 'Power', 'User', 'logo')
+
+PADDING = 2  # px between cells so filtering never bleeds into a neighbour
+
+_atlases = {}
+
+
+def get_atlas(size):
+    """
+    The shared atlas for images drawn at `size` px (e.g. the square size).
+    Built or loaded once per size and process.
+    """
+    size = int(round(size))
+    atlas = _atlases.get(size)
+    if atlas is None:
+        atlas = _atlases[size] = AssetAtlas(size)
+    return atlas
+
+
+class AssetAtlas(object):
+    """
+    All piece images and icons packed into one texture at a fixed cell size.
+
+    The packed PNG and its Kivy .atlas index are cached in CACHE_DIR. They are
+    reused for as long as the source files' mtimes and the cell size match,
+    so a normal start loads a single image. Every widget showing a piece gets a
+    region of the same texture instead of decoding its own copy.
+    """
+    def __init__(self, size, names=None, source_dir=FIGURES_DIR, cache_dir=CACHE_DIR):
+        self.size = size
+        self.source_dir = source_dir
+        self.names = list(names or list(PIECE_NAMES.values()) + list(ICON_NAMES))
+        self.names = [n for n in self.names if os.path.exists(self._source(n))]
+        self.basename = os.path.join(cache_dir, f"pieces_{size}")
+        self.textures = None
+        self.built = False
+
+        key = self._key()
+        try:
+            with open(self.basename + ".json") as f:
+                cached = json.load(f) == key
+        except (OSError, ValueError):
+            cached = False
+        if cached:
+            try:
+                self.textures = self._load()
+            except Exception as e:
+                print(f"Could not load texture atlas: {e}")
+        if self.textures is None:
+            self.textures = self._build()
+            self.built = True
+            try:
+                self._save(key)
+            except Exception as e:
+                # The atlas still works for this run; it is just rebuilt next time.
+                print(f"Could not cache texture atlas: {e}")
+
+    def texture(self, name):
+        return self.textures[name]
+
+    def piece(self, symbol):
+        """Texture for a python-chess piece symbol such as 'P' or 'k'."""
+        return self.textures[PIECE_NAMES[symbol]]
+
+    def _source(self, name):
+        return os.path.join(self.source_dir, name + ".png")
+
+    def _key(self):
+        return {"size": self.size, "padding": PADDING,
+                "sources": {n: os.path.getmtime(self._source(n)) for n in self.names}}
+
+    def _layout(self):
+        cols = int(math.ceil(math.sqrt(len(self.names))))
+        rows = int(math.ceil(len(self.names) / float(cols)))
+        cell = self.size + 2 * PADDING
+        regions = {}
+        for i, name in enumerate(self.names):
+            col, row = i % cols, i // cols
+            regions[name] = (col * cell + PADDING, row * cell + PADDING, self.size, self.size)
+        return (cols * cell, rows * cell), regions
+
+    def _build(self):
+        """Scale every image into its cell of an offscreen framebuffer."""
+        atlas_size, regions = self._layout()
+        self.fbo = Fbo(size=atlas_size)
+        with self.fbo:
+            ClearColor(0, 0, 0, 0)
+            ClearBuffers()
+            Color(1, 1, 1, 1)
+            for name, (x, y, w, h) in regions.items():
+                texture = CoreImage(self._source(name)).texture
+                # Fit inside the cell, keeping the aspect ratio.
+                scale = min(w / float(texture.width), h / float(texture.height))
+                tw, th = texture.width * scale, texture.height * scale
+                Rectangle(texture=texture, pos=(x + (w - tw) / 2.0, y + (h - th) / 2.0),
+                          size=(tw, th))
+        self.fbo.draw()
+        self.regions = regions
+        texture = self.fbo.texture
+        return {name: texture.get_region(*region) for name, region in regions.items()}
+
+    def _save(self, key):
+        os.makedirs(os.path.dirname(self.basename), exist_ok=True)
+        png = self.basename + ".png"
+        CoreImage(self.fbo.texture).save(png, flipped=True)
+        with open(self.basename + ".atlas", "w") as f:
+            json.dump({os.path.basename(png): self.regions}, f)
+        # Written last: a half-written cache is never mistaken for a good one.
+        with open(self.basename + ".json", "w") as f:
+            json.dump(key, f)
+
+    def _load(self):
+        with open(self.basename + ".atlas") as f:
+            meta = json.load(f)
+        textures = {}
+        for filename, regions in meta.items():
+            texture = CoreImage(os.path.join(os.path.dirname(self.basename), filename)).texture
+            for name, region in regions.items():
+                textures[name] = texture.get_region(*region)
+        missing = set(self.names) - set(textures)
+        if missing:
+            raise ValueError(f"atlas is missing {sorted(missing)}")
+        return textures
@@ -0,0 +1,290 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from link_metrics import command_kind
+
+# Command lanes, highest priority first. Realtime bytes never wait behind
+# lines; queued jogs are written before queued moves.
+JOG, MOVE = 0, 1
+LANES = (JOG, MOVE)
+
+QUEUE_SIZE = 64  # lines per lane before send() applies backpressure
+
+
+class SerialActor(object):
+    """
+    The single owner of a serial port.
+
+    Callers on any thread hand lines to send() and get a Future back; one
+    writer thread is the only code that ever writes to the port and one reader
+    thread is the only code that reads from it, so callers can no longer
+    interleave writes or swallow each other's responses.
+
+    - Each lane is a bounded queue: send() blocks (or raises queue.Full after
+      `timeout`) when a lane is full, pushing back on callers that produce
+      commands faster than the device accepts them.
+    - With rx_buffer_size set, lines are only written while they fit in the
+      device's receive buffer (character counting) and each response line
+      resolves the oldest unanswered command, in order.
+    - Without it (plain Arduino sketches that never answer), a line's Future
+      resolves as soon as it has been written.
+
+    Subclasses decide which incoming lines are responses by overriding
+    handle_line(), and can do periodic work on the reader thread in poll().
+    With a LinkMetrics attached, every command's enqueue, write and response
+    times are recorded.
+    """
+    def __init__(self, ser, rx_buffer_size=None, queue_size=QUEUE_SIZE,
+                 on_message=None, on_disconnect=None, metrics=None):
+        self.ser = ser
+        self.rx_buffer_size = rx_buffer_size
+        self.queue_size = queue_size
+        # Called from the reader thread with every line that is not a response.
+        self.on_message = on_message
+        # Called from the reader thread with the exception if the port fails
+        # (e.g. the USB cable is unplugged).
+        self.on_disconnect = on_disconnect
+        self.metrics = metrics
+
+        self._lock = threading.Condition()
+        # (command, data, future, reply, enqueued)
+        self._lanes = {lane: deque() for lane in LANES}
+        self._realtime = deque()   # (byte, enqueued)
+        # (command, length, future, enqueued, written) awaiting a response
+        self._in_flight = deque()
+        self._buffered = 0         # bytes currently counted in the device's RX buffer
+        self._running = False
+        self._reader = None
+        self._writer = None
+
+    def start(self):
+        """
+        Start the writer and reader threads.
+        """
+        self._running = True
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._writer.start()
+        self._reader.start()
+
+    def stop(self):
+        """
+        Stop both threads and fail any command still waiting.
+        """
+        with self._lock:
+            self._running = False
+            self._lock.notify_all()
+        for thread in (self._writer, self._reader):
+            if thread is not None and thread is not threading.current_thread():
+                thread.join(timeout=2)
+        self._fail_all(RuntimeError("serial actor stopped"))
+
+    # ---------------------
+    # Caller API (any thread)
+    # ---------------------
+    def send(self, command, lane=MOVE, timeout=None):
+        """
+        Queue one line and return a Future for its response. Blocks while the
+        lane is full; raises queue.Full if `timeout` (seconds) runs out first.
+        """
+        future = Future()
+        data = f"{command.strip()}\n".encode()
+        reply = self.rx_buffer_size is not None
+        if reply and len(data) > self.rx_buffer_size:
+            future.set_exception(ValueError(f"Line longer than RX buffer: {command!r}"))
+            return future
+        with self._lock:
+            room = self._lock.wait_for(
+                lambda: not self._running or len(self._lanes[lane]) < self.queue_size,
+                timeout)
+            if not self._running:
+                future.set_exception(RuntimeError("serial actor is not running"))
+                return future
+            if not room:
+                raise queue.Full(f"{self.queue_size} commands already queued")
+            self._lanes[lane].append((command, data, future, reply, time.monotonic()))
+            self._lock.notify_all()
+        return future
+
+    def send_program(self, lines, lane=MOVE, timeout=None):
+        """
+        Queue a list of lines back to back and return their futures.
+        """
+        return [self.send(line, lane, timeout) for line in lines if line.strip()]
+
+    def send_realtime(self, byte):
+        """
+        Write a single-byte command ahead of everything queued. It does not
+        use the device's line buffer and gets no response.
+        """
+        with self._lock:
+            self._realtime.append((byte, time.monotonic()))
+            self._lock.notify_all()
+
+    def flush_lane(self, lane):
+        """
+        Cancel every command in `lane` that has not been written yet.
+        """
+        with self._lock:
+            dropped = list(self._lanes[lane])
+            self._lanes[lane].clear()
+            self._lock.notify_all()
+        for item in dropped:
+            item[2].cancel()
+        if self.metrics is not None and dropped:
+            self.metrics.count("dropped", len(dropped))
+
+    def wait_idle(self, timeout=None):
+        """
+        Block until every queued command has been written and answered.
+        Returns False if the timeout expired first.
+        """
+        with self._lock:
+            return self._lock.wait_for(
+                lambda: not self._in_flight and not any(self._lanes.values()), timeout)
+
+    @property
+    def buffered(self):
+        """Bytes currently outstanding in the device's RX buffer."""
+        return self._buffered
+
+    # ---------------------
+    # Hooks for subclasses (reader thread)
+    # ---------------------
+    def poll(self, now):
+        """Called before every read; e.g. to request a status report."""
+
+    def handle_line(self, line):
+        """
+        Handle one received line. The default treats nothing as a response;
+        subclasses call complete() for lines that answer a command.
+        """
+        if self.on_message:
+            self.on_message(line)
+
+    def complete(self, response, error=None):
+        """
+        Resolve the oldest unanswered command with `response`, or fail it
+        with `error`.
+        """
+        with self._lock:
+            if not self._in_flight:
+                # A response we never asked for, e.g. after a reset.
+                return
+            command, length, future, enqueued, written = self._in_flight.popleft()
+            self._buffered -= length
+            self._lock.notify_all()
+        if self.metrics is not None:
+            self.metrics.record_response(command_kind(command), enqueued, written,
+                                         time.monotonic(), error is not None)
+        if error is None:
+            future.set_result(response)
+        else:
+            future.set_exception(error)
+
+    # ---------------------
+    # Threads
+    # ---------------------
+    def _next_line(self):
+        """
+        Pick the next line that may be written now. Must hold the lock.
+        """
+        for lane in LANES:
+            pending = self._lanes[lane]
+            while pending and pending[0][2].cancelled():
+                pending.popleft()
+            if not pending:
+                continue
+            command, data, future, reply, enqueued = pending[0]
+            if reply and self._buffered + len(data) > self.rx_buffer_size:
+                # Keep order: nothing from a lower lane overtakes a line that
+                # is waiting for room.
+                return None
+            return pending.popleft()
+        return None
+
+    def _write_loop(self):
+        while True:
+            with self._lock:
+                item = None
+                while self._running and not self._realtime:
+                    item = self._next_line()
+                    if item is not None:
+                        break
+                    self._lock.wait()
+                if not self._running:
+                    return
+                realtime = list(self._realtime)
+                self._realtime.clear()
+                written = time.monotonic()
+                if item is not None:
+                    command, data, future, reply, enqueued = item
+                    if not future.set_running_or_notify_cancel():
+                        item = None
+                    elif reply:
+                        self._buffered += len(data)
+                        self._in_flight.append((command, len(data), future,
+                                                enqueued, written))
+                self._lock.notify_all()
+            try:
+                if realtime:
+                    self.ser.write(b"".join(byte for byte, _ in realtime))
+                if item is not None:
+                    self.ser.write(data)
+                    if not reply:
+                        future.set_result(None)
+                if self.metrics is not None:
+                    for _, enqueued_rt in realtime:
+                        self.metrics.record_written("realtime", enqueued_rt, written)
+                    if item is not None:
+                        self.metrics.record_written(command_kind(command), enqueued, written)
+            except Exception as e:
+                print(f"Serial writer stopped: {e}")
+                self._disconnected(e)
+                return
+
+    def _read_loop(self):
+        partial = b""
+        while self._running:
+            try:
+                self.poll(time.monotonic())
+                raw = self.ser.readline()
+            except Exception as e:
+                print(f"Serial reader stopped: {e}")
+                self._disconnected(e)
+                return
+            if not raw.endswith(b"\n"):
+                # readline timed out part-way through a line; keep what we have.
+                partial += raw
+                continue
+            line = (partial + raw).decode(errors="replace").strip()
+            partial = b""
+            if line:
+                self.handle_line(line)
+
+    def _disconnected(self, exc):
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            self._lock.notify_all()
+        self._fail_all(exc)
+        if self.on_disconnect:
+            self.on_disconnect(exc)
+
+    def _fail_all(self, exc):
+        with self._lock:
+            waiting = [item[2] for item in self._in_flight]
+            for lane in LANES:
+                waiting += [item[2] for item in self._lanes[lane]]
+                self._lanes[lane].clear()
+            self._in_flight.clear()
+            self._realtime.clear()
+            self._buffered = 0
+            self._lock.notify_all()
+        for future in waiting:
+            if not future.done():
+                future.set_exception(exc)
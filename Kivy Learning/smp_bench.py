@@ -0,0 +1,98 @@
+"""
+Measure how the engine's parallel (Lazy SMP) search scales with the
+number of search processes.
+
+    python smp_bench.py                        # 1 vs 2 vs 4 processes
+    python smp_bench.py --threads 1 2 3 --depth 6 --movetime 2
+
+Every position is searched twice per process count, each time from an
+empty transposition table:
+
+    fixed depth   time to finish --depth; speedup = time(1) / time(N)
+    fixed time    depth and nodes reached in --movetime s; node speedup =
+                  nodes(N) / nodes(1)
+
+Speedup is only possible with as many free cores as processes
+(os.cpu_count() is printed for reference).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import chess
+
+from bot_worker import BotWorker
+from perft_bench import POSITIONS
+
+BENCH_POSITIONS = ["start", "kiwipete", "endgame", "middlegame"]
+
+
+def search(worker, board, **limits):
+    """Run one search to completion and return its final report."""
+    result = []
+    worker.on_move = result.append
+    worker.new_game()
+    worker.go(board, **limits)
+    while worker.searching:
+        worker.poll()
+        time.sleep(0.005)
+    return result[0]
+
+
+def run(threads, names, depth, movetime):
+    worker = BotWorker(threads=threads)
+    rows = []
+    try:
+        for name in names:
+            board = chess.Board(POSITIONS[name][0])
+            start = time.perf_counter()
+            fixed_depth = search(worker, board, depth=depth)
+            elapsed = time.perf_counter() - start
+            fixed_time = search(worker, board, movetime=movetime)
+            rows.append({"position": name, "threads": threads,
+                         "depth_time": elapsed, "depth_nodes": fixed_depth["nodes"],
+                         "depth_move": fixed_depth["move"],
+                         "time_depth": fixed_time["depth"], "time_nodes": fixed_time["nodes"],
+                         "time_move": fixed_time["move"]})
+    finally:
+        worker.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4],
+                        help="process counts to compare (the first is the baseline)")
+    parser.add_argument("--position", action="append", choices=list(POSITIONS),
+                        help="position(s) to run (default: %s)" % ", ".join(BENCH_POSITIONS))
+    parser.add_argument("--depth", type=int, default=5, help="depth for the fixed-depth run")
+    parser.add_argument("--movetime", type=float, default=1.0, help="s for the fixed-time run")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    names = args.position or BENCH_POSITIONS
+    print(f"cpu count {os.cpu_count()}, depth {args.depth}, movetime {args.movetime}s")
+    print(f"{'position':12s}{'threads':>8s}{'to depth':>10s}{'speedup':>9s}"
+          f"{'depth':>7s}{'nodes':>10s}{'speedup':>9s}")
+    results = []
+    baseline = {}
+    for threads in args.threads:
+        for r in run(threads, names, args.depth, args.movetime):
+            results.append(r)
+            base = baseline.setdefault(r["position"], r)
+            r["time_speedup"] = base["depth_time"] / r["depth_time"]
+            r["node_speedup"] = r["time_nodes"] / float(base["time_nodes"] or 1)
+            print(f"{r['position']:12s}{threads:8d}{r['depth_time']:9.2f}s"
+                  f"{r['time_speedup']:8.2f}x{r['time_depth']:7d}{r['time_nodes']:10d}"
+                  f"{r['node_speedup']:8.2f}x")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,21 +2,31 @@ from kivy.app import App
 from kivy.uix.widget import Widget
 from kivy.uix.image import Image
 from kivy.uix.behaviors import DragBehavior, ButtonBehavior
-from kivy.uix.label import Label
 from kivy.uix.textinput import TextInput
-from kivy.graphics import Color, Rectangle
 from kivy.core.window import Window
+import os
+import sys
+
+# The shared board helpers live next to the other Kivy code.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "Kivy Learning"))
+from board_layout import BoardLayout
+from board_overlay import HighlightOverlay
+from board_texture import BoardBackground
+from piece_assets import get_atlas
 
 # Set the window size
 Window.size = (960, 540)
 Window.left = 0
 Window.top = 0
 
+LABEL_MARGIN = 20  # px left of and below the board for the coordinates
+
 class ChessPiece(Image):
-    def __init__(self, square_size, board_offset, **kwargs):
+    def __init__(self, square_size, board_offset, grid=(0, 0), **kwargs):
         super().__init__(**kwargs)
         self.square_size = square_size
         self.board_offset = board_offset  # Offset of the board within the Kivy window
+        self.grid = grid  # (column, row) of the square, counted from the bottom left
         self.selected = False
         self.default_color = (1, 1, 1, 1)  # Default color
         self.selected_color = (0.5, 0.5, 1, 1)  # Highlight selected piece
@@ -29,16 +39,30 @@ class ChessPiece(Image):
         self.selected = False
         self.color = self.default_color  # Restore original color
 
+    def set_geometry(self, square_size, board_offset):
+        """Follow a resized board; the piece stays on its square."""
+        self.square_size = square_size
+        self.board_offset = board_offset
+        self.size = (square_size, square_size)
+        self.pos = (board_offset[0] + self.grid[0] * square_size,
+                    board_offset[1] + self.grid[1] * square_size)
+
 
 class ChessBoard(Widget):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.board_size = 960  # Chessboard size
-        self.square_size = self.board_size // 8  # Size of each square
+        # The board fills whatever window it is in and is refitted on resize.
+        self.board_layout = BoardLayout(self, on_layout=self.on_board_layout,
+                                        margin=LABEL_MARGIN, use_pos=False)
+        self.geometry = self.board_layout.compute(*Window.size)
+        self.board_size = self.geometry.board_size  # Chessboard size
+        self.square_size = self.geometry.square_size  # Size of each square
         self.selected_piece = None  # Currently selected piece
         self.move_log = []  # Store moves
 
         self.white = True
+        self.background = None
+        self.highlights = None
 
         self.build_board()
         self.add_labels(white=self.white)
@@ -47,47 +71,44 @@ class ChessBoard(Widget):
 
     def build_board(self):
         """Draw the chessboard grid."""
-        self.canvas.clear()
-        colors = [(1, 1, 1, 1), (0.5, 0.5, 0.5, 1)]  # Alternating colors (white and gray)
+        colors = ((1, 1, 1, 1), (0.5, 0.5, 0.5, 1))  # Alternating colors (white and gray)
 
         # Center the chessboard within the Kivy window
-        self.center_x = (Window.width - self.board_size) / 2
-        self.center_y = (Window.height - self.board_size) / 2
-
-        with self.canvas:
-            for row in range(8):
-                for col in range(8):
-                    color_index = (row + col) % 2
-                    Color(*colors[color_index])
-                    Rectangle(
-                        pos=(self.center_x + col * self.square_size,
-                             self.center_y + row * self.square_size),
-                        size=(self.square_size, self.square_size)
-                    )
+        self.center_x, self.center_y = self.geometry.origin
+
+        # Squares and coordinates are rendered once into a cached texture.
+        if self.background is None:
+            self.background = BoardBackground(self.canvas.before, (self.center_x, self.center_y),
+                                              self.square_size, colors=colors,
+                                              flipped=not self.white, label_margin=LABEL_MARGIN)
+        else:
+            self.background.update((self.center_x, self.center_y), self.square_size)
+
+        # Highlights are drawn over the pieces and survive canvas.clear().
+        if self.highlights is None:
+            self.highlights = HighlightOverlay(self.canvas.after, (self.center_x, self.center_y),
+                                               self.square_size,
+                                               colors={"move": (0.5, 1, 0.5, 0.5)})
+        else:
+            self.highlights.set_geometry((self.center_x, self.center_y), self.square_size)
+
+    def on_board_layout(self, geometry):
+        """Refit the board to a resized window, moving what is already there."""
+        self.geometry = geometry
+        self.board_size = geometry.board_size
+        self.square_size = geometry.square_size
+        self.build_board()
+        for child in self.children:
+            if isinstance(child, ChessPiece):
+                child.set_geometry(self.square_size, geometry.origin)
 
     def add_labels(self, white=True):
-        """Add traditional chess labels around the board."""
-        for i in range(8):
-            # Column labels (a-h)
-            column_label = Label(
-                text=chr(97+i) if white else chr(97-i),
-                #text=chr(97 + i),
-                font_size=16,
-                size_hint=(None, None),
-                size=(self.square_size, 20),
-                pos=(self.center_x + i * self.square_size, self.center_y - 20)
-            )
-            self.add_widget(column_label)
-
-            # Row labels (1-8)
-            row_label = Label(
-                text=str(8-i) if white else str(i+1),  # Reverse labels for white on bottom
-                font_size=16,
-                size_hint=(None, None),
-                size=(20, self.square_size),
-                pos=(self.center_x - 20, self.center_y + (7 - i) * self.square_size)
-            )
-            self.add_widget(row_label)
+        """Add traditional chess labels around the board.
+           They are drawn into the board texture, which is only re-rendered
+           when the orientation changes.
+        """
+        self.white = white
+        self.background.update(flipped=not white)
 
     def add_pieces(self, white=True):
         """Add all chess pieces to their initial positions."""
@@ -125,27 +146,16 @@ class ChessBoard(Widget):
                 'black_pawn': [(6, col) for col in range(8)],
             }
 
-        piece_images = {
-            'white_rook': 'figures/white_rook.png',
-            'white_knight': 'figures/white_knight.png',
-            'white_bishop': 'figures/white_bishop.png',
-            'white_queen': 'figures/white_queen.png',
-            'white_king': 'figures/white_king.png',
-            'white_pawn': 'figures/white_pawn.png',
-            'black_rook': 'figures/black_rook.png',
-            'black_knight': 'figures/black_knight.png',
-            'black_bishop': 'figures/black_bishop.png',
-            'black_queen': 'figures/black_queen.png',
-            'black_king': 'figures/black_king.png',
-            'black_pawn': 'figures/black_pawn.png',
-        }
+        # Every piece shares one atlas texture; no image files are read per piece.
+        atlas = get_atlas(self.square_size)
 
         for piece, positions in piece_positions.items():
             for row, col in positions:
                 piece_image = ChessPiece(
                     square_size=self.square_size,
                     board_offset=(self.center_x, self.center_y),
-                    source=piece_images[piece],
+                    grid=(col, 7 - row),
+                    texture=atlas.texture(piece),
                     size_hint=(None, None),
                     size=(self.square_size, self.square_size),
                     pos=(self.center_x + col * self.square_size,
@@ -244,26 +254,12 @@ class ChessBoard(Widget):
 
     def highlight_moves(self, piece):
         """Highlight possible moves for the selected piece."""
-        self.clear_highlights()
-
-        # Example: Highlight all squares in the same column for pawns
-        for i in range(8):
-            x = piece.board_offset[0] + i * piece.square_size
-            y = piece.y  # Highlight along the current row for simplicity
-
-            with self.canvas:
-                Color(0.5, 1, 0.5, 0.5)  # Green with transparency
-                rect = Rectangle(
-                    pos=(x, piece.board_offset[1] + (i * piece.square_size)),
-                    size=(self.square_size, self.square_size)
-                )
-                self.highlighted_squares.append(rect)
+        # Example: Highlight the squares on the board's diagonal for now
+        self.highlights.show({"move": [(i, i) for i in range(8)]})
 
     def clear_highlights(self):
         """Clear all highlighted squares."""
-        for rect in self.highlighted_squares:
-            self.canvas.remove(rect)
-        self.highlighted_squares = []
+        self.highlights.clear()
 
     def on_touch_down(self, touch):
         """Handle moving the selected piece."""
@@ -277,6 +273,7 @@ class ChessBoard(Widget):
 
             # Check if a valid square is clicked
             if 0 <= col < 8 and 0 <= row < 8:
+                self.selected_piece.grid = (col, row)
                 self.selected_piece.pos = (
                     self.center_x + col * self.square_size,
                     self.center_y + row * self.square_size
@@ -4,15 +4,31 @@ from kivy.uix.slider import Slider
 from kivy.uix.label import Label
 from kivy.core.window import Window
 from kivy.clock import Clock
+import os
+import queue
+import sys
 import serial
 import time
 
-# Establish serial connection to Arduino
-#arduino = serial.Serial('/dev/cu.usbserial-10', 9600, timeout=1)  # Replace with your port
+# The shared serial actor lives next to the gantry code.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "Kivy Learning"))
+from serial_actor import SerialActor
+
+ARDUINO_PORT = '/dev/cu.usbserial-10'  # Replace with your port
+BAUD_RATE = 9600  # Must match Serial.begin() in the stepper sketch
 
 
 class GantryControlApp(App):
     def build(self):
+        # One actor owns the port; the sketch never answers, so each command's
+        # future resolves as soon as it has been written.
+        try:
+            self.arduino = SerialActor(serial.Serial(ARDUINO_PORT, BAUD_RATE, timeout=1))
+            self.arduino.start()
+        except serial.SerialException as e:
+            print(f"Could not open {ARDUINO_PORT}: {e}")
+            self.arduino = None
+
         self.speed = 0
         self.keys_pressed = set()  # Track currently pressed keys
         self.last_command_time = time.time()  # Timestamp of the last command sent
@@ -73,13 +89,19 @@ class GantryControlApp(App):
         self.keys_pressed.clear()
 
     def send_command(self, command):
-        if arduino.is_open:
-            arduino.write(f"{command}\n".encode('utf-8'))
+        if self.arduino is None:
+            return
+        try:
+            # Never block the UI: a stale motion command is worth dropping.
+            self.arduino.send(command, timeout=0)
+        except queue.Full:
+            print(f"Serial queue full, dropped: {command}")
         return
 
     def on_stop(self):
-        if arduino.is_open:
-            arduino.close()
+        if self.arduino is not None:
+            self.arduino.stop()
+            self.arduino.ser.close()
         return
 
 